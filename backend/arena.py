@@ -0,0 +1,285 @@
+import json
+import time
+import asyncio
+from typing import Callable, Dict, List, Optional
+
+from trader_agent import TraderAgent
+from paper_engine import PaperEngine
+from state_stream import StateStream
+from broadcaster import Broadcaster, encode_message
+from decision_cache import DecisionCache
+from journal import TradeJournal
+from order_book import OrderBook
+from state_bus import MAIN_CHANNEL, agent_channel
+from risk_metrics import RiskMetrics
+from instrumentation import ENGINE_LATENCY
+
+STRATEGIES = ("llm", "keyword")
+ENTRY_ORDER_TYPES = ("market", "limit")
+DEFAULT_AGENTS = [{"name": "alpha"}]
+
+
+class AgentConfig:
+    """One competitor: how it decides (strategy/persona), how it sizes risk and how it enters."""
+
+    __slots__ = ("name", "strategy", "persona", "contrarian", "initial_cash", "min_confidence", "max_allocation",
+                 "order_type", "limit_offset", "take_profit", "stop_loss", "order_ttl")
+
+    def __init__(self, name: str, strategy: str = "llm", persona: Optional[str] = None,
+                 contrarian: bool = False, initial_cash: float = 100000.0,
+                 min_confidence: float = 0.35, max_allocation: Optional[float] = None,
+                 order_type: str = "market", limit_offset: float = 0.0, take_profit: Optional[float] = None,
+                 stop_loss: Optional[float] = None, order_ttl: Optional[float] = None):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy {strategy!r} for agent {name!r}")
+        if order_type not in ENTRY_ORDER_TYPES:
+            raise ValueError(f"Unknown order_type {order_type!r} for agent {name!r}")
+        self.name = name
+        self.strategy = strategy
+        self.persona = persona
+        self.contrarian = contrarian  # Trades against the analyst's call
+        self.initial_cash = initial_cash
+        self.min_confidence = min_confidence
+        self.max_allocation = max_allocation
+        # Entries through the order book: limit orders limit_offset inside the quote, optional
+        # bracket exits take_profit / stop_loss (fractions) away, unfilled entries dropped after order_ttl s
+        self.order_type = order_type
+        self.limit_offset = limit_offset
+        self.take_profit = take_profit
+        self.stop_loss = stop_loss
+        self.order_ttl = order_ttl
+
+    @property
+    def uses_orders(self) -> bool:
+        return self.order_type != "market" or bool(self.take_profit or self.stop_loss)
+
+    @property
+    def analyst_key(self) -> tuple:
+        # Agents with the same strategy + persona share one analyst and one LLM call
+        return (self.strategy, self.persona or "")
+
+
+class ArenaAgent:
+    __slots__ = ("config", "engine", "metrics", "stream", "channel")
+
+    def __init__(self, config: AgentConfig, journal: Optional[TradeJournal] = None):
+        self.config = config
+        self.engine = PaperEngine(config.initial_cash, config.min_confidence, config.max_allocation)
+        if journal:
+            journal.attach(config.name, self.engine)  # Before the stream, so it starts from the restored book
+        self.metrics = RiskMetrics(self.engine)
+        self.stream = StateStream(self.engine, self.metrics)
+        self.channel = Broadcaster()  # /ws/agents/{name}
+
+    @property
+    def name(self) -> str:
+        return self.config.name
+
+
+def _invert(decision: Dict) -> Dict:
+    flipped = {"BUY": "SELL", "SELL": "BUY"}.get(decision.get("action"))
+    if not flipped:
+        return decision
+    return {**decision, "action": flipped, "reasoning": f"Contrarian: {decision.get('reasoning', '')}"}
+
+
+def load_agent_configs(path: Optional[str]) -> List[AgentConfig]:
+    """Agent list from a JSON file (list of AgentConfig fields); one default agent otherwise."""
+    entries = DEFAULT_AGENTS
+    if path:
+        with open(path) as f:
+            entries = json.load(f)
+    return [AgentConfig(**entry) for entry in entries]
+
+
+class Arena:
+    """
+    Many PaperEngine portfolios competing on one news feed and one quote feed.
+
+    Shared work is done once per article, not once per agent: each distinct
+    analyst (strategy + persona) analyzes the batch once, and each ticker any
+    agent wants is priced once and fanned out to every engine. Per-agent work
+    is an O(1) engine update plus a delta for the agent's own channel, which
+    is only encoded when that channel has listeners.
+
+    With an order book every decision becomes an order: market orders fill
+    at once with slippage and commission, limit entries and bracket exits
+    rest and are filled by mark() as quotes arrive.
+    """
+
+    def __init__(self, configs: List[AgentConfig], cache: Optional[DecisionCache] = None,
+                 journal: Optional[TradeJournal] = None, order_book: Optional[OrderBook] = None,
+                 model=None):
+        if not configs:
+            raise ValueError("Arena needs at least one agent")
+        names = [c.name for c in configs]
+        if len(set(names)) != len(names):
+            raise ValueError("Agent names must be unique")
+
+        self.journal = journal  # Persists fills and restores every agent's book on startup
+        self.agents = [ArenaAgent(config, journal) for config in configs]
+        self.by_name: Dict[str, ArenaAgent] = {a.name: a for a in self.agents}
+        self.primary = self.agents[0]  # Shown on the main /ws dashboard
+
+        if order_book is None and any(c.uses_orders for c in configs):
+            order_book = OrderBook()  # Resting orders, no trading costs
+        self.order_book = order_book
+        if order_book:
+            for agent in self.agents:
+                order_book.register(agent.name, agent.engine)
+
+        # publish(channel, encoded) relays every agent's stream to gateway processes
+        self.publish: Optional[Callable[[str, str], None]] = None
+
+        self.cache = cache or DecisionCache()
+        # `model` replaces Gemini for every analyst (tests and benchmarks pass a fake)
+        self.analysts: Dict[tuple, TraderAgent] = {}
+        for config in configs:
+            if config.analyst_key not in self.analysts:
+                self.analysts[config.analyst_key] = TraderAgent(cache=self.cache, persona=config.persona, model=model)
+
+    @property
+    def max_batch(self) -> int:
+        return min(analyst.max_batch for analyst in self.analysts.values())
+
+    async def analyze(self, articles: List[Dict]) -> List[Dict[tuple, Dict]]:
+        """Pipeline analyze stage: every distinct analyst looks at the batch once."""
+        keys = list(self.analysts)
+
+        async def run(key):
+            analyst = self.analysts[key]
+            if key[0] == "keyword":
+                return analyst.fallback_batch(articles)
+            return await analyst.analyze_batch_async(articles)
+
+        results = await asyncio.gather(*(run(key) for key in keys))
+        return [
+            {key: decisions[i] for key, decisions in zip(keys, results) if decisions[i]}
+            for i in range(len(articles))
+        ]
+
+    def tickers(self, decisions: Dict[tuple, Dict]) -> List[str]:
+        """Distinct tickers any agent might trade on this article."""
+        return sorted({
+            d.get("ticker", "SPY").upper()
+            for d in decisions.values()
+            if d.get("action") in ("BUY", "SELL")
+        })
+
+    def execute(self, article: Dict, decisions: Dict[tuple, Dict], prices: Dict[str, float]) -> List[Dict]:
+        """
+        Pipeline execute stage. Fills every agent in a fixed order, sends each
+        agent's thought and delta to its channel, and returns the primary
+        agent's messages for the main dashboard.
+        """
+        primary_messages: List[Dict] = []
+        for agent in self.agents:
+            decision = decisions.get(agent.config.analyst_key)
+            if not decision:
+                continue
+            if agent.config.contrarian:
+                decision = _invert(decision)
+            ticker = decision.get("ticker", "SPY").upper()
+            price = prices.get(ticker)
+
+            if price:
+                start = time.perf_counter()
+                if self.order_book:
+                    self._submit(agent, decision, ticker, price)
+                else:
+                    agent.engine.execute_trade({**decision, "ticker": ticker}, current_price=price)
+                agent.metrics.observe()
+                ENGINE_LATENCY.observe(time.perf_counter() - start)
+            messages = [{
+                "type": "AGENT_THOUGHT",
+                "data": {
+                    "agent": agent.name,
+                    "article": article["title"],
+                    "thought": decision.get("reasoning", "Analyzing..."),
+                    "action": decision.get("action", "HOLD"),
+                    "confidence": decision.get("confidence", 0.5),
+                    "ticker": ticker,
+                    "live_price": price
+                }
+            }]
+            delta = agent.stream.delta()
+            if delta:
+                messages.append(delta)
+
+            if agent is self.primary:
+                primary_messages = messages
+            self._send(agent, messages)
+        return primary_messages
+
+    def _submit(self, agent: ArenaAgent, decision: Dict, ticker: str, price: float):
+        config = agent.config
+        self.order_book.submit_decision(
+            agent.name, decision, ticker, price, config.order_type, config.limit_offset,
+            config.take_profit, config.stop_loss, config.order_ttl,
+        )
+
+    def mark(self, prices: Dict[str, float]) -> Optional[Dict]:
+        """
+        Fills resting orders the new quotes cross, then revalues every engine
+        holding one of the changed tickers. Sends deltas to agent channels and
+        returns the primary agent's delta.
+        """
+        filled = set()
+        if self.order_book:
+            filled = {fill["agent"] for fill in self.order_book.on_prices(prices)}
+        primary_delta = None
+        for agent in self.agents:
+            held = {t: p for t, p in prices.items() if t in agent.engine.positions}
+            if not held and agent.name not in filled:
+                continue
+            agent.engine._update_valuation(held)
+            agent.metrics.observe()
+            delta = agent.stream.delta()
+            if delta:
+                if agent is self.primary:
+                    primary_delta = delta
+                self._send(agent, [delta])
+        return primary_delta
+
+    def held_tickers(self) -> set:
+        """Held positions plus tickers with resting orders: what the quote feed keeps fresh."""
+        tickers = self.order_book.tickers() if self.order_book else set()
+        for agent in self.agents:
+            tickers.update(agent.engine.positions)
+        return tickers
+
+    def _send(self, agent: ArenaAgent, messages: List[Dict]):
+        publish = self.publish
+        if agent.channel.active_connections or publish:
+            for message in messages:
+                data = encode_message(message)
+                agent.channel.broadcast_encoded(data)
+                if publish:
+                    publish(agent_channel(agent.name), data)
+
+    def snapshots(self) -> Dict[str, Dict]:
+        """Current snapshot of every stream, keyed by state bus channel."""
+        channels = {agent_channel(agent.name): agent.stream.snapshot() for agent in self.agents}
+        channels[MAIN_CHANNEL] = self.primary.stream.snapshot()
+        return channels
+
+    def leaderboard(self) -> List[Dict]:
+        rows = []
+        for agent in self.agents:
+            row = agent.engine.get_summary()
+            row.update(agent.metrics.summary())
+            row["agent"] = agent.name
+            row["strategy"] = agent.config.strategy
+            row["contrarian"] = agent.config.contrarian
+            rows.append(row)
+        rows.sort(key=lambda r: r["portfolio_value"], reverse=True)
+        for rank, row in enumerate(rows, 1):
+            row["rank"] = rank
+        return rows
+
+    def close(self):
+        for analyst in self.analysts.values():
+            analyst.executor.shutdown()
+        self.cache.close()
+        if self.journal:
+            self.journal.close()
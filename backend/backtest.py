@@ -0,0 +1,357 @@
+"""
+Historical replay of news + prices through TraderAgent and PaperEngine.
+
+    python backtest.py --news news.csv --prices prices.csv --out result.json
+
+Prices: CSV (or Parquet, needs pandas) in long form `time,ticker,close` or
+wide form `time,AAPL,MSFT,...`. News: CSV or JSONL with `time,title[,source]`.
+Times are epoch seconds or ISO 8601. Everything runs on a SimulatedClock, so
+a year of minute bars replays as fast as the CPU allows.
+"""
+import csv
+import json
+import math
+import argparse
+import datetime
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from clock import SimulatedClock
+from paper_engine import PaperEngine
+from trader_agent import TraderAgent
+from decision_cache import DecisionCache
+from order_book import OrderBook, create_commission, create_slippage
+
+MODES = ("fallback", "cache", "llm")
+SECONDS_PER_YEAR = 365 * 24 * 3600
+
+
+def parse_time(value) -> float:
+    """Epoch seconds or ISO 8601 -> epoch seconds."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+class PriceHistory:
+    """Bars in time order, stored column-wise in flat arrays."""
+
+    def __init__(self, tickers: List[str], times: array, ticker_ids: array, closes: array):
+        self.tickers = tickers
+        self.ticker_index = {t: i for i, t in enumerate(tickers)}
+        self.times = times            # array('d') epoch seconds
+        self.ticker_ids = ticker_ids  # array('i') index into tickers
+        self.closes = closes          # array('d')
+
+    def __len__(self):
+        return len(self.times)
+
+    @classmethod
+    def from_rows(cls, rows) -> "PriceHistory":
+        """rows: iterable of (time, ticker, close)."""
+        parsed = sorted(rows, key=lambda r: r[0])
+        tickers: List[str] = []
+        index: Dict[str, int] = {}
+        times, ticker_ids, closes = array("d"), array("i"), array("d")
+        for t, ticker, close in parsed:
+            if ticker not in index:
+                index[ticker] = len(tickers)
+                tickers.append(ticker)
+            times.append(t)
+            ticker_ids.append(index[ticker])
+            closes.append(close)
+        return cls(tickers, times, ticker_ids, closes)
+
+    @classmethod
+    def from_csv(cls, path: str) -> "PriceHistory":
+        with open(path, newline="") as f:
+            reader = csv.reader(f)
+            header = [h.strip().lower() for h in next(reader)]
+            return cls.from_rows(_price_rows(header, reader))
+
+    @classmethod
+    def from_parquet(cls, path: str) -> "PriceHistory":
+        try:
+            import pandas as pd
+        except ImportError:
+            raise RuntimeError("Reading Parquet price history requires pandas + pyarrow")
+        frame = pd.read_parquet(path)
+        header = [str(c).lower() for c in frame.columns]
+        return cls.from_rows(_price_rows(header, frame.astype(str).itertuples(index=False)))
+
+    @classmethod
+    def load(cls, path: str) -> "PriceHistory":
+        return cls.from_parquet(path) if path.endswith(".parquet") else cls.from_csv(path)
+
+
+def _price_rows(header: List[str], rows):
+    time_col = header.index("time") if "time" in header else 0
+    if "ticker" in header:
+        ticker_col = header.index("ticker")
+        price_col = header.index("close") if "close" in header else header.index("price")
+        for row in rows:
+            if row[price_col]:
+                yield parse_time(row[time_col]), row[ticker_col].upper(), float(row[price_col])
+    else:
+        # Wide form: one column per ticker
+        columns = [(i, name.upper()) for i, name in enumerate(header) if i != time_col]
+        for row in rows:
+            t = parse_time(row[time_col])
+            for i, ticker in columns:
+                if row[i]:
+                    yield t, ticker, float(row[i])
+
+
+def load_news(path: str) -> List[Tuple[float, Dict]]:
+    """Recorded articles as (time, article) in time order."""
+    items = []
+    with open(path, newline="") as f:
+        if path.endswith(".jsonl"):
+            records = (json.loads(line) for line in f if line.strip())
+        else:
+            records = csv.DictReader(f)
+        for record in records:
+            t = parse_time(record.get("time") or record["published"])
+            items.append((t, {
+                "title": record["title"],
+                "source": record.get("source") or "Backtest",
+                "published": str(record.get("time") or record.get("published")),
+            }))
+    items.sort(key=lambda item: item[0])
+    return items
+
+
+class BacktestResult:
+    def __init__(self, equity_times: array, equity_values: array, stats: Dict):
+        self.equity_times = equity_times
+        self.equity_values = equity_values
+        self.stats = stats
+
+    def to_dict(self) -> Dict:
+        return {
+            "stats": self.stats,
+            "equity_curve": [[t, round(v, 2)] for t, v in zip(self.equity_times, self.equity_values)],
+        }
+
+
+class _TradeStats:
+    """Trade statistics gathered from engine trade listeners (no trade list kept)."""
+
+    def __init__(self):
+        self.buys = 0
+        self.sells = 0
+        self.wins = 0
+        self.notional = 0.0
+
+    def __call__(self, trade: Dict, fill_price: float):
+        self.notional += trade["qty"] * fill_price
+        if trade["action"] == "BUY":
+            self.buys += 1
+        else:
+            self.sells += 1
+            if trade.get("pnl", 0) > 0:
+                self.wins += 1
+
+
+class Backtest:
+    """
+    Replays bars and news in time order on a SimulatedClock. News at time t
+    trades at the last close seen before t, so there is no lookahead.
+
+    mode: "fallback" - keyword analysis only (deterministic with seed)
+          "cache"    - cached LLM decisions where available, fallback otherwise
+          "llm"      - live Gemini calls, rate-limited on simulated time
+
+    With slippage/commission models or bracket exits (take_profit and
+    stop_loss as fractions of the entry quote), decisions go through an
+    OrderBook and resting exits are checked against every bar.
+    """
+
+    def __init__(self, prices: PriceHistory, news: List[Tuple[float, Dict]], mode: str = "fallback",
+                 initial_cash: float = 100000.0, min_confidence: float = 0.35,
+                 max_allocation: Optional[float] = None, sample_interval: float = 300.0,
+                 cache: Optional[DecisionCache] = None, agent: Optional[TraderAgent] = None,
+                 seed: int = 0, clock: Optional[SimulatedClock] = None, allocation_scale: float = 1.0,
+                 fallback_weights: Optional[Dict] = None, slippage=None, commission=None,
+                 take_profit: Optional[float] = None, stop_loss: Optional[float] = None):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}")
+        self.prices = prices
+        self.news = news
+        self.mode = mode
+        self.sample_interval = sample_interval
+        self.clock = clock or SimulatedClock(prices.times[0] if len(prices) else 0.0)
+        self.engine = PaperEngine(initial_cash, min_confidence, max_allocation, clock=self.clock,
+                                  allocation_scale=allocation_scale)
+        self.agent = agent or TraderAgent(cache=cache, clock=self.clock, seed=seed, fallback_weights=fallback_weights)
+        self.agent.clock = self.clock
+        self.skipped_news = 0  # Decisions on tickers with no price yet
+        self.order_book = None
+        self.take_profit = take_profit
+        self.stop_loss = stop_loss
+        if slippage or commission or take_profit or stop_loss:
+            self.order_book = OrderBook(slippage, commission, clock=self.clock)
+            self.order_book.register("backtest", self.engine)
+        self._fallback_decisions = None
+
+    def _decide(self, article: Dict) -> Optional[Dict]:
+        agent = self.agent
+        if self._fallback_decisions is not None:
+            return next(self._fallback_decisions)
+        if self.mode == "llm":
+            return agent.analyze_news(article)
+        if self.mode == "cache":
+            cached = agent.cache.get(article["title"], article.get("source"), agent.cache_namespace)
+            if cached:
+                return cached
+        return agent._fallback_analysis(article)
+
+    def run(self) -> BacktestResult:
+        prices, engine, clock = self.prices, self.engine, self.clock
+        tickers, ticker_index = prices.tickers, prices.ticker_index
+        times, ticker_ids, closes = prices.times, prices.ticker_ids, prices.closes
+        last_close = [0.0] * len(tickers)
+        trade_stats = _TradeStats()
+        engine.trade_listeners.append(trade_stats)
+
+        news = self.news
+        news_i, news_n = 0, len(news)
+        if self.mode == "fallback":
+            # Same decisions (and RNG draws) as one article at a time, scored in a single pass
+            self._fallback_decisions = iter(self.agent.fallback_batch([article for _, article in news]))
+        equity_times, equity_values = array("d"), array("d")
+        next_sample = times[0] if len(times) else 0.0
+        mark = engine.mark
+        positions = engine.positions
+        book = self.order_book
+        resting = book._books if book else {}  # Tickers with resting orders
+
+        for i in range(len(times)):
+            t = times[i]
+            # Trade every article published up to this bar on the prices before it
+            while news_i < news_n and news[news_i][0] <= t:
+                published, article = news[news_i]
+                news_i += 1
+                clock.advance_to(published)
+                decision = self._decide(article)
+                if not decision:
+                    continue
+                k = ticker_index.get(str(decision.get("ticker", "SPY")).upper())
+                if k is None or last_close[k] <= 0:
+                    self.skipped_news += 1
+                    continue
+                if book:
+                    book.submit_decision("backtest", decision, tickers[k], last_close[k],
+                                         take_profit=self.take_profit, stop_loss=self.stop_loss)
+                else:
+                    engine.execute_trade({**decision, "ticker": tickers[k]}, current_price=last_close[k])
+
+            k = ticker_ids[i]
+            close = closes[i]
+            last_close[k] = close
+            ticker = tickers[k]
+            if ticker in resting:
+                book.on_price(ticker, close)
+            if ticker in positions:
+                mark(ticker, close)
+
+            if t >= next_sample:
+                clock.advance_to(t)
+                equity_times.append(t)
+                equity_values.append(engine.portfolio_value)
+                next_sample = t + self.sample_interval
+
+        if len(times):
+            equity_times.append(times[-1])
+            equity_values.append(engine.portfolio_value)
+
+        stats = self._stats(equity_times, equity_values, trade_stats)
+        return BacktestResult(equity_times, equity_values, stats)
+
+    def _stats(self, times: array, values: array, trades: _TradeStats) -> Dict:
+        engine = self.engine
+        peak, max_drawdown = 0.0, 0.0
+        mean, m2, n = 0.0, 0.0, 0  # Welford over per-sample returns
+        for i, value in enumerate(values):
+            if value > peak:
+                peak = value
+            elif peak > 0:
+                max_drawdown = max(max_drawdown, (peak - value) / peak)
+            if i and values[i - 1] > 0:
+                r = value / values[i - 1] - 1
+                n += 1
+                delta = r - mean
+                mean += delta / n
+                m2 += delta * (r - mean)
+
+        sharpe = 0.0
+        if n > 1 and m2 > 0:
+            std = math.sqrt(m2 / (n - 1))
+            span = times[-1] - times[0]
+            periods_per_year = SECONDS_PER_YEAR / (span / n) if span > 0 else 0
+            sharpe = mean / std * math.sqrt(periods_per_year)
+
+        final = engine.portfolio_value
+        return {
+            "start": times[0] if len(times) else None,
+            "end": times[-1] if len(times) else None,
+            "bars": len(self.prices),
+            "articles": len(self.news),
+            "skipped_articles": self.skipped_news,
+            "initial_cash": engine.initial_cash,
+            "final_value": round(final, 2),
+            "total_return_pct": round((final / engine.initial_cash - 1) * 100, 4),
+            "max_drawdown_pct": round(max_drawdown * 100, 4),
+            "sharpe": round(sharpe, 4),
+            "trades": trades.buys + trades.sells,
+            "buys": trades.buys,
+            "sells": trades.sells,
+            "win_rate": round(trades.wins / trades.sells, 4) if trades.sells else 0.0,
+            "realized_pnl": round(engine.pnl, 2),
+            "turnover": round(trades.notional / engine.initial_cash, 4),
+            "fees": round(self.order_book.fees, 2) if self.order_book else 0.0,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded news and prices through the arena's agent.")
+    parser.add_argument("--news", required=True, help="CSV/JSONL with time,title[,source]")
+    parser.add_argument("--prices", required=True, help="CSV/Parquet bars (long or wide form)")
+    parser.add_argument("--mode", choices=MODES, default="fallback")
+    parser.add_argument("--cache", help="SQLite decision cache (DECISION_CACHE_PATH) for --mode cache")
+    parser.add_argument("--cash", type=float, default=100000.0)
+    parser.add_argument("--min-confidence", type=float, default=0.35)
+    parser.add_argument("--max-allocation", type=float)
+    parser.add_argument("--sample-interval", type=float, default=300.0, help="Equity curve spacing in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--slippage", help="none, bps[:5] or sqrt[:spread_bps[:impact_bps[:ref_qty]]]")
+    parser.add_argument("--commission", help="none, per_share[:rate[:min[:max_pct]]] or bps[:1]")
+    parser.add_argument("--take-profit", type=float, help="Bracket exit, fraction above the entry quote")
+    parser.add_argument("--stop-loss", type=float, help="Bracket exit, fraction below the entry quote")
+    parser.add_argument("--out", help="Write stats + equity curve JSON here")
+    args = parser.parse_args()
+
+    prices = PriceHistory.load(args.prices)
+    news = load_news(args.news)
+    clock = SimulatedClock(prices.times[0] if len(prices) else 0.0)
+    # On the simulated clock, decisions cached after the replay period count as fresh
+    cache = DecisionCache(path=args.cache, clock=clock) if args.cache else None
+    backtest = Backtest(
+        prices, news, mode=args.mode, initial_cash=args.cash, min_confidence=args.min_confidence,
+        max_allocation=args.max_allocation, sample_interval=args.sample_interval, cache=cache,
+        seed=args.seed, clock=clock, take_profit=args.take_profit, stop_loss=args.stop_loss,
+        slippage=create_slippage(args.slippage) if args.slippage else None,
+        commission=create_commission(args.commission) if args.commission else None,
+    )
+    result = backtest.run()
+    print(json.dumps(result.stats, indent=2))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(result.to_dict(), f)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+"""
+Benchmark cases. Each returns rows of {"case", "params", "metrics"}.
+Metric names say which way is better: `*_per_sec` higher, `us_*`/`ms_*` lower;
+anything else is informational.
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import subprocess
+from typing import Callable, Dict, List
+
+from benchmarks.fakes import FakeGeminiModel, FakeWebSocket, articles, headlines
+
+CASES: Dict[str, Callable] = {}
+
+
+def case(name: str):
+    def register(fn):
+        CASES[name] = fn
+        return fn
+    return register
+
+
+def _row(name: str, params: Dict, metrics: Dict) -> Dict:
+    return {"case": name, "params": params, "metrics": {k: round(v, 3) for k, v in metrics.items()}}
+
+
+def _best(setup: Callable, run: Callable, repeat: int) -> float:
+    """Fastest of `repeat` timed runs, each on fresh state from setup()."""
+    best = float("inf")
+    for _ in range(repeat):
+        state = setup()
+        start = time.perf_counter()
+        run(state)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _symbols(n: int) -> List[str]:
+    return [f"T{i:05d}" for i in range(n)]
+
+
+def _engine_with_positions(n: int, trades: int = 50):
+    from paper_engine import PaperEngine
+
+    engine = PaperEngine(initial_cash=1e12)
+    for i, symbol in enumerate(_symbols(n)):
+        engine.execute_trade({"ticker": symbol, "action": "BUY", "confidence": 0.9,
+                              "allocation_percent": 1e-6, "reasoning": "setup"}, 100.0 + i % 50)
+    rng = random.Random(1)
+    for _ in range(trades):
+        symbol = rng.choice(_symbols(n))
+        engine.execute_trade({"ticker": symbol, "action": "BUY", "confidence": 0.9,
+                              "allocation_percent": 1e-6, "reasoning": "setup"}, 100.0)
+    return engine
+
+
+@case("engine")
+def engine_cases(quick: bool, repeat: int, **_) -> List[Dict]:
+    rows = []
+    trades = 20_000 if quick else 100_000
+    for positions in (10, 100, 1000) if quick else (10, 100, 1000, 10_000):
+        symbols = _symbols(positions)
+        rng = random.Random(positions)
+        orders = [
+            ({"ticker": rng.choice(symbols), "action": rng.choice(("BUY", "SELL")), "confidence": 0.9,
+              "allocation_percent": 1e-6, "reasoning": "bench"}, rng.uniform(90, 110))
+            for _ in range(trades)
+        ]
+
+        def run_trades(engine):
+            execute = engine.execute_trade
+            for decision, price in orders:
+                execute(decision, price)
+
+        elapsed = _best(lambda: _engine_with_positions(positions), run_trades, repeat)
+        rows.append(_row("engine_execute", {"positions": positions},
+                         {"trades_per_sec": trades / elapsed, "us_per_trade": elapsed / trades * 1e6}))
+
+        ticks = [{rng.choice(symbols): rng.uniform(90, 110)} for _ in range(trades)]
+        full = {s: rng.uniform(90, 110) for s in symbols}
+
+        def run_ticks(engine):
+            update = engine._update_valuation
+            for tick in ticks:
+                update(tick)
+
+        elapsed = _best(lambda: _engine_with_positions(positions), run_ticks, repeat)
+        full_elapsed = _best(lambda: _engine_with_positions(positions),
+                             lambda engine: engine._update_valuation(full), repeat)
+        rows.append(_row("engine_valuation", {"positions": positions}, {
+            "ticks_per_sec": trades / elapsed,
+            "us_full_revalue": full_elapsed * 1e6,
+        }))
+    return rows
+
+
+@case("fallback")
+def fallback_cases(quick: bool, repeat: int, **_) -> List[Dict]:
+    from trader_agent import TraderAgent
+    from decision_cache import DecisionCache
+
+    n = 20_000 if quick else 200_000
+    items = [{"title": title} for title in headlines(n)]
+    agent = TraderAgent(cache=DecisionCache(), seed=0, model=FakeGeminiModel())
+
+    single = _best(lambda: None, lambda _: [agent._fallback_analysis(item) for item in items], repeat)
+    batch = _best(lambda: None, lambda _: agent.fallback_batch(items), repeat)
+    return [
+        _row("fallback_analysis", {"headlines": n}, {"headlines_per_sec": n / single}),
+        _row("fallback_batch", {"headlines": n}, {"headlines_per_sec": n / batch}),
+    ]
+
+
+@case("state")
+def state_cases(quick: bool, repeat: int, **_) -> List[Dict]:
+    from broadcaster import encode_message
+    from state_stream import StateStream
+
+    rows = []
+    calls = 200 if quick else 1000
+    for positions in (10, 100, 1000):
+        engine = _engine_with_positions(positions)
+        stream = StateStream(engine)
+        get_state = _best(lambda: None, lambda _: [engine.get_state() for _ in range(calls)], repeat)
+        encoded = _best(lambda: None, lambda _: [encode_message(stream.snapshot()) for _ in range(calls)], repeat)
+
+        symbols = _symbols(positions)
+
+        def run_deltas(_):
+            for i in range(calls):
+                engine.mark(symbols[i % positions], 100.0 + i % 7)
+                encode_message(stream.delta())
+
+        delta = _best(lambda: None, run_deltas, repeat)
+        rows.append(_row("get_state", {"positions": positions}, {
+            "us_get_state": get_state / calls * 1e6,
+            "us_snapshot_encoded": encoded / calls * 1e6,
+            "us_delta_encoded": delta / calls * 1e6,
+            "snapshot_bytes": len(encode_message(stream.snapshot())),
+        }))
+    return rows
+
+
+@case("broadcast")
+def broadcast_cases(quick: bool, repeat: int, **_) -> List[Dict]:
+    from broadcaster import Broadcaster
+    from state_stream import StateStream
+
+    message = StateStream(_engine_with_positions(100)).snapshot()
+    messages = 50  # Below the per-client queue size, so nothing is dropped
+
+    async def fan_out(clients: int):
+        manager = Broadcaster()
+        sockets = [FakeWebSocket() for _ in range(clients)]
+        for ws in sockets:
+            await manager.connect(ws)
+        start = time.perf_counter()
+        for _ in range(messages):
+            await manager.broadcast(message)
+        enqueued = time.perf_counter() - start
+        while any(ws.received < messages for ws in sockets):
+            await asyncio.sleep(0)
+        delivered = time.perf_counter() - start
+        await manager.close()
+        return enqueued, delivered
+
+    rows = []
+    for clients in (1, 10, 100) if quick else (1, 10, 100, 1000):
+        runs = [asyncio.run(fan_out(clients)) for _ in range(repeat)]
+        enqueued = min(r[0] for r in runs)
+        delivered = min(r[1] for r in runs)
+        rows.append(_row("broadcast", {"clients": clients}, {
+            "us_broadcast": enqueued / messages * 1e6,
+            "ms_all_delivered": delivered * 1000,
+            "deliveries_per_sec": clients * messages / delivered,
+        }))
+    return rows
+
+
+@case("orders")
+def order_cases(quick: bool, repeat: int, **_) -> List[Dict]:
+    from order_book import FixedBpsSlippage, OrderBook, PerShareCommission
+    from paper_engine import PaperEngine
+
+    rows = []
+    tickers = _symbols(50)
+    ticks = 20_000 if quick else 100_000
+    for resting in (1000, 10_000) if quick else (1000, 10_000, 100_000):
+        rng = random.Random(resting)
+        specs = []
+        for i in range(resting):
+            side = rng.choice(("BUY", "SELL"))
+            # Mostly away from the market, so a tick crosses only a few of them
+            offset = rng.uniform(0.02, 0.3) * (-1 if side == "BUY" else 1)
+            specs.append((f"agent{i % 20}", rng.choice(tickers), side, rng.choice(("limit", "stop")), offset))
+        walk = [(rng.choice(tickers), 100.0 * (1 + rng.gauss(0, 0.02))) for _ in range(ticks)]
+
+        def setup():
+            book = OrderBook(FixedBpsSlippage(5), PerShareCommission())
+            for a in range(20):
+                engine = PaperEngine(initial_cash=1e12)
+                for ticker in tickers:
+                    engine.book_fill("BUY", ticker, 10**6, 100.0)
+                book.register(f"agent{a}", engine)
+            return book
+
+        def submit_all(book):
+            submit = book.submit
+            for agent, ticker, side, order_type, offset in specs:
+                trigger = 100.0 * (1 + offset if order_type == "limit" else 1 - offset)
+                if order_type == "limit":
+                    submit(agent, ticker, side, 10, "limit", limit_price=trigger)
+                else:
+                    submit(agent, ticker, side, 10, "stop", stop_price=trigger)
+
+        def submitted():
+            book = setup()
+            submit_all(book)
+            return book
+
+        def run_ticks(book):
+            on_price = book.on_price
+            for ticker, price in walk:
+                on_price(ticker, price)
+
+        def cancel_all(book):
+            for order_id in list(book.orders):
+                book.cancel(order_id)
+
+        submit_time = _best(setup, submit_all, repeat)
+        tick_time = _best(submitted, run_ticks, repeat)
+        cancel_time = _best(submitted, cancel_all, repeat)
+        book = submitted()
+        run_ticks(book)
+        rows.append(_row("order_book", {"resting": resting}, {
+            "submits_per_sec": resting / submit_time,
+            "ticks_per_sec": ticks / tick_time,
+            "cancels_per_sec": resting / cancel_time,
+            "fills": book.fills,
+        }))
+    return rows
+
+
+@case("end_to_end")
+def end_to_end_cases(quick: bool, repeat: int, llm_latency: float = 0.0, **_) -> List[Dict]:
+    """The server's wiring (arena + quotes + pipeline + broadcaster) with fake Gemini and quotes."""
+    from arena import Arena, AgentConfig
+    from broadcaster import Broadcaster
+    from decision_cache import DecisionCache
+    from pipeline import ArticlePipeline
+    from quote_service import QuoteService, RandomWalkSource
+
+    n = 100 if quick else 500
+
+    async def run(sequential: bool) -> float:
+        arena = Arena([AgentConfig("alpha"), AgentConfig("contra", contrarian=True),
+                       AgentConfig("keywords", strategy="keyword")], cache=DecisionCache())
+        for analyst in arena.analysts.values():
+            analyst.model = FakeGeminiModel(llm_latency)
+            analyst.rate_limit_delay = 0  # Exercise the LLM path on every batch
+        quotes = QuoteService(RandomWalkSource(seed=1), holdings=arena.held_tickers)
+        manager = Broadcaster()
+        for _ in range(10):
+            await manager.connect(FakeWebSocket())
+
+        async def price(article, decisions):
+            tickers = arena.tickers(decisions)
+            prices = await asyncio.gather(*(quotes.get_price(t) for t in tickers))
+            return dict(zip(tickers, prices))
+
+        pipeline = ArticlePipeline(analyze=arena.analyze, price=price, execute=arena.execute,
+                                   broadcast=manager.broadcast, batch_size=arena.max_batch)
+        pipeline.start()
+        news = articles(n, seed=7)
+        start = time.perf_counter()
+        if sequential:
+            for article in news:  # One at a time: submit, then wait for it
+                await pipeline.submit(article)
+                await pipeline.join()
+        else:
+            for article in news:
+                await pipeline.submit(article)
+            await pipeline.join()
+        elapsed = time.perf_counter() - start
+        await pipeline.stop()
+        await quotes.stop()
+        arena.close()
+        await manager.close()
+        return elapsed
+
+    rows = []
+    for mode in ("process_article", "burst"):
+        elapsed = min(asyncio.run(run(mode == "process_article")) for _ in range(repeat))
+        rows.append(_row("end_to_end", {"mode": mode, "articles": n, "llm_latency": llm_latency}, {
+            "articles_per_sec": n / elapsed,
+            "ms_per_article": elapsed / n * 1000,
+        }))
+    return rows
+
+
+# Imported on first use only; a cold `import main` must not load any of them
+HEAVY_MODULES = ("yfinance", "pandas", "google.generativeai", "requests")
+
+
+@case("startup")
+def startup_cases(quick: bool, repeat: int, **_) -> List[Dict]:
+    """Cold `import main` in a fresh interpreter, then create_app + startup/shutdown with fakes."""
+    from arena import Arena, AgentConfig
+    from main import create_app
+    from news_ingest import NewsIngest
+    from quote_service import RandomWalkSource
+
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    probe = ("import sys, time; start = time.perf_counter(); import main; "
+             f"print(time.perf_counter() - start, sum(m in sys.modules for m in {HEAVY_MODULES!r}))")
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", probe], cwd=backend, capture_output=True, text=True, check=True)
+        seconds, heavy = out.stdout.split()
+        runs.append((float(seconds), int(heavy)))
+
+    async def start_stop():
+        start = time.perf_counter()
+        arena = Arena([AgentConfig("alpha"), AgentConfig("contra", contrarian=True)], model=FakeGeminiModel())
+        app = create_app(arena, RandomWalkSource(seed=1), NewsIngest([]), state_bus=None)
+        built = time.perf_counter()
+        async with app.router.lifespan_context(app):
+            pass
+        return built - start, time.perf_counter() - start
+
+    timings = [asyncio.run(start_stop()) for _ in range(repeat)]
+    return [_row("startup", {}, {
+        "ms_cold_import": min(r[0] for r in runs) * 1000,
+        "heavy_modules_loaded": max(r[1] for r in runs),
+        "ms_create_app": min(t[0] for t in timings) * 1000,
+        "ms_create_start_stop": min(t[1] for t in timings) * 1000,
+    })]
@@ -0,0 +1,95 @@
+"""Deterministic offline stand-ins for Gemini, NewsAPI and WebSocket clients."""
+import json
+import re
+import time
+import random
+import asyncio
+import zlib
+from typing import Dict, List
+
+from trader_agent import TICKER_KEYWORDS
+
+TICKERS = sorted(set(TICKER_KEYWORDS.values()))
+_SUBJECTS = list(TICKER_KEYWORDS)
+_VERBS = ["surges", "plunges", "rallies", "drops", "beats estimates", "misses estimates", "holds steady",
+          "announces restructuring", "reports record revenue", "faces regulatory probe"]
+_TAILS = ["after earnings", "as investors rotate", "on supply concerns", "amid rate fears", "in early trading", ""]
+
+_SINGLE_HEADLINE = re.compile(r'News: "(.*)"')
+_BATCH_HEADLINE = re.compile(r'^(\d+)\. "(.*)"$', re.MULTILINE)
+
+
+def headlines(n: int, seed: int = 0) -> List[str]:
+    """n reproducible, mostly distinct finance headlines."""
+    rng = random.Random(seed)
+    return [
+        f"{rng.choice(_SUBJECTS).title()} {rng.choice(_VERBS)} {rng.choice(_TAILS)} #{i}".replace("  ", " ")
+        for i in range(n)
+    ]
+
+
+def articles(n: int, seed: int = 0) -> List[Dict]:
+    """NewsAPI-shaped articles, as news_ingest.make_article would produce them."""
+    return [
+        {"title": title, "link": f"https://example.com/{i}", "published": "2024-01-02T15:04:05Z", "source": "Bench"}
+        for i, title in enumerate(headlines(n, seed))
+    ]
+
+
+def fake_decision(title: str) -> Dict:
+    """A decision that depends only on the headline."""
+    h = zlib.crc32(title.encode())
+    return {
+        "action": ("BUY", "SELL", "HOLD")[h % 3],
+        "ticker": TICKERS[(h >> 4) % len(TICKERS)],
+        "confidence": 0.4 + (h >> 8) % 50 / 100,
+        "reasoning": "Benchmark decision",
+        "allocation_percent": 0.01 + (h >> 16) % 5 / 100,
+    }
+
+
+class _Response:
+    __slots__ = ("text",)
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeGeminiModel:
+    """generate_content() answering single and batch prompts after `latency` seconds."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+
+    def generate_content(self, prompt: str) -> _Response:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        batch = _BATCH_HEADLINE.findall(prompt)
+        if batch:
+            return _Response(json.dumps([{"id": int(i), **fake_decision(t)} for i, t in batch]))
+        match = _SINGLE_HEADLINE.search(prompt)
+        return _Response(json.dumps(fake_decision(match.group(1) if match else prompt)))
+
+
+class FakeWebSocket:
+    """Counts what a dashboard client would receive; optional per-send delay."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.received = 0
+        self.bytes = 0
+        self.closed = False
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data: str):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.received += 1
+        self.bytes += len(data)
+
+    async def close(self):
+        self.closed = True
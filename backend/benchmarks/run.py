@@ -0,0 +1,130 @@
+"""
+Hot-path benchmarks with offline fakes (no Gemini, Yahoo or NewsAPI traffic).
+
+    cd backend
+    python -m benchmarks.run --out bench.json                # full run
+    python -m benchmarks.run --quick --only engine,state     # subset, smaller sizes
+    python -m benchmarks.run --compare bench.json            # run and diff against a baseline
+    python -m benchmarks.run --compare old.json --against new.json   # diff two saved runs
+
+--compare exits with status 1 if any metric regressed by more than --threshold.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+from typing import Dict, List, Optional
+
+from benchmarks.cases import CASES
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(names: List[str], quick: bool, repeat: int, llm_latency: float) -> Dict:
+    results = []
+    for name in names:
+        start = time.perf_counter()
+        rows = CASES[name](quick=quick, repeat=repeat, llm_latency=llm_latency)
+        results.extend(rows)
+        for row in rows:
+            params = " ".join(f"{k}={v}" for k, v in row["params"].items())
+            metrics = "  ".join(f"{k}={v:,}" for k, v in row["metrics"].items())
+            print(f"{row['case']:<20} {params:<40} {metrics}")
+        print(f"  [{name}: {time.perf_counter() - start:.1f}s]")
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "quick": quick,
+            "repeat": repeat,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def _direction(metric: str) -> int:
+    """+1 if higher is better, -1 if lower is better, 0 if informational."""
+    if metric.endswith("_per_sec"):
+        return 1
+    if metric.startswith(("us_", "ms_")):
+        return -1
+    return 0
+
+
+def _key(row: Dict) -> str:
+    return row["case"] + json.dumps(row["params"], sort_keys=True)
+
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> int:
+    """Prints the change of every shared metric; returns the number of regressions."""
+    old = {_key(row): row for row in baseline["results"]}
+    regressions = 0
+    print(f"\nvs {baseline['meta'].get('commit') or 'baseline'} "
+          f"({baseline['meta'].get('time')}), threshold {threshold:.0%}")
+    for row in current["results"]:
+        before = old.get(_key(row))
+        if not before:
+            continue
+        params = " ".join(f"{k}={v}" for k, v in row["params"].items())
+        for metric, value in row["metrics"].items():
+            direction = _direction(metric)
+            previous = before["metrics"].get(metric)
+            if not direction or not previous:
+                continue
+            change = (value - previous) / previous
+            worse = -change * direction > threshold
+            regressions += worse
+            flag = "REGRESSION" if worse else ("improved" if change * direction > threshold else "")
+            print(f"{row['case']:<20} {params:<40} {metric:<22} {previous:>14,} -> {value:>14,} "
+                  f"{change:+7.1%} {flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the arena's hot paths offline.")
+    parser.add_argument("--only", help=f"Comma-separated cases: {','.join(CASES)}")
+    parser.add_argument("--quick", action="store_true", help="Smaller sizes, for a fast sanity run")
+    parser.add_argument("--repeat", type=int, default=3, help="Best of N runs per measurement")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Seconds the fake Gemini takes per call")
+    parser.add_argument("--out", help="Write results JSON here")
+    parser.add_argument("--compare", help="Baseline results JSON to diff against")
+    parser.add_argument("--against", help="With --compare: diff this saved run instead of running")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative change counted as a regression")
+    args = parser.parse_args()
+
+    if args.against:
+        with open(args.against) as f:
+            current = json.load(f)
+    else:
+        names = args.only.split(",") if args.only else list(CASES)
+        unknown = set(names) - set(CASES)
+        if unknown:
+            parser.error(f"Unknown cases: {sorted(unknown)}")
+        current = run(names, args.quick, args.repeat, args.llm_latency)
+        if args.out:
+            with open(args.out, "w") as f:
+                json.dump(current, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, current, args.threshold)
+        if regressions:
+            print(f"\n{regressions} regression(s) beyond {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import json
+import time
+import asyncio
+from typing import Dict, Optional
+
+from fastapi import WebSocket
+
+from instrumentation import BROADCAST_LATENCY, CLIENTS_DROPPED, MESSAGES_DROPPED
+
+try:
+    import orjson
+
+    def encode_message(message: Dict) -> str:
+        return orjson.dumps(message).decode()
+except ImportError:  # orjson is optional; stdlib json is just slower
+    def encode_message(message: Dict) -> str:
+        return json.dumps(message, separators=(",", ":"))
+
+
+class _Client:
+    __slots__ = ("websocket", "queue", "task", "dropped_in_row")
+
+    def __init__(self, websocket: WebSocket, queue_size: int):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(queue_size)
+        self.task: Optional[asyncio.Task] = None
+        self.dropped_in_row = 0
+
+
+class Broadcaster:
+    """
+    WebSocket fan-out. Each message is encoded once; every client has a
+    bounded outbound queue drained by its own writer task, so a slow socket
+    only delays itself. A full queue drops its oldest message (delta clients
+    then see a sequence gap and resync); clients that keep overflowing, time
+    out or error are evicted.
+    """
+
+    def __init__(self, queue_size: int = 64, send_timeout: float = 5.0, max_dropped_in_row: int = 256):
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.max_dropped_in_row = max_dropped_in_row
+        self._clients: Dict[WebSocket, _Client] = {}
+        self.messages_sent = 0
+        self.messages_dropped = 0
+        self.clients_evicted = 0
+
+    @property
+    def active_connections(self):
+        return list(self._clients)
+
+    async def connect(self, websocket: WebSocket):
+        await websocket.accept()
+        client = _Client(websocket, self.queue_size)
+        client.task = asyncio.create_task(self._writer(client))
+        self._clients[websocket] = client
+
+    def disconnect(self, websocket: WebSocket):
+        client = self._clients.pop(websocket, None)
+        if client and client.task and client.task is not asyncio.current_task():
+            client.task.cancel()
+
+    async def close(self):
+        """Stops every writer task, waiting until they have exited."""
+        clients = list(self._clients.values())
+        for client in clients:
+            self.disconnect(client.websocket)
+        await asyncio.gather(*(c.task for c in clients if c.task), return_exceptions=True)
+
+    async def broadcast(self, message: Dict) -> str:
+        """Sends to every client; returns the encoded message for reuse."""
+        start = time.perf_counter()
+        data = encode_message(message)
+        self.broadcast_encoded(data)
+        BROADCAST_LATENCY.observe(time.perf_counter() - start)
+        return data
+
+    def broadcast_encoded(self, data: str):
+        for client in list(self._clients.values()):
+            self._enqueue(client, data)
+
+    async def send(self, websocket: WebSocket, message: Dict):
+        """Message for one client, ordered with its broadcasts."""
+        client = self._clients.get(websocket)
+        if client:
+            self._enqueue(client, encode_message(message))
+
+    def _enqueue(self, client: _Client, data: str):
+        try:
+            client.queue.put_nowait(data)
+            client.dropped_in_row = 0
+            return
+        except asyncio.QueueFull:
+            pass
+
+        # Client is behind: drop the oldest pending message to make room
+        client.queue.get_nowait()
+        client.queue.put_nowait(data)
+        client.dropped_in_row += 1
+        self.messages_dropped += 1
+        MESSAGES_DROPPED.inc()
+        if client.dropped_in_row >= self.max_dropped_in_row:
+            print(f"[Broadcaster] Evicting client that fell {client.dropped_in_row} messages behind")
+            self._evict(client, "overflow")
+
+    async def _writer(self, client: _Client):
+        websocket = client.websocket
+        try:
+            # Re-checked each turn: on 3.11 wait_for() can swallow the cancel from disconnect()
+            while self._clients.get(websocket) is client:
+                data = await client.queue.get()
+                await asyncio.wait_for(websocket.send_text(data), self.send_timeout)
+                self.messages_sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[Broadcaster] Evicting client after send failure: {e!r}")
+            self._evict(client, "timeout" if isinstance(e, asyncio.TimeoutError) else "send_error")
+
+    def _evict(self, client: _Client, reason: str):
+        if self._clients.get(client.websocket) is not client:
+            return
+        self.clients_evicted += 1
+        CLIENTS_DROPPED.inc(reason)
+        self.disconnect(client.websocket)
+        asyncio.create_task(self._close(client.websocket))
+
+    @staticmethod
+    async def _close(websocket: WebSocket):
+        try:
+            await websocket.close()
+        except Exception:
+            pass  # Already gone
+
+    def stats(self) -> Dict:
+        return {
+            "clients": len(self._clients),
+            "queued": sum(c.queue.qsize() for c in self._clients.values()),
+            "messages_sent": self.messages_sent,
+            "messages_dropped": self.messages_dropped,
+            "clients_evicted": self.clients_evicted,
+        }
@@ -0,0 +1,41 @@
+import time
+import asyncio
+import datetime
+
+
+class SystemClock:
+    """Wall-clock time. The default for every component."""
+
+    def time(self) -> float:
+        return time.time()
+
+    def now(self) -> datetime.datetime:
+        return datetime.datetime.now()
+
+    async def sleep(self, seconds: float):
+        await asyncio.sleep(seconds)
+
+
+class SimulatedClock:
+    """Clock driven by a backtest: time only moves when the replay advances it."""
+
+    def __init__(self, start: float = 0.0):
+        self._now = start
+
+    def time(self) -> float:
+        return self._now
+
+    def now(self) -> datetime.datetime:
+        return datetime.datetime.fromtimestamp(self._now)
+
+    def advance_to(self, timestamp: float):
+        if timestamp > self._now:
+            self._now = timestamp
+
+    async def sleep(self, seconds: float):
+        # Sleeping skips simulated time forward without waiting (but still yields)
+        self._now += seconds
+        await asyncio.sleep(0)
+
+
+SYSTEM_CLOCK = SystemClock()
@@ -0,0 +1,142 @@
+import re
+import json
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from clock import SYSTEM_CLOCK
+
+# "Headline - 14:05:33" (synthetic feed) or "Headline | 14:05"
+_TIMESTAMP_SUFFIX = re.compile(r"\s*[-|–—]\s*\d{1,2}:\d{2}(?::\d{2})?\s*$")
+# "Headline - Reuters", "Headline | Yahoo Finance" (NewsAPI titles carry the outlet)
+_SOURCE_SUFFIX = re.compile(r"\s+[-|–—]\s+([^-|–—]+)$")
+# Outlets stripped even when the article's source names someone else (syndicated copies).
+# Anything else after a dash is part of the story: "Apple beats - shares jump".
+KNOWN_OUTLETS = frozenset(s.lower() for s in (
+    "Reuters", "Bloomberg", "Associated Press", "AP", "AP News", "CNBC", "CNN", "CNN Business",
+    "Yahoo Finance", "Yahoo News", "MarketWatch", "Barron's", "The Wall Street Journal", "WSJ",
+    "Financial Times", "FT", "Forbes", "Business Insider", "Insider", "Fortune", "Benzinga",
+    "Seeking Alpha", "The Motley Fool", "Motley Fool", "Investopedia", "Investor's Business Daily",
+    "TheStreet", "Zacks", "Fox Business", "BBC News", "The Guardian", "The New York Times",
+    "The Verge", "TechCrunch", "Engadget", "Ars Technica", "Wired", "CoinDesk", "Cointelegraph",
+))
+_PUNCTUATION = re.compile(r"[^\w&]+")
+
+
+def normalize_headline(title: str, source: Optional[str] = None) -> str:
+    """Reduces a headline to the text that identifies the story."""
+    text = _TIMESTAMP_SUFFIX.sub("", title.strip())
+
+    match = _SOURCE_SUFFIX.search(text)
+    if match:
+        suffix = match.group(1).strip().lower()
+        if suffix in KNOWN_OUTLETS or (source and suffix == source.strip().lower()):
+            text = text[: match.start()]
+
+    return " ".join(_PUNCTUATION.sub(" ", text.lower()).split())
+
+
+def headline_key(title: str, source: Optional[str] = None, namespace: str = "") -> str:
+    """namespace separates decisions from differently prompted agents."""
+    text = f"{namespace}\n{normalize_headline(title, source)}"
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class DecisionCache:
+    """
+    LLM decisions keyed on the normalized headline, with TTL + LRU eviction.
+    Optionally backed by SQLite so decisions survive restarts.
+    Thread-safe: lookups happen on the Gemini executor threads.
+    """
+
+    def __init__(self, max_entries: int = 2048, ttl: float = 900, path: Optional[str] = None, clock=None):
+        self.max_entries = max_entries
+        self.clock = clock or SYSTEM_CLOCK
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (decision, expires_at)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS decisions "
+                "(key TEXT PRIMARY KEY, decision TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM decisions WHERE expires_at < ?", (self.clock.time(),))
+            self._db.commit()
+
+    def get(self, title: str, source: Optional[str] = None, namespace: str = "") -> Optional[Dict]:
+        key = headline_key(title, source, namespace)
+        now = self.clock.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                decision, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return dict(decision)
+                del self._entries[key]
+                self.expirations += 1
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT decision, expires_at FROM decisions WHERE key = ? AND expires_at > ?",
+                    (key, now),
+                ).fetchone()
+                if row:
+                    decision = json.loads(row[0])
+                    self._store(key, decision, row[1])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return dict(decision)
+
+            self.misses += 1
+            return None
+
+    def put(self, title: str, decision: Dict, source: Optional[str] = None, namespace: str = ""):
+        key = headline_key(title, source, namespace)
+        expires_at = self.clock.time() + self.ttl
+        decision = dict(decision)
+        with self._lock:
+            self._store(key, decision, expires_at)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO decisions (key, decision, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(decision), expires_at),
+                )
+                self._db.commit()
+
+    def _store(self, key: str, decision: Dict, expires_at: float):
+        self._entries[key] = (decision, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "persistent": self._db is not None,
+        }
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
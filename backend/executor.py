@@ -0,0 +1,42 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+
+class BlockingExecutor:
+    """
+    Runs blocking provider calls (Gemini, yfinance, NewsAPI) on a bounded
+    thread pool so the event loop never waits on upstream I/O.
+    """
+
+    def __init__(self, name: str, max_workers: int = 4, timeout: float = 10.0):
+        self.name = name
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        # Never queue more calls than there are threads - extra callers wait here
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.timeouts = 0
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so the semaphore binds to the running loop
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+        return self._slots
+
+    async def run(self, fn: Callable, *args, timeout: Optional[float] = None) -> Any:
+        """
+        Runs fn(*args) in the pool. Raises asyncio.TimeoutError if the call
+        does not finish in time; the worker thread is left to finish on its own.
+        """
+        loop = asyncio.get_running_loop()
+        async with self._semaphore():
+            future = loop.run_in_executor(self._pool, fn, *args)
+            try:
+                return await asyncio.wait_for(future, timeout or self.timeout)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                raise
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,127 @@
+"""
+Stateless WebSocket gateway for the dashboard. Run as many workers as there
+are cores, next to one engine (main.py started with the same STATE_BUS):
+
+    STATE_BUS=unix:/tmp/arena.sock uvicorn main:app --port 8001
+    STATE_BUS=unix:/tmp/arena.sock uvicorn gateway:app --port 8000 --workers 4
+
+Each worker subscribes to the engine's stream, keeps a replica of every
+portfolio stream for new clients and relays frames without re-encoding
+them. Nothing here trades; the REST API stays on the engine.
+"""
+import os
+import json
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict
+
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+
+from broadcaster import Broadcaster
+from state_stream import StateReplica, is_resync
+from state_bus import MAIN_CHANNEL, BusSubscriber, agent_channel
+from instrumentation import REGISTRY
+
+STATE_BUS = os.getenv("STATE_BUS", "unix:/tmp/arena.sock")
+
+
+class Channel:
+    """One engine stream as seen by this gateway: replica + local clients."""
+
+    __slots__ = ("replica", "clients")
+
+    def __init__(self):
+        self.replica = StateReplica()
+        self.clients = Broadcaster()
+
+
+channels: Dict[str, Channel] = {MAIN_CHANNEL: Channel()}
+
+
+def on_frame(channel: str, data: str) -> bool:
+    target = channels.get(channel)
+    if target is None:
+        target = channels[channel] = Channel()
+    # Only portfolio messages are decoded; everything else is relayed as-is
+    if data.startswith('{"type":"PORTFOLIO_') and not target.replica.apply(json.loads(data)):
+        return False  # Gap: skip it; the resync snapshot repairs the replica and clients
+    target.clients.broadcast_encoded(data)
+    return True
+
+
+subscriber = BusSubscriber(STATE_BUS, on_frame)
+
+REGISTRY.gauge("arena_gateway_clients", "Dashboard clients on this gateway worker",
+               lambda: sum(len(c.clients.active_connections) for c in channels.values()))
+REGISTRY.gauge("arena_gateway_connected", "1 while subscribed to the engine", lambda: subscriber.connected)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    bus_task = asyncio.create_task(subscriber.run())
+    try:
+        yield
+    finally:
+        bus_task.cancel()
+        await asyncio.gather(bus_task, return_exceptions=True)
+        for channel in channels.values():
+            await channel.clients.close()
+
+
+app = FastAPI(lifespan=lifespan)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+
+async def serve(websocket: WebSocket, channel: Channel):
+    clients = channel.clients
+    await clients.connect(websocket)
+    try:
+        snapshot = channel.replica.snapshot()
+        if snapshot:
+            await clients.send(websocket, snapshot)
+        while True:
+            message = await websocket.receive_text()
+            # Client noticed a sequence gap - send it this gateway's copy of the state
+            if is_resync(message):
+                snapshot = channel.replica.snapshot()
+                if snapshot:
+                    await clients.send(websocket, snapshot)
+    except (WebSocketDisconnect, RuntimeError):
+        clients.disconnect(websocket)
+
+
+@app.websocket("/ws")
+async def websocket_endpoint(websocket: WebSocket):
+    await serve(websocket, channels[MAIN_CHANNEL])
+
+
+@app.websocket("/ws/agents/{name}")
+async def agent_websocket(websocket: WebSocket, name: str):
+    channel = channels.get(agent_channel(name))
+    if channel is None:
+        await websocket.close(code=4404)
+        return
+    await serve(websocket, channel)
+
+
+@app.get("/gateway/stats")
+async def gateway_stats():
+    return {
+        **subscriber.stats(),
+        "pid": os.getpid(),
+        "channels": {name: {"seq": c.replica.seq, **c.clients.stats()} for name, c in channels.items()},
+    }
+
+
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
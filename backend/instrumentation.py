@@ -0,0 +1,229 @@
+"""
+In-process metrics with Prometheus text output, plus an on-demand sampling
+profiler. Everything here is stdlib and cheap enough to leave on:
+Counter.inc() is a dict lookup and an add, Histogram.observe() adds a
+bisect over ~15 buckets. Updates are not locked; under a thread race a
+rare lost increment is an acceptable price for monitoring.
+"""
+import sys
+import time
+import asyncio
+import threading
+from bisect import bisect_left
+from collections import Counter as _Tally
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Seconds: 0.5 ms .. 30 s, wide enough for cache hits and Gemini calls alike
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _label_text(names: Sequence[str], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1.0):
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_label_text(self.labelnames, labels)} {value}")
+        return lines
+
+
+class _HistogramSeries:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple, _HistogramSeries] = {}
+
+    def series(self, *labels) -> _HistogramSeries:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series.setdefault(labels, _HistogramSeries(self.buckets))
+        return series
+
+    def observe(self, seconds: float, *labels):
+        self.series(*labels).observe(seconds)
+
+    def time(self, *labels) -> "_Timer":
+        """`with HISTOGRAM.time("label"):` records the block's wall time."""
+        return _Timer(self.series(*labels))
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series.counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                lines.append(f"{self.name}_bucket{_label_text(self.labelnames, labels, le)} {cumulative}")
+            label_text = _label_text(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {series.sum}")
+            lines.append(f"{self.name}_count{label_text} {series.count}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("series", "start")
+
+    def __init__(self, series: _HistogramSeries):
+        self.series = series
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.series.observe(time.perf_counter() - self.start)
+        return False
+
+
+class Gauge:
+    """Value read from a callback at scrape time, so nothing is paid between scrapes."""
+
+    def __init__(self, name: str, help: str, read: Callable[[], float]):
+        self.name = name
+        self.help = help
+        self.read = read
+
+    def render(self) -> List[str]:
+        try:
+            value = float(self.read())
+        except Exception as e:
+            return [f"# {self.name} unavailable: {e}"]
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge", f"{self.name} {value}"]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def gauge(self, name: str, help: str, read: Callable[[], float]) -> Gauge:
+        self._metrics.pop(name, None)  # Re-registering a gauge rebinds its callback
+        return self._register(Gauge(name, help, read))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+LLM_LATENCY = REGISTRY.histogram(
+    "arena_llm_request_seconds", "Gemini request latency", ["kind"])
+LLM_ERRORS = REGISTRY.counter(
+    "arena_llm_errors_total", "Gemini calls that raised or returned unusable output", ["kind"])
+FALLBACK_DECISIONS = REGISTRY.counter(
+    "arena_fallback_decisions_total", "Decisions made by keyword fallback instead of the LLM", ["reason"])
+PRICE_LATENCY = REGISTRY.histogram(
+    "arena_price_fetch_seconds", "Price lookups by the path that answered them", ["path"])
+PRICE_ERRORS = REGISTRY.counter(
+    "arena_price_errors_total", "Yahoo lookups that failed, by method", ["path"])
+ENGINE_LATENCY = REGISTRY.histogram(
+    "arena_engine_execute_seconds", "One agent's execute_trade + metrics update",
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05))
+BROADCAST_LATENCY = REGISTRY.histogram(
+    "arena_broadcast_seconds", "Encoding + enqueueing one message for every client",
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05))
+CLIENTS_DROPPED = REGISTRY.counter(
+    "arena_clients_dropped_total", "WebSocket clients evicted", ["reason"])
+MESSAGES_DROPPED = REGISTRY.counter(
+    "arena_messages_dropped_total", "Messages dropped from full client queues")
+
+
+class SamplingProfiler:
+    """
+    Samples one thread's Python stack every `interval` seconds from a
+    background thread and counts collapsed stacks ("a;b;c N", the input
+    format of flamegraph.pl / speedscope). Nothing runs unless profile()
+    is called, so it costs nothing when idle.
+    """
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.target: Optional[int] = None  # Thread id; set to the event loop thread on startup
+        self._lock = threading.Lock()
+        self.running = False
+
+    def _collapse(self, frame) -> str:
+        stack = []
+        while frame is not None and len(stack) < self.max_depth:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return ";".join(reversed(stack))
+
+    def _sample(self, seconds: float, target: int) -> _Tally:
+        stacks: _Tally = _Tally()
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            frame = sys._current_frames().get(target)
+            if frame is not None:
+                stacks[self._collapse(frame)] += 1
+            time.sleep(self.interval)
+        return stacks
+
+    async def profile(self, seconds: float = 10.0) -> str:
+        """Samples the target thread for `seconds`; returns collapsed stacks, hottest first."""
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("A profile is already running")
+        try:
+            self.running = True
+            target = self.target or threading.main_thread().ident
+            loop = asyncio.get_running_loop()
+            stacks = await loop.run_in_executor(None, self._sample, seconds, target)
+        finally:
+            self.running = False
+            self._lock.release()
+        return "\n".join(f"{stack} {count}" for stack, count in stacks.most_common()) + "\n"
+
+
+PROFILER = SamplingProfiler()
@@ -0,0 +1,211 @@
+import json
+import queue
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+
+from paper_engine import PaperEngine, TRADE_LOG_SIZE
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fills (
+    agent TEXT NOT NULL,
+    trade_id INTEGER NOT NULL,
+    time TEXT NOT NULL,
+    action TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    qty INTEGER NOT NULL,
+    price REAL NOT NULL,
+    pnl REAL,
+    reason TEXT,
+    fee REAL,
+    order_id INTEGER,
+    PRIMARY KEY (agent, trade_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS snapshots (
+    agent TEXT PRIMARY KEY,
+    trade_id INTEGER NOT NULL,
+    state TEXT NOT NULL
+);
+"""
+
+_FILL_COLUMNS = "trade_id, time, action, ticker, qty, price, pnl, reason, fee, order_id"
+
+
+def _trade_dict(row) -> Dict:
+    """Journal row -> the trade dict PaperEngine keeps in trade_log."""
+    trade_id, time, action, ticker, qty, price, pnl, reason, fee, order_id = row
+    trade = {"time": time, "action": action, "ticker": ticker, "qty": qty, "price": round(price, 2)}
+    if fee is not None:
+        trade["fee"] = fee
+        trade["order_id"] = order_id
+    if pnl is not None:
+        trade["pnl"] = pnl
+    trade["reason"] = reason or ""
+    trade["id"] = trade_id
+    return trade
+
+
+class TradeJournal:
+    """
+    Append-only SQLite (WAL) log of every fill, plus a periodic snapshot of
+    each engine's book. Engines hand fills over through trade_listeners; a
+    writer thread commits them in batches, so execute_trade never waits on
+    disk. A hard crash loses at most the batch in flight (milliseconds).
+
+    Recovery loads the agent's latest snapshot and replays only the fills
+    after it (< snapshot_every rows), so startup stays fast however long
+    the history grows.
+    """
+
+    def __init__(self, path: str, snapshot_every: int = 1000, batch_size: int = 500):
+        self.path = path
+        self.snapshot_every = snapshot_every
+        self.batch_size = batch_size
+        self._engines: Dict[str, PaperEngine] = {}
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+
+        # Reads (recovery, history pages) share one connection; the writer thread opens its own
+        self._db = self._connect()
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+        self.fills_written = 0
+        self.snapshots_written = 0
+        self.batches = 0
+        self._writer = threading.Thread(target=self._run, name="journal-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")  # WAL keeps this crash-safe; only power loss can drop the tail
+        return db
+
+    def attach(self, agent: str, engine: PaperEngine) -> int:
+        """Restores the engine from the journal, then journals its fills. Returns fills replayed."""
+        with self._lock:
+            row = self._db.execute("SELECT trade_id, state FROM snapshots WHERE agent = ?", (agent,)).fetchone()
+            since = row[0] if row else 0
+            tail = self._db.execute(
+                "SELECT trade_id, action, ticker, qty, price, fee FROM fills "
+                "WHERE agent = ? AND trade_id > ? ORDER BY trade_id", (agent, since)
+            ).fetchall()
+            recent = self._db.execute(
+                f"SELECT {_FILL_COLUMNS} FROM fills WHERE agent = ? ORDER BY trade_id DESC LIMIT ?",
+                (agent, TRADE_LOG_SIZE)
+            ).fetchall()
+
+        if row or tail:
+            engine.restore(json.loads(row[1]) if row else engine.to_snapshot(), [_trade_dict(r) for r in recent])
+            for trade_id, action, ticker, qty, price, fee in tail:
+                # Same order as execute_trade: mark at the fill price, then book the fill
+                engine.mark(ticker, price)
+                engine.apply_fill(action, ticker, qty, price, fee or 0.0)
+                engine.trade_seq = trade_id
+            print(f"[Journal] {agent}: restored trade #{engine.trade_seq} "
+                  f"(snapshot #{since} + {len(tail)} fills)")
+
+        self._engines[agent] = engine
+        engine.trade_listeners.append(self._listener(agent, engine))
+        return len(tail)
+
+    def _listener(self, agent: str, engine: PaperEngine):
+        put = self._queue.put
+        snapshot_every = self.snapshot_every
+
+        def on_trade(trade: Dict, fill_price: float):
+            put(("fill", (agent, trade["id"], trade["time"], trade["action"], trade["ticker"],
+                          trade["qty"], fill_price, trade.get("pnl"), trade.get("reason", ""),
+                          trade.get("fee"), trade.get("order_id"))))
+            if trade["id"] % snapshot_every == 0:
+                # Taken here, on the engine's thread, so it matches this trade exactly
+                put(("snapshot", (agent, trade["id"], json.dumps(engine.to_snapshot()))))
+
+        return on_trade
+
+    def snapshot(self, agent: str):
+        engine = self._engines[agent]
+        self._queue.put(("snapshot", (agent, engine.trade_seq, json.dumps(engine.to_snapshot()))))
+
+    def _run(self):
+        db = self._connect()
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            waiters = []
+            try:
+                with db:  # One transaction per batch
+                    for kind, payload in batch:
+                        if kind == "fill":
+                            db.execute(
+                                "INSERT OR REPLACE INTO fills (agent, " + _FILL_COLUMNS + ") "
+                                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", payload
+                            )
+                            self.fills_written += 1
+                        elif kind == "snapshot":
+                            db.execute("INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?)", payload)
+                            self.snapshots_written += 1
+                        elif kind == "flush":
+                            waiters.append(payload)
+                        elif kind == "stop":
+                            waiters.append(payload)
+                            running = False
+                self.batches += 1
+            except sqlite3.Error as e:
+                print(f"[Journal] Write failed, {len(batch)} entries lost: {e}")
+            for event in waiters:
+                event.set()
+        db.close()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Blocks until everything journaled so far is committed."""
+        done = threading.Event()
+        self._queue.put(("flush", done))
+        return done.wait(timeout)
+
+    def trades(self, agent: str, before: Optional[int] = None, limit: int = 50) -> Dict:
+        """
+        One page of an agent's full history, newest first. Pass the returned
+        next_before to get the following page.
+        """
+        limit = max(1, min(limit, 500))
+        query = f"SELECT {_FILL_COLUMNS} FROM fills WHERE agent = ?"
+        params: List = [agent]
+        if before is not None:
+            query += " AND trade_id < ?"
+            params.append(before)
+        query += " ORDER BY trade_id DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._db.execute(query, params).fetchall()
+        trades = [_trade_dict(row) for row in rows]
+        return {
+            "agent": agent,
+            "trades": trades,
+            "next_before": trades[-1]["id"] if len(trades) == limit else None,
+        }
+
+    def stats(self) -> Dict:
+        return {
+            "path": self.path,
+            "agents": sorted(self._engines),
+            "fills_written": self.fills_written,
+            "snapshots_written": self.snapshots_written,
+            "batches": self.batches,
+        }
+
+    def close(self):
+        """Snapshots every engine (so the next start replays nothing) and stops the writer."""
+        for agent in self._engines:
+            self.snapshot(agent)
+        done = threading.Event()
+        self._queue.put(("stop", done))
+        self._writer.join(timeout=10)
+        with self._lock:
+            self._db.close()
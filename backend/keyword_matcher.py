@@ -0,0 +1,134 @@
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Irregular forms the suffix rules below cannot produce
+IRREGULAR_FORMS = {
+    'fall': ['fell', 'fallen'],
+    'rise': ['rose', 'risen'],
+    'buy': ['bought'],
+    'sell': ['sold'],
+}
+
+_VOWELS = set('aeiou')
+
+
+def inflections(word: str) -> List[str]:
+    """Plural/past/progressive forms of a keyword: surge -> surges, surged, surging."""
+    forms = {word, word + 's', word + 'es', word + 'ed', word + 'ing'}
+    if word.endswith('e'):
+        forms.update({word + 'd', word[:-1] + 'ing'})
+    if word.endswith('y') and len(word) > 1 and word[-2] not in _VOWELS:
+        forms.update({word[:-1] + 'ies', word[:-1] + 'ied'})
+    if len(word) >= 3 and word[-1] not in _VOWELS and word[-2] in _VOWELS and word[-3] not in _VOWELS:
+        # drop -> dropped, cut -> cutting
+        forms.update({word + word[-1] + 'ed', word + word[-1] + 'ing'})
+    forms.update(IRREGULAR_FORMS.get(word, []))
+    return sorted(forms)
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """
+    Regex alternation factored on shared prefixes (surge|surged|surges ->
+    surge(?:d|s)?). The re engine backtracks far less than over a flat list.
+    """
+    root: Dict = {}
+    for word in words:
+        node = root
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def emit(node: Dict) -> str:
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if '' in node else body
+
+    return emit(root)
+
+
+class HeadlineMatch:
+    """Keyword hits for one headline. tickers holds (symbol, start, end) in text order."""
+
+    __slots__ = ('bullish', 'bearish', 'tickers')
+
+    def __init__(self):
+        self.bullish = 0
+        self.bearish = 0
+        self.tickers: List[Tuple[str, int, int]] = []
+
+    @property
+    def primary_ticker(self) -> Optional[str]:
+        return self.tickers[0][0] if self.tickers else None
+
+    def symbols(self) -> List[str]:
+        """Distinct tickers in order of first mention."""
+        return list(dict.fromkeys(symbol for symbol, _, _ in self.tickers))
+
+
+class KeywordMatcher:
+    """
+    One precompiled, word-bounded regex over every sentiment keyword form and
+    ticker alias. match_batch() scans a whole batch of headlines in a single
+    regex pass. Sentiment scores count distinct keywords per headline.
+    """
+
+    def __init__(self, bullish: Iterable[str], bearish: Iterable[str], tickers: Dict[str, str]):
+        # matched text -> (kind, canonical keyword or symbol)
+        self._terms: Dict[str, Tuple[str, str]] = {}
+        for keyword in bullish:
+            for form in inflections(keyword):
+                self._terms.setdefault(form, ('bullish', keyword))
+        for keyword in bearish:
+            for form in inflections(keyword):
+                self._terms.setdefault(form, ('bearish', keyword))
+        for alias, symbol in tickers.items():
+            self._terms[alias] = ('ticker', symbol)
+
+        # "&" counts as a word character so "s&p" is one term
+        self._pattern = re.compile(rf'(?<![\w&]){_trie_pattern(self._terms)}(?![\w&])')
+
+    def match(self, title: str) -> HeadlineMatch:
+        return self.match_batch([title])[0]
+
+    def match_batch(self, titles: List[str]) -> List[HeadlineMatch]:
+        results = [HeadlineMatch() for _ in titles]
+        if not titles:
+            return results
+
+        # Lowercased one by one: lower() can change a string's length ("İ" -> "i̇"),
+        # so offsets must come from the lowered text
+        lowered = [title.lower() for title in titles]
+        # Headline i occupies text[starts[i]:starts[i] + len(lowered[i])]
+        text = '\n'.join(lowered)
+        starts = []
+        position = 0
+        for title in lowered:
+            starts.append(position)
+            position += len(title) + 1
+
+        terms = self._terms
+        index, n = 0, len(titles)
+        next_start = starts[1] if n > 1 else position
+        seen: set = set()
+        for m in self._pattern.finditer(text):
+            begin = m.start()
+            if begin >= next_start:
+                # Matches arrive in text order, so walk the headline index forward
+                while index + 1 < n and starts[index + 1] <= begin:
+                    index += 1
+                next_start = starts[index + 1] if index + 1 < n else position
+                seen = set()
+            kind, canonical = terms[m.group()]
+            result = results[index]
+            if kind == 'ticker':
+                offset = starts[index]
+                result.tickers.append((canonical, begin - offset, m.end() - offset))
+            elif canonical not in seen:
+                seen.add(canonical)
+                if kind == 'bullish':
+                    result.bullish += 1
+                else:
+                    result.bearish += 1
+        return results
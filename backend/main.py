@@ -1,142 +1,325 @@
+import os
 import asyncio
-import json
-import random
+import threading
+from contextlib import asynccontextmanager
+from typing import Optional
+from dotenv import load_dotenv
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from news_fetcher import NewsFetcher
-from trader_agent import TraderAgent
-from paper_engine import PaperEngine
-from price_fetcher import get_live_price
-
-app = FastAPI()
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Global instances
-news_service = NewsFetcher()
-agent = TraderAgent()
-engine = PaperEngine()
-
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: list[WebSocket] = []
-
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
-
-    def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
-
-    async def broadcast(self, message: dict):
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except:
-                pass
-
-manager = ConnectionManager()
-
-@app.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
-    try:
-        await websocket.send_json({
-            "type": "PORTFOLIO_UPDATE",
-            "data": engine.get_state()
-        })
-        while True:
-            await websocket.receive_text()
-    except WebSocketDisconnect:
-        manager.disconnect(websocket)
-
-async def process_article(article: dict):
-    """Process a single article with LIVE prices."""
-    # Broadcast News
-    await manager.broadcast({
-        "type": "NEWS_ALERT",
-        "data": article
-    })
-
-    # Agent Analyzes
-    decision = agent.analyze_news(article)
-    
-    if decision:
-        ticker = decision.get('ticker', 'SPY')
-        
-        # Get LIVE price from Yahoo Finance
-        live_price = get_live_price(ticker)
-        
-        # Broadcast Decision with live price
-        await manager.broadcast({
-            "type": "AGENT_THOUGHT",
-            "data": {
-                "article": article['title'],
-                "thought": decision.get('reasoning', 'Analyzing...'),
-                "action": decision.get('action', 'HOLD'),
-                "confidence": decision.get('confidence', 0.5),
-                "ticker": ticker,
-                "live_price": live_price
-            }
-        })
-
-        # Execute Trade with REAL live price
-        engine.execute_trade(decision, current_price=live_price)
-
-        # Broadcast Portfolio Update
-        await manager.broadcast({
-            "type": "PORTFOLIO_UPDATE",
-            "data": engine.get_state()
-        })
-
-async def market_loop():
+from fastapi.responses import PlainTextResponse
+from broadcaster import Broadcaster
+from state_stream import is_resync
+from state_bus import MAIN_CHANNEL, create_bus_publisher
+from news_ingest import NewsIngest, SyntheticSource, create_news_sources
+from pipeline import ArticlePipeline
+from quote_service import QuoteService, create_quote_source
+from arena import Arena, load_agent_configs
+from decision_cache import DecisionCache
+from journal import TradeJournal
+from order_book import OrderBook, create_commission, create_slippage
+from instrumentation import PROFILER, REGISTRY
+
+load_dotenv()
+
+# News sources polled concurrently (NEWS_SOURCES="newsapi,rss:<url>,file:<path>");
+# synthetic headlines fill in whenever they go quiet
+NEWS_SOURCES = os.getenv("NEWS_SOURCES", "newsapi")
+# Every fill is journaled here and portfolios are restored from it on restart
+JOURNAL_PATH = os.getenv("JOURNAL_PATH")
+# Trading costs ("bps:5", "sqrt", "per_share:0.005:1"); setting either routes every decision
+# through the shared order book. Agents with limit/bracket entries use it regardless.
+ORDER_SLIPPAGE = os.getenv("ORDER_SLIPPAGE")
+ORDER_COMMISSION = os.getenv("ORDER_COMMISSION")
+ORDER_MAX_FILL = os.getenv("ORDER_MAX_FILL")  # Max shares one order fills per quote tick
+
+# Articles analyzed/priced in parallel; trades still execute one at a time
+PIPELINE_CONCURRENCY = int(os.getenv("PIPELINE_CONCURRENCY", "4"))
+
+# Background quotes for held + recently mentioned tickers ("random" or "csv:<path>" run offline)
+QUOTE_SOURCE = os.getenv("QUOTE_SOURCE", "yahoo")
+QUOTE_INTERVAL = float(os.getenv("QUOTE_INTERVAL", "5"))
+
+# Scaled-out deployment: this process is the single trading engine and gateway workers
+# (uvicorn gateway:app --workers N) relay its streams. "unix:<path>" or "redis://..."
+STATE_BUS = os.getenv("STATE_BUS")
+
+# Sampling profiler for /debug/profile; off unless PROFILER_ENABLED=1
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED") == "1"
+
+
+def create_arena() -> Arena:
+    """Competing agents (ARENA_CONFIG=agents.json); they share news, quotes and the decision cache."""
+    order_book = None
+    if ORDER_SLIPPAGE or ORDER_COMMISSION or ORDER_MAX_FILL:
+        order_book = OrderBook(create_slippage(ORDER_SLIPPAGE), create_commission(ORDER_COMMISSION),
+                               max_fill_qty=int(ORDER_MAX_FILL) if ORDER_MAX_FILL else None)
+    return Arena(
+        load_agent_configs(os.getenv("ARENA_CONFIG")),
+        cache=DecisionCache(path=os.getenv("DECISION_CACHE_PATH")),
+        journal=TradeJournal(JOURNAL_PATH) if JOURNAL_PATH else None,
+        order_book=order_book,
+    )
+
+
+def create_app(arena: Optional[Arena] = None, quote_source=None, news_service: Optional[NewsIngest] = None,
+               state_bus: Optional[str] = STATE_BUS, pipeline_concurrency: int = PIPELINE_CONCURRENCY,
+               quote_interval: float = QUOTE_INTERVAL, profiler_enabled: bool = PROFILER_ENABLED) -> FastAPI:
     """
-    CONTINUOUS trading loop - never stops!
+    Builds the server around its providers. Anything not passed comes from the
+    environment; tests and backtests pass fakes instead, e.g.
+
+        create_app(Arena(configs, model=FakeModel()), RandomWalkSource(),
+                   NewsIngest([FileSource(path)], synthetic=None))
+
+    Gemini, yfinance and requests are imported on first use, not here.
     """
-    cycle = 0
-    while True:
+    if arena is None:
+        arena = create_arena()
+    if news_service is None:
+        news_service = NewsIngest(create_news_sources(NEWS_SOURCES), synthetic=SyntheticSource())
+    # The main /ws dashboard follows the first agent
+    state_stream = arena.primary.stream
+
+    quotes = QuoteService(
+        quote_source or create_quote_source(QUOTE_SOURCE),
+        interval=quote_interval,
+        holdings=arena.held_tickers,
+    )
+
+    # Encodes each message once and gives every socket its own bounded queue
+    manager = Broadcaster()
+
+    bus = create_bus_publisher(state_bus, arena.snapshots) if state_bus else None
+    arena.publish = bus.publish if bus else None
+
+    # Created on startup so its queues belong to the server's event loop
+    pipeline: Optional[ArticlePipeline] = None
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        nonlocal pipeline
+        PROFILER.target = threading.get_ident()  # Profile the event loop thread
+        if bus:
+            await bus.start()
+        pipeline = app.state.pipeline = create_pipeline()
+        pipeline.start()
+        quotes.start()
+        news_service.start()
+        quote_task = asyncio.create_task(quote_listener())
+        market_task = asyncio.create_task(market_loop())
         try:
-            cycle += 1
-            print(f"[Market Loop] Cycle {cycle} - Fetching news...")
-            
-            # Fetch News
-            news = news_service.fetch_latest_news()
-            
-            if news:
-                print(f"[Market Loop] Got {len(news)} new articles")
-                for article in news:
-                    await process_article(article)
-                    await asyncio.sleep(0.3)  # Fast processing
-            else:
-                # No new news - do a quick portfolio valuation update with live prices
-                print("[Market Loop] No new news - updating portfolio valuations...")
-                all_tickers = list(engine.positions.keys())
-                if all_tickers:
-                    prices = {t: get_live_price(t) for t in all_tickers}
-                    engine._update_valuation(prices)
-                    await manager.broadcast({
-                        "type": "PORTFOLIO_UPDATE",
-                        "data": engine.get_state()
-                    })
-            
-            # Very short delay - continuous operation
-            await asyncio.sleep(1)
-            
-        except Exception as e:
-            print(f"[Market Loop] Error: {e}")
-            await asyncio.sleep(2)  # Brief pause on error, then continue
-
-@app.on_event("startup")
-async def startup_event():
-    asyncio.create_task(market_loop())
+            yield
+        finally:
+            market_task.cancel()
+            quote_task.cancel()
+            await asyncio.gather(market_task, quote_task, return_exceptions=True)
+            await pipeline.stop()
+            await quotes.stop()
+            await news_service.stop()
+            await manager.close()
+            if bus:
+                await bus.stop()
+            arena.close()
+
+    app = FastAPI(lifespan=lifespan)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    app.state.arena = arena
+    app.state.quotes = quotes
+    app.state.news = news_service
+    app.state.manager = manager
+    app.state.bus = bus
+
+    REGISTRY.gauge("arena_decision_cache_hit_ratio", "Decision cache hits / lookups",
+                   lambda: arena.cache.stats()["hit_ratio"])
+    REGISTRY.gauge("arena_websocket_clients", "Connected dashboard clients",
+                   lambda: len(manager.active_connections))
+    REGISTRY.gauge("arena_pipeline_in_flight", "Articles submitted but not yet broadcast",
+                   lambda: pipeline.get_stats()["end_to_end"]["queue_depth"] if pipeline else 0)
+    REGISTRY.gauge("arena_open_orders", "Resting orders across all agents",
+                   lambda: len(arena.order_book.orders) if arena.order_book else 0)
+    REGISTRY.gauge("arena_news_published", "New articles published by the ingest stream",
+                   lambda: news_service.published)
+
+    @app.websocket("/ws")
+    async def websocket_endpoint(websocket: WebSocket):
+        await manager.connect(websocket)
+        try:
+            await manager.send(websocket, state_stream.snapshot())
+            while True:
+                message = await websocket.receive_text()
+                # Client noticed a sequence gap - send it the full state again
+                if is_resync(message):
+                    await manager.send(websocket, state_stream.snapshot())
+        except (WebSocketDisconnect, RuntimeError):
+            manager.disconnect(websocket)
+
+    async def broadcast(message: dict):
+        """Main dashboard fan-out: local clients, plus gateways when there is a bus."""
+        data = await manager.broadcast(message)
+        if bus:
+            bus.publish(MAIN_CHANNEL, data)
+
+    async def price_decisions(article: dict, decisions: dict) -> dict:
+        """Price stage: one streamed quote per ticker, shared by every agent."""
+        tickers = arena.tickers(decisions)
+        prices = await asyncio.gather(*(quotes.get_price(t) for t in tickers))
+        return dict(zip(tickers, prices))
+
+    def create_pipeline() -> ArticlePipeline:
+        return ArticlePipeline(
+            analyze=arena.analyze,
+            price=price_decisions,
+            execute=arena.execute,
+            broadcast=broadcast,
+            concurrency=pipeline_concurrency,
+            batch_size=arena.max_batch,
+        )
+
+    @app.get("/pipeline/stats")
+    async def pipeline_stats():
+        return pipeline.get_stats() if pipeline else {}
+
+    @app.get("/broadcast/stats")
+    async def broadcast_stats():
+        return manager.stats()
+
+    @app.get("/bus/stats")
+    async def bus_stats():
+        return bus.stats() if bus else {}
+
+    @app.get("/metrics")
+    async def metrics():
+        """Prometheus text exposition of the hot-path histograms and counters."""
+        return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+    @app.get("/debug/profile")
+    async def profile(seconds: float = 10.0):
+        """Samples the event loop's stacks for `seconds`; returns collapsed stacks for a flame graph."""
+        if not profiler_enabled:
+            return PlainTextResponse("Profiler disabled (set PROFILER_ENABLED=1)\n", status_code=403)
+        try:
+            return PlainTextResponse(await PROFILER.profile(min(seconds, 60.0)))
+        except RuntimeError as e:
+            return PlainTextResponse(f"{e}\n", status_code=409)
+
+    @app.get("/news/stats")
+    async def news_stats():
+        return news_service.stats()
+
+    @app.get("/cache/stats")
+    async def cache_stats():
+        return arena.cache.stats()
+
+    @app.get("/arena/leaderboard")
+    async def leaderboard():
+        return arena.leaderboard()
+
+    @app.get("/portfolio/metrics")
+    async def portfolio_metrics(agent: str = None, points: int = 200):
+        """Drawdown, volatility, Sharpe, exposure and turnover, plus the newest equity curve points."""
+        name = agent or arena.primary.name
+        if name not in arena.by_name:
+            return {"error": f"Unknown agent {name}"}
+        return {"agent": name, **arena.by_name[name].metrics.to_dict(points)}
+
+    @app.get("/trades")
+    async def trade_history(agent: str = None, before: int = None, limit: int = 50):
+        """Full trade history from the journal, newest first; page with ?before=<next_before>."""
+        name = agent or arena.primary.name
+        if name not in arena.by_name:
+            return {"error": f"Unknown agent {name}"}
+        if arena.journal is None:
+            # No journal configured - only the in-memory tail is available
+            trades = [t for t in arena.by_name[name].engine.trade_log if before is None or t["id"] < before][:limit]
+            return {"agent": name, "trades": trades, "next_before": None}
+        return arena.journal.trades(name, before=before, limit=limit)
+
+    @app.get("/orders")
+    async def open_orders(agent: str = None):
+        """Resting orders (all agents, or one) plus order book counters."""
+        book = arena.order_book
+        if book is None:
+            return {"stats": None, "orders": []}
+        return {"stats": book.stats(), "orders": [o.to_dict() for o in book.open_orders(agent)]}
+
+    @app.delete("/orders/{order_id}")
+    async def cancel_order(order_id: int, agent: str = None):
+        book = arena.order_book
+        return {"cancelled": bool(book and book.cancel(order_id, agent))}
+
+    @app.websocket("/ws/agents/{name}")
+    async def agent_websocket(websocket: WebSocket, name: str):
+        """Per-agent channel: that agent's thoughts and portfolio stream."""
+        agent = arena.by_name.get(name)
+        if agent is None:
+            await websocket.close(code=4404)
+            return
+        channel = agent.channel
+        await channel.connect(websocket)
+        try:
+            await channel.send(websocket, agent.stream.snapshot())
+            while True:
+                message = await websocket.receive_text()
+                if is_resync(message):
+                    await channel.send(websocket, agent.stream.snapshot())
+        except (WebSocketDisconnect, RuntimeError):
+            channel.disconnect(websocket)
+
+    @app.get("/quotes")
+    async def quote_snapshot():
+        return {
+            "stats": quotes.stats(),
+            "quotes": [quotes.latest(t).to_dict() for t in sorted(quotes.watched()) if quotes.latest(t)]
+        }
+
+    async def quote_listener():
+        """Revalues every agent holding a ticker whose quote changed."""
+        updates = quotes.subscribe()
+        try:
+            while True:
+                changed = await updates.get()
+                delta = arena.mark({q.ticker: q.price for q in changed})
+                if delta:
+                    # Same queue as the pipeline's deltas, so the main channel stays in seq order
+                    pipeline.publish([delta])
+        finally:
+            quotes.unsubscribe(updates)
+
+    async def market_loop():
+        """
+        CONTINUOUS trading loop - never stops! Every new article from the
+        ingest stream goes straight into the pipeline.
+        """
+        while True:
+            try:
+                async for article in news_service.articles():
+                    await pipeline.submit(article)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[Market Loop] Error: {e}")
+                await asyncio.sleep(2)  # Brief pause on error, then continue
+
+    return app
+
+
+def __getattr__(name: str):
+    # `uvicorn main:app` builds the default app on first access, so importing
+    # create_app (tests, backtests) constructs nothing
+    if name == "app":
+        app = globals()["app"] = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run(create_app(), host="0.0.0.0", port=8000)
@@ -0,0 +1,395 @@
+import os
+import json
+import time
+import random
+import asyncio
+from collections import OrderedDict
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional
+
+from executor import BlockingExecutor
+from clock import SYSTEM_CLOCK
+
+if TYPE_CHECKING:
+    import requests
+
+NEWS_API_URL = "https://newsapi.org/v2/everything"
+
+# Synthetic news for continuous trading when real news runs out
+SYNTHETIC_NEWS_TEMPLATES = [
+    {"title": "Apple announces breakthrough in AI chip development", "ticker": "AAPL", "sentiment": "bullish"},
+    {"title": "Tesla Cybertruck deliveries exceed expectations", "ticker": "TSLA", "sentiment": "bullish"},
+    {"title": "NVIDIA reports record data center revenue", "ticker": "NVDA", "sentiment": "bullish"},
+    {"title": "Microsoft Azure growth accelerates to new highs", "ticker": "MSFT", "sentiment": "bullish"},
+    {"title": "Amazon Web Services expands into new markets", "ticker": "AMZN", "sentiment": "bullish"},
+    {"title": "Meta's Reality Labs shows improved financials", "ticker": "META", "sentiment": "bullish"},
+    {"title": "Google Cloud wins major enterprise contracts", "ticker": "GOOGL", "sentiment": "bullish"},
+    {"title": "AMD gains market share in server processors", "ticker": "AMD", "sentiment": "bullish"},
+    {"title": "Bitcoin surges on institutional adoption news", "ticker": "BTC-USD", "sentiment": "bullish"},
+    {"title": "S&P 500 futures point to higher open", "ticker": "SPY", "sentiment": "bullish"},
+    {"title": "Tech sector faces regulatory headwinds", "ticker": "QQQ", "sentiment": "bearish"},
+    {"title": "Tesla factory production delays reported", "ticker": "TSLA", "sentiment": "bearish"},
+    {"title": "Apple iPhone sales slow in China market", "ticker": "AAPL", "sentiment": "bearish"},
+    {"title": "NVIDIA faces supply chain constraints", "ticker": "NVDA", "sentiment": "bearish"},
+    {"title": "Market volatility spikes on economic data", "ticker": "VIX", "sentiment": "bearish"},
+    {"title": "Intel announces restructuring plan", "ticker": "INTC", "sentiment": "bearish"},
+    {"title": "Crypto market sees profit-taking pressure", "ticker": "BTC-USD", "sentiment": "bearish"},
+    {"title": "Oil prices surge on supply concerns", "ticker": "USO", "sentiment": "bullish"},
+    {"title": "Gold rallies as safe-haven demand increases", "ticker": "GLD", "sentiment": "bullish"},
+    {"title": "Netflix subscriber growth beats estimates", "ticker": "NFLX", "sentiment": "bullish"},
+]
+
+
+def create_session(pool_size: int = 8) -> "requests.Session":
+    """One keep-alive connection pool shared by every HTTP news source."""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["User-Agent"] = "AlphaBeta-trading-arena/1.0"
+    return session
+
+
+def make_article(title: str, link: str = "", published: Optional[str] = None, source: str = "News") -> Dict:
+    """The article shape every consumer (pipeline, frontend) expects."""
+    return {
+        "title": " ".join((title or "Market Update").split()),
+        "link": link or "",
+        "published": published or time.strftime("%Y-%m-%d %H:%M:%S"),
+        "source": source,
+    }
+
+
+class SeenIndex:
+    """
+    Bounded dedup index ordered by last sighting. Past capacity the stories
+    seen longest ago are forgotten first, so recent ones are never re-traded.
+    """
+
+    def __init__(self, capacity: int = 5000):
+        self.capacity = capacity
+        self._keys: "OrderedDict[str, None]" = OrderedDict()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._keys
+
+    def add(self, key: str) -> bool:
+        """True if key is new. A repeat sighting refreshes it."""
+        if key in self._keys:
+            self._keys.move_to_end(key)
+            return False
+        self._keys[key] = None
+        if len(self._keys) > self.capacity:
+            self._keys.popitem(last=False)
+        return True
+
+
+def article_key(article: Dict) -> str:
+    link = article.get("link")
+    return link if link and link != "#" else article["title"]
+
+
+class NewsApiSource:
+    """NewsAPI `everything` search, newest first."""
+
+    blocking = True
+
+    def __init__(self, session: "requests.Session", api_key: str, interval: float = 60.0,
+                 query: str = "stock market trading finance earnings crypto", page_size: int = 10):
+        self.name = "newsapi"
+        self.session = session
+        self.api_key = api_key
+        self.interval = interval
+        self.query = query
+        self.page_size = page_size
+
+    def fetch(self) -> List[Dict]:
+        params = {
+            "apiKey": self.api_key,
+            "q": self.query,
+            "language": "en",
+            "sortBy": "publishedAt",
+            "pageSize": self.page_size
+        }
+        response = self.session.get(NEWS_API_URL, params=params, timeout=5)
+        response.raise_for_status()  # 429 (rate limited) backs the source off
+        data = response.json()
+        if data.get("status") != "ok":
+            raise RuntimeError(data.get("message", "NewsAPI error"))
+        return [
+            make_article(a.get("title"), a.get("url", ""), a.get("publishedAt"),
+                         (a.get("source") or {}).get("name") or "NewsAPI")
+            for a in data.get("articles", [])
+        ]
+
+
+class RssSource:
+    """RSS/Atom feed polled with conditional GET: an unchanged feed costs a 304 and no parsing."""
+
+    blocking = True
+
+    def __init__(self, session: "requests.Session", url: str, interval: float = 60.0):
+        self.name = f"rss:{url}"
+        self.session = session
+        self.url = url
+        self.interval = interval
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.not_modified = 0
+
+    def fetch(self) -> List[Dict]:
+        import feedparser  # Only needed when an RSS source is configured
+
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        response = self.session.get(self.url, headers=headers, timeout=5)
+        if response.status_code == 304:
+            self.not_modified += 1
+            return []
+        response.raise_for_status()
+        self.etag = response.headers.get("ETag")
+        self.last_modified = response.headers.get("Last-Modified")
+
+        feed = feedparser.parse(response.content)
+        outlet = feed.feed.get("title") or "RSS"
+        return [
+            make_article(entry.get("title"), entry.get("link", ""), entry.get("published"), outlet)
+            for entry in feed.entries if entry.get("title")
+        ]
+
+
+class FileSource:
+    """
+    Tails a JSONL file (one {"title", "link"?, "source"?} per line); stands in
+    for a push feed in offline runs. Only lines appended since the last poll
+    are read.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, interval: float = 1.0):
+        self.name = f"file:{path}"
+        self.path = path
+        self.interval = interval
+        self.offset = 0
+
+    def fetch(self) -> List[Dict]:
+        if os.path.getsize(self.path) < self.offset:
+            self.offset = 0  # Truncated/rotated - start over
+        articles = []
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Half-written line; read it next time
+                self.offset += len(line)
+                if line.strip():
+                    record = json.loads(line)
+                    articles.append(make_article(record["title"], record.get("link", ""),
+                                                 record.get("published"), record.get("source") or "File"))
+        return articles
+
+
+class SyntheticSource:
+    """Template headlines stamped with the current time, for continuous trading."""
+
+    name = "synthetic"
+    blocking = False
+
+    def __init__(self, interval: float = 1.0, seed: Optional[int] = None):
+        self.interval = interval
+        self.index = 0
+        self.rng = random.Random(seed)
+
+    def next_article(self) -> Dict:
+        template = SYNTHETIC_NEWS_TEMPLATES[self.index % len(SYNTHETIC_NEWS_TEMPLATES)]
+        self.index += 1
+
+        article = make_article(f"{template['title']} - {time.strftime('%H:%M:%S')}", "#", source="Market Signals")
+        article["ticker_hint"] = template["ticker"]
+        article["sentiment_hint"] = template["sentiment"]
+        return article
+
+    def fetch(self) -> List[Dict]:
+        # Generate 1-3 synthetic news items
+        return [self.next_article() for _ in range(self.rng.randint(1, 3))]
+
+
+def create_news_sources(spec: str, session: Optional["requests.Session"] = None) -> List:
+    """
+    Comma-separated list of `newsapi`, `rss:<url>` and `file:<path>`.
+    newsapi is skipped when NEWS_API_KEY is not set. The HTTP session (and
+    requests itself) is only created when an HTTP source is configured.
+    """
+    sources = []
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        kind, _, arg = part.partition(":")
+        if kind == "newsapi":
+            api_key = os.getenv("NEWS_API_KEY")
+            if api_key:
+                session = session or create_session()
+                sources.append(NewsApiSource(session, api_key))
+        elif kind == "rss":
+            session = session or create_session()
+            sources.append(RssSource(session, arg))
+        elif kind == "file":
+            sources.append(FileSource(arg))
+        else:
+            raise ValueError(f"Unknown news source: {part}")
+    return sources
+
+
+class _SourceState:
+    __slots__ = ("source", "polls", "errors", "failures", "articles", "duplicates", "next_poll", "last_error")
+
+    def __init__(self, source):
+        self.source = source
+        self.polls = 0
+        self.errors = 0
+        self.failures = 0  # Consecutive, drives the backoff
+        self.articles = 0
+        self.duplicates = 0
+        self.next_poll = 0.0
+        self.last_error: Optional[str] = None
+
+    def to_dict(self) -> Dict:
+        stats = {
+            "source": self.source.name,
+            "polls": self.polls,
+            "errors": self.errors,
+            "articles": self.articles,
+            "duplicates": self.duplicates,
+            "backoff": self.failures > 0,
+            "last_error": self.last_error,
+        }
+        if hasattr(self.source, "not_modified"):
+            stats["not_modified"] = self.source.not_modified
+        return stats
+
+
+class NewsIngest:
+    """
+    Polls every source concurrently, each on its own interval with
+    exponential backoff after errors, drops stories already seen, and
+    pushes new articles to subscribers in arrival order. When no real
+    source has produced anything for `filler_after` seconds the synthetic
+    source fills in, so the arena keeps trading.
+    """
+
+    def __init__(self, sources: List, synthetic: Optional[SyntheticSource] = None, filler_after: float = 5.0,
+                 dedup_capacity: int = 5000, max_backoff: float = 300.0, timeout: float = 8.0, clock=None):
+        self.clock = clock or SYSTEM_CLOCK
+        self.states = [_SourceState(source) for source in sources]
+        self.synthetic = synthetic  # None: real sources only
+        self.filler_state = _SourceState(synthetic) if synthetic else None
+        self.filler_after = filler_after
+        self.max_backoff = max_backoff
+        self.seen = SeenIndex(dedup_capacity)
+        self.executor = BlockingExecutor("news", max_workers=max(1, len(sources)), timeout=timeout)
+
+        self._subscribers: List[asyncio.Queue] = []
+        self._tasks: List[asyncio.Task] = []
+        self.last_real_article = 0.0
+        self.published = 0
+
+    def subscribe(self, maxsize: int = 200) -> asyncio.Queue:
+        """Queue of new articles. A full queue drops the oldest pending article."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self._subscribers.append(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        if queue in self._subscribers:
+            self._subscribers.remove(queue)
+
+    async def articles(self) -> AsyncIterator[Dict]:
+        """Async stream of new, normalized articles."""
+        queue = self.subscribe()
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self.unsubscribe(queue)
+
+    def _publish(self, state: _SourceState, articles: List[Dict]) -> int:
+        fresh = 0
+        for article in articles:
+            if not self.seen.add(article_key(article)):
+                state.duplicates += 1
+                continue
+            fresh += 1
+            for queue in self._subscribers:
+                if queue.full():
+                    queue.get_nowait()  # Stale news is worth less than new news
+                queue.put_nowait(article)
+        state.articles += fresh
+        self.published += fresh
+        return fresh
+
+    async def poll(self, state: _SourceState) -> int:
+        """One fetch from one source; returns how many new articles it published."""
+        source = state.source
+        state.polls += 1
+        try:
+            if source.blocking:
+                articles = await self.executor.run(source.fetch)
+            else:
+                articles = source.fetch()
+        except Exception as e:
+            state.errors += 1
+            state.failures += 1
+            state.last_error = str(e) or type(e).__name__
+            delay = min(self.max_backoff, source.interval * 2 ** state.failures)
+            state.next_poll = self.clock.time() + delay * random.uniform(0.8, 1.2)
+            print(f"[News] {source.name} failed ({state.last_error}); retrying in {delay:.0f}s")
+            return 0
+        state.failures = 0
+        state.next_poll = self.clock.time() + source.interval
+        return self._publish(state, articles)
+
+    async def _run_source(self, state: _SourceState):
+        while True:
+            delay = state.next_poll - self.clock.time()
+            if delay > 0:
+                await self.clock.sleep(delay)
+            if await self.poll(state):
+                self.last_real_article = self.clock.time()
+
+    async def _run_filler(self):
+        while True:
+            await self.clock.sleep(self.synthetic.interval)
+            if self.clock.time() - self.last_real_article >= self.filler_after:
+                await self.poll(self.filler_state)
+
+    def start(self):
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._run_source(state)) for state in self.states]
+        if self.synthetic:
+            self._tasks.append(asyncio.create_task(self._run_filler()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self.executor.shutdown()
+
+    def stats(self) -> Dict:
+        sources = [state.to_dict() for state in self.states]
+        if self.filler_state:
+            sources.append(self.filler_state.to_dict())
+        return {
+            "published": self.published,
+            "seen": len(self.seen),
+            "subscribers": len(self._subscribers),
+            "sources": sources,
+        }
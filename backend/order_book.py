@@ -0,0 +1,463 @@
+"""
+Resting orders for every agent's PaperEngine: market, limit, stop and
+bracket orders, filled from the quote stream with pluggable slippage and
+commission models.
+
+Pending orders are indexed per ticker in two heaps keyed by trigger price.
+`above` holds orders that fire once the price rises to their trigger (sell
+limits, buy stops, and market orders waiting for a quote at -inf); `below`
+holds orders that fire once it falls to it (buy limits, sell stops). A tick
+pops only the orders it crosses, so it costs O(k log n) for k fills however
+many orders rest. Cancels are lazy: the heap entry stays and is discarded
+when it surfaces, and a book that is mostly dead entries is rebuilt.
+"""
+import math
+import heapq
+from typing import Dict, List, Optional, Tuple
+
+from clock import SYSTEM_CLOCK
+
+ORDER_TYPES = ("market", "limit", "stop")
+SIDES = ("BUY", "SELL")
+
+OPEN = "open"
+FILLED = "filled"
+CANCELLED = "cancelled"  # By request, by a bracket sibling, or the unfillable rest of a partial fill
+REJECTED = "rejected"    # Nothing could be filled (not enough cash, or no position)
+EXPIRED = "expired"
+
+_MARKET_TRIGGER = float("-inf")  # In `above`: fires on the next quote, whatever it is
+_COMPACT_MIN_DEAD = 1024
+
+
+class NoSlippage:
+    def fill_price(self, side: str, qty: int, price: float) -> float:
+        return price
+
+
+class FixedBpsSlippage:
+    """Every fill pays `bps` basis points away from the quote (half spread + impact, flat)."""
+
+    def __init__(self, bps: float = 5.0):
+        self.bps = bps
+
+    def fill_price(self, side: str, qty: int, price: float) -> float:
+        shift = price * self.bps / 10000
+        return price + shift if side == "BUY" else price - shift
+
+
+class SqrtImpactSlippage:
+    """Half spread plus square-root market impact: impact_bps * sqrt(qty / reference_qty)."""
+
+    def __init__(self, spread_bps: float = 2.0, impact_bps: float = 10.0, reference_qty: float = 10000):
+        self.spread_bps = spread_bps
+        self.impact_bps = impact_bps
+        self.reference_qty = reference_qty
+
+    def fill_price(self, side: str, qty: int, price: float) -> float:
+        bps = self.spread_bps / 2 + self.impact_bps * math.sqrt(qty / self.reference_qty)
+        shift = price * bps / 10000
+        return price + shift if side == "BUY" else price - shift
+
+
+class NoCommission:
+    def fee(self, qty: int, price: float) -> float:
+        return 0.0
+
+
+class PerShareCommission:
+    """Broker-style: per_share * qty, at least `minimum`, at most max_pct of the notional."""
+
+    def __init__(self, per_share: float = 0.005, minimum: float = 1.0, max_pct: float = 0.01):
+        self.per_share = per_share
+        self.minimum = minimum
+        self.max_pct = max_pct
+
+    def fee(self, qty: int, price: float) -> float:
+        return min(max(qty * self.per_share, self.minimum), qty * price * self.max_pct)
+
+
+class BpsCommission:
+    def __init__(self, bps: float = 1.0):
+        self.bps = bps
+
+    def fee(self, qty: int, price: float) -> float:
+        return qty * price * self.bps / 10000
+
+
+def create_slippage(spec: Optional[str]):
+    """`none`, `bps[:5]` or `sqrt[:spread_bps[:impact_bps[:reference_qty]]]`."""
+    kind, _, args = (spec or "none").partition(":")
+    values = [float(a) for a in args.split(":") if a]
+    if kind == "none":
+        return NoSlippage()
+    if kind == "bps":
+        return FixedBpsSlippage(*values)
+    if kind == "sqrt":
+        return SqrtImpactSlippage(*values)
+    raise ValueError(f"Unknown slippage model: {spec}")
+
+
+def create_commission(spec: Optional[str]):
+    """`none`, `per_share[:rate[:minimum[:max_pct]]]` or `bps[:1]`."""
+    kind, _, args = (spec or "none").partition(":")
+    values = [float(a) for a in args.split(":") if a]
+    if kind == "none":
+        return NoCommission()
+    if kind == "per_share":
+        return PerShareCommission(*values)
+    if kind == "bps":
+        return BpsCommission(*values)
+    raise ValueError(f"Unknown commission model: {spec}")
+
+
+class Order:
+    __slots__ = ("id", "agent", "ticker", "side", "type", "qty", "filled", "limit_price", "stop_price",
+                 "status", "reason", "created", "expires", "bracket", "parent", "oco", "triggered", "in_heap")
+
+    def __init__(self, order_id: int, agent: str, ticker: str, side: str, order_type: str, qty: int,
+                 limit_price: Optional[float], stop_price: Optional[float], reason: str, created: float,
+                 expires: Optional[float]):
+        self.id = order_id
+        self.agent = agent
+        self.ticker = ticker
+        self.side = side
+        self.type = order_type
+        self.qty = qty
+        self.filled = 0
+        self.limit_price = limit_price
+        self.stop_price = stop_price
+        self.status = OPEN
+        self.reason = reason
+        self.created = created
+        self.expires = expires
+        self.bracket: Optional[Tuple[Optional[float], Optional[float]]] = None  # (take profit, stop loss)
+        self.parent: Optional[int] = None  # Entry order of a bracket child
+        self.oco: Optional["Order"] = None  # Bracket sibling: one fill shrinks the other
+        self.triggered = False  # Stop orders turn into market orders once triggered
+        self.in_heap = False
+
+    @property
+    def remaining(self) -> int:
+        return self.qty - self.filled
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "agent": self.agent,
+            "ticker": self.ticker,
+            "side": self.side,
+            "type": self.type,
+            "qty": self.qty,
+            "filled": self.filled,
+            "limit_price": self.limit_price,
+            "stop_price": self.stop_price,
+            "status": self.status,
+            "parent": self.parent,
+            "take_profit": self.bracket[0] if self.bracket else None,
+            "stop_loss": self.bracket[1] if self.bracket else None,
+        }
+
+
+class _TickerBook:
+    __slots__ = ("above", "below", "dead")
+
+    def __init__(self):
+        self.above: List[Tuple[float, int, Order]] = []  # Min-heap of triggers
+        self.below: List[Tuple[float, int, Order]] = []  # Max-heap, stored negated
+        self.dead = 0  # Closed orders still sitting in the heaps
+
+
+class OrderBook:
+    """
+    One book shared by every agent. Engines are registered by agent name;
+    fills are booked straight into them with PaperEngine.book_fill.
+
+    max_fill_qty caps the shares one order can fill per tick, so large
+    orders fill partially across ticks instead of all at one price.
+    """
+
+    def __init__(self, slippage=None, commission=None, max_fill_qty: Optional[int] = None, clock=None):
+        self.slippage = slippage or NoSlippage()
+        self.commission = commission or NoCommission()
+        self.max_fill_qty = max_fill_qty
+        self.clock = clock or SYSTEM_CLOCK
+        self.engines: Dict[str, object] = {}
+        self.orders: Dict[int, Order] = {}  # Open orders only
+        self._books: Dict[str, _TickerBook] = {}
+        self._expiry: List[Tuple[float, int, Order]] = []
+        self._next_id = 1
+        self.submitted = 0
+        self.fills = 0
+        self.fees = 0.0
+        self.closed = {FILLED: 0, CANCELLED: 0, REJECTED: 0, EXPIRED: 0}
+
+    def register(self, agent: str, engine):
+        self.engines[agent] = engine
+
+    def tickers(self) -> set:
+        """Tickers with resting orders - the quote feed has to keep these fresh."""
+        return set(self._books)
+
+    def open_orders(self, agent: Optional[str] = None) -> List[Order]:
+        return [o for o in self.orders.values() if agent is None or o.agent == agent]
+
+    def submit(self, agent: str, ticker: str, side: str, qty: int, order_type: str = "market",
+               limit_price: Optional[float] = None, stop_price: Optional[float] = None,
+               take_profit: Optional[float] = None, stop_loss: Optional[float] = None,
+               reason: str = "", price: Optional[float] = None, ttl: Optional[float] = None) -> Order:
+        """
+        Places an order. With take_profit/stop_loss it is the entry of a
+        bracket: once it fills, a sell limit and a sell stop for the filled
+        quantity are placed, and a fill of either shrinks the other. If
+        `price` (the current quote) is given, a marketable order fills now;
+        otherwise it waits for the next tick.
+        """
+        if agent not in self.engines:
+            raise ValueError(f"Unknown agent {agent!r}")
+        if side not in SIDES:
+            raise ValueError(f"side must be one of {SIDES}")
+        if order_type not in ORDER_TYPES:
+            raise ValueError(f"order_type must be one of {ORDER_TYPES}")
+        if qty <= 0:
+            raise ValueError("qty must be positive")
+        if order_type == "limit" and not limit_price:
+            raise ValueError("Limit orders need a limit_price")
+        if order_type == "stop" and not stop_price:
+            raise ValueError("Stop orders need a stop_price")
+        if (take_profit or stop_loss) and side != "BUY":
+            raise ValueError("Brackets protect long entries; the entry must be a BUY")
+
+        now = self.clock.time()
+        order = self._new_order(agent, ticker.upper(), side, order_type, qty, limit_price, stop_price,
+                                reason, now, now + ttl if ttl else None)
+        if take_profit or stop_loss:
+            order.bracket = (take_profit, stop_loss)
+        self.submitted += 1
+        if price is not None and self._crossed(order, price):
+            self._execute(order, price)
+            if order.status != OPEN:
+                return order
+        self._index(order)
+        return order
+
+    def submit_decision(self, agent: str, decision: Dict, ticker: str, price: float,
+                        order_type: str = "market", limit_offset: float = 0.0,
+                        take_profit: Optional[float] = None, stop_loss: Optional[float] = None,
+                        ttl: Optional[float] = None) -> Optional[Order]:
+        """
+        Turns an analyst decision into an order, sized like execute_trade.
+        limit_offset places limit entries that fraction inside the quote;
+        take_profit/stop_loss are fractions from the quote for a bracket.
+        """
+        engine = self.engines[agent]
+        side = decision.get("action")
+        qty = engine.size_decision(decision, price)
+        if not qty or side not in SIDES:
+            return None
+        if side == "SELL" and ticker not in engine.positions:
+            return None  # Nothing to sell; execute_trade skips these too
+        # execute_trade marks the position at the quote even when the fill is then refused
+        engine.mark(ticker, price)
+        direction = 1 if side == "BUY" else -1
+        bracket = side == "BUY" and (take_profit or stop_loss)
+        return self.submit(
+            agent, ticker, side, qty, order_type,
+            limit_price=price * (1 - direction * limit_offset) if order_type == "limit" else None,
+            take_profit=price * (1 + take_profit) if bracket and take_profit else None,
+            stop_loss=price * (1 - stop_loss) if bracket and stop_loss else None,
+            reason=decision.get("reasoning", ""), price=price, ttl=ttl,
+        )
+
+    def cancel(self, order_id: int, agent: Optional[str] = None) -> bool:
+        """Cancels an open order (only the agent's own when `agent` is given)."""
+        order = self.orders.get(order_id)
+        if order is None or (agent is not None and order.agent != agent):
+            return False
+        self._close(order, CANCELLED)
+        return True
+
+    def on_price(self, ticker: str, price: float) -> List[Dict]:
+        """Fills every open order on `ticker` that `price` crosses; returns the fills."""
+        book = self._books.get(ticker)
+        if book is None or price <= 0:
+            return []
+        fired = []
+        above, below = book.above, book.below
+        while above and above[0][0] <= price:
+            fired.append(heapq.heappop(above)[2])
+        while below and -below[0][0] >= price:
+            fired.append(heapq.heappop(below)[2])
+        for order in fired:
+            order.in_heap = False
+            if order.status != OPEN:
+                book.dead -= 1  # Cancelled earlier; discarded now that it surfaced
+
+        fills = []
+        fired.sort(key=lambda o: o.id)  # Time priority among the orders this tick crosses
+        for order in fired:
+            if order.status != OPEN:
+                continue  # Closed already, or its bracket sibling filled earlier in this tick
+            fill = self._execute(order, price)
+            if fill:
+                fills.append(fill)
+            if order.status == OPEN:
+                self._index(order)  # Partial fill; the rest waits for the next tick
+        if not book.above and not book.below and self._books.get(ticker) is book:
+            del self._books[ticker]
+        return fills
+
+    def on_prices(self, prices: Dict[str, float]) -> List[Dict]:
+        """Expires due orders, then runs on_price for each changed quote."""
+        if self._expiry:
+            self.expire()
+        fills = []
+        for ticker, price in prices.items():
+            if ticker in self._books:
+                fills.extend(self.on_price(ticker, price))
+        return fills
+
+    def expire(self) -> int:
+        now = self.clock.time()
+        expiry = self._expiry
+        expired = 0
+        while expiry and expiry[0][0] <= now:
+            order = heapq.heappop(expiry)[2]
+            if order.status == OPEN:
+                self._close(order, EXPIRED)
+                expired += 1
+        return expired
+
+    def _new_order(self, agent, ticker, side, order_type, qty, limit_price, stop_price, reason, now, expires):
+        order = Order(self._next_id, agent, ticker, side, order_type, qty, limit_price, stop_price,
+                      reason, now, expires)
+        self._next_id += 1
+        self.orders[order.id] = order
+        if expires is not None:
+            heapq.heappush(self._expiry, (expires, order.id, order))
+        return order
+
+    @staticmethod
+    def _crossed(order: Order, price: float) -> bool:
+        if order.type == "market" or order.triggered:
+            return True
+        if order.type == "limit":
+            return price <= order.limit_price if order.side == "BUY" else price >= order.limit_price
+        return price >= order.stop_price if order.side == "BUY" else price <= order.stop_price
+
+    def _index(self, order: Order):
+        book = self._books.get(order.ticker)
+        if book is None:
+            book = self._books[order.ticker] = _TickerBook()
+        if order.type == "market" or order.triggered:
+            heapq.heappush(book.above, (_MARKET_TRIGGER, order.id, order))
+        elif order.type == "limit":
+            if order.side == "BUY":
+                heapq.heappush(book.below, (-order.limit_price, order.id, order))
+            else:
+                heapq.heappush(book.above, (order.limit_price, order.id, order))
+        elif order.side == "BUY":
+            heapq.heappush(book.above, (order.stop_price, order.id, order))
+        else:
+            heapq.heappush(book.below, (-order.stop_price, order.id, order))
+        order.in_heap = True
+
+    def _execute(self, order: Order, price: float) -> Optional[Dict]:
+        """Fills as much of a crossed order as liquidity, cash and position allow."""
+        if order.type == "stop":
+            order.triggered = True
+        engine = self.engines[order.agent]
+        qty = order.remaining
+        if self.max_fill_qty:
+            qty = min(qty, self.max_fill_qty)
+        fill_price = self.slippage.fill_price(order.side, qty, price)
+        if order.limit_price is not None:
+            # A limit never fills worse than its limit, but does take a better price
+            fill_price = min(fill_price, order.limit_price) if order.side == "BUY" else max(fill_price, order.limit_price)
+
+        wanted = qty
+        if order.side == "BUY":
+            fee = round(self.commission.fee(qty, fill_price), 2)
+            if qty * fill_price + fee > engine.cash:
+                qty = 0  # Like execute_trade: a buy the cash cannot cover is not filled at all
+        else:
+            position = engine.positions.get(order.ticker)
+            qty = min(qty, position.qty if position else 0)
+            fee = round(self.commission.fee(qty, fill_price), 2) if qty > 0 else 0.0
+        if qty <= 0:
+            self._close(order, REJECTED if not order.filled else CANCELLED)
+            return None
+
+        engine.book_fill(order.side, order.ticker, qty, fill_price, fee, order.reason, order.id)
+        order.filled += qty
+        self.fills += 1
+        self.fees += fee
+
+        sibling = order.oco
+        if sibling is not None and sibling.status == OPEN:
+            sibling.qty -= qty
+            if sibling.remaining <= 0:
+                self._close(sibling, CANCELLED)
+        if order.remaining <= 0:
+            self._close(order, FILLED)
+        elif qty < wanted:
+            self._close(order, CANCELLED)  # Sold the whole position; nothing left for the rest
+        return {"order_id": order.id, "agent": order.agent, "ticker": order.ticker, "side": order.side,
+                "qty": qty, "price": fill_price, "fee": fee}
+
+    def _close(self, order: Order, status: str):
+        order.status = status
+        self.closed[status] += 1
+        del self.orders[order.id]
+        if order.in_heap:
+            book = self._books[order.ticker]
+            book.dead += 1
+            size = len(book.above) + len(book.below)
+            if book.dead == size:
+                del self._books[order.ticker]  # Nothing open left on this ticker
+            elif book.dead >= _COMPACT_MIN_DEAD and book.dead * 2 > size:
+                self._compact(order.ticker, book)
+        if order.bracket and order.filled:
+            self._place_bracket(order)
+        if len(self._expiry) >= _COMPACT_MIN_DEAD and len(self._expiry) > 2 * len(self.orders):
+            self._expiry = [entry for entry in self._expiry if entry[2].status == OPEN]
+            heapq.heapify(self._expiry)
+
+    def _compact(self, ticker: str, book: _TickerBook):
+        """Drops closed orders from a ticker's heaps in one O(n) rebuild."""
+        for heap in (book.above, book.below):
+            for entry in heap:
+                if entry[2].status != OPEN:
+                    entry[2].in_heap = False
+            heap[:] = [entry for entry in heap if entry[2].status == OPEN]
+            heapq.heapify(heap)
+        book.dead = 0
+        if not book.above and not book.below:
+            del self._books[ticker]
+
+    def _place_bracket(self, entry: Order):
+        """Exit orders for what the entry filled: take-profit limit and stop-loss, one-cancels-other."""
+        take_profit, stop_loss = entry.bracket
+        children = []
+        for order_type, limit_price, stop_price in (("limit", take_profit, None), ("stop", None, stop_loss)):
+            if limit_price or stop_price:
+                child = self._new_order(entry.agent, entry.ticker, "SELL", order_type, entry.filled, limit_price,
+                                        stop_price, entry.reason, self.clock.time(), None)
+                child.parent = entry.id
+                children.append(child)
+                self.submitted += 1
+        if len(children) == 2:
+            children[0].oco, children[1].oco = children[1], children[0]
+        for child in children:
+            self._index(child)
+
+    def stats(self) -> Dict:
+        return {
+            "open": len(self.orders),
+            "tickers": len(self._books),
+            "submitted": self.submitted,
+            "fills": self.fills,
+            "fees": round(self.fees, 2),
+            **self.closed,
+            "stale_entries": sum(book.dead for book in self._books.values()),
+        }
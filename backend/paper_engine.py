@@ -1,15 +1,45 @@
-from typing import Dict, List
-import datetime
+from collections import deque
+from itertools import islice
+from typing import Callable, Deque, Dict, List, Optional, Set
+
+from clock import SYSTEM_CLOCK
+
+TRADE_LOG_SIZE = 50  # Trades kept in memory for the dashboard
+
+class Position:
+    """One holding. last_price is the most recent mark used for valuation."""
+    __slots__ = ("qty", "avg_price", "last_price")
+
+    def __init__(self, qty: int, avg_price: float, last_price: float):
+        self.qty = qty
+        self.avg_price = avg_price
+        self.last_price = last_price
+
+    @property
+    def market_value(self) -> float:
+        return self.qty * self.last_price
 
 class PaperEngine:
-    def __init__(self, initial_cash=100000.0):
+    def __init__(self, initial_cash=100000.0, min_confidence=0.35, max_allocation=None, clock=None,
+                 allocation_scale=1.0):
         self.initial_cash = initial_cash
+        self.clock = clock or SYSTEM_CLOCK
+        # Risk parameters: skip decisions below min_confidence, cap each trade's allocation
+        self.min_confidence = min_confidence
+        self.max_allocation = max_allocation
+        self.allocation_scale = allocation_scale  # Multiplies the agent's allocation_percent
         self.cash = initial_cash
-        self.positions: Dict[str, Dict] = {}  # Ticker -> {qty, avg_price}
+        self.positions: Dict[str, Position] = {}
+        # Running sum of qty * last_price, so a tick or fill revalues in O(1)
+        self.positions_value = 0.0
         self.portfolio_value = initial_cash
-        self.trade_log: List[Dict] = []
-        self.start_time = datetime.datetime.now()
+        self.trade_log: Deque[Dict] = deque(maxlen=TRADE_LOG_SIZE)  # Newest first
+        self.start_time = self.clock.now()
         self.pnl = 0.0
+        self.trade_seq = 0  # Monotonic trade id, survives trade_log truncation
+        self.dirty_tickers: Set[str] = set()  # Positions changed since the last drain_dirty()
+        # Called with every recorded trade and its unrounded fill price
+        self.trade_listeners: List[Callable[[Dict, float], None]] = []
 
     def execute_trade(self, decision: Dict, current_price: float):
         """
@@ -17,61 +47,35 @@ class PaperEngine:
         """
         ticker = decision.get("ticker", "SPY")
         action = decision.get("action")
-        confidence = decision.get("confidence", 0)
-        allocation_pct = decision.get("allocation_percent", 0.05)
-
-        if confidence < 0.35 or action == "HOLD":
-            return  # Skip low confidence or hold
-
-        trade_amount = self.portfolio_value * allocation_pct
-        quantity = int(trade_amount / current_price) if current_price > 0 else 0
+        quantity = self.size_decision(decision, current_price)
 
         if quantity == 0:
             return
 
-        timestamp = datetime.datetime.now().isoformat()
-        
+        timestamp = self.clock.now().isoformat()
+        # Mark existing shares at the fill price before the fill changes qty
+        self.mark(ticker, current_price)
+        position = self.positions.get(ticker)
+
         if action == "BUY":
-            cost = quantity * current_price
-            if self.cash >= cost:
-                self.cash -= cost
-                
-                if ticker in self.positions:
-                    # Average down/up
-                    old_qty = self.positions[ticker]['qty']
-                    old_avg = self.positions[ticker]['avg_price']
-                    new_qty = old_qty + quantity
-                    new_avg = ((old_qty * old_avg) + (quantity * current_price)) / new_qty
-                    self.positions[ticker] = {'qty': new_qty, 'avg_price': new_avg}
-                else:
-                    self.positions[ticker] = {'qty': quantity, 'avg_price': current_price}
-                
-                self.trade_log.insert(0, {
+            if self.cash >= quantity * current_price:
+                self.apply_fill("BUY", ticker, quantity, current_price)
+                self._record_trade({
                     "time": timestamp,
                     "action": "BUY",
                     "ticker": ticker,
                     "qty": quantity,
                     "price": round(current_price, 2),
                     "reason": decision.get("reasoning", "")[:50]
-                })
+                }, current_price)
 
         elif action == "SELL":
-            if ticker in self.positions:
-                current_qty = self.positions[ticker]['qty']
-                avg_price = self.positions[ticker]['avg_price']
-                qty_to_sell = min(current_qty, quantity)
-                
+            if position:
+                qty_to_sell = min(position.qty, quantity)
+
                 if qty_to_sell > 0:
-                    revenue = qty_to_sell * current_price
-                    realized_pnl = (current_price - avg_price) * qty_to_sell
-                    self.pnl += realized_pnl
-                    self.cash += revenue
-                    
-                    self.positions[ticker]['qty'] -= qty_to_sell
-                    if self.positions[ticker]['qty'] <= 0:
-                        del self.positions[ticker]
-                    
-                    self.trade_log.insert(0, {
+                    realized_pnl = self.apply_fill("SELL", ticker, qty_to_sell, current_price)
+                    self._record_trade({
                         "time": timestamp,
                         "action": "SELL",
                         "ticker": ticker,
@@ -79,37 +83,163 @@ class PaperEngine:
                         "price": round(current_price, 2),
                         "pnl": round(realized_pnl, 2),
                         "reason": decision.get("reasoning", "")[:50]
-                    })
+                    }, current_price)
+
+    def size_decision(self, decision: Dict, current_price: float) -> int:
+        """Shares a decision asks for at current_price after the risk limits; 0 means skip it."""
+        confidence = decision.get("confidence", 0)
+        allocation_pct = decision.get("allocation_percent", 0.05)
+
+        if confidence < self.min_confidence or decision.get("action") == "HOLD":
+            return 0  # Skip low confidence or hold
+        allocation_pct *= self.allocation_scale
+        if self.max_allocation is not None:
+            allocation_pct = min(allocation_pct, self.max_allocation)
 
-        # Keep only last 50 trades
-        self.trade_log = self.trade_log[:50]
-        self._update_valuation({ticker: current_price})
+        trade_amount = self.portfolio_value * allocation_pct
+        return int(trade_amount / current_price) if current_price > 0 else 0
+
+    def book_fill(self, action: str, ticker: str, qty: int, price: float, fee: float = 0.0,
+                  reason: str = "", order_id: Optional[int] = None) -> float:
+        """
+        Books and records an order book fill; returns the realized P&L. The
+        position is marked at the fill price; the fee (charged in cents) goes
+        into the cost basis or comes out of the proceeds, so cash, P&L and
+        journal replay all include it. The order book has already checked
+        cash and position.
+        """
+        fee = round(fee, 2)
+        self.mark(ticker, price)
+        realized_pnl = self.apply_fill(action, ticker, qty, price, fee)
+        trade = {
+            "time": self.clock.now().isoformat(),
+            "action": action,
+            "ticker": ticker,
+            "qty": qty,
+            "price": round(price, 2),
+            "fee": fee,
+            "order_id": order_id,
+        }
+        if action == "SELL":
+            trade["pnl"] = round(realized_pnl, 2)
+        trade["reason"] = reason[:50]
+        self._record_trade(trade, price)
+        return realized_pnl
+
+    def apply_fill(self, action: str, ticker: str, qty: int, price: float, fee: float = 0.0) -> float:
+        """
+        Books a fill against cash and positions and returns the realized P&L.
+        Callers mark() the ticker at the fill price first. A fee is added to
+        the cost basis of a buy and taken from the proceeds of a sell. No
+        checks: execute_trade validates, journal replay trusts the log.
+        """
+        realized_pnl = 0.0
+        position = self.positions.get(ticker)
+        value = qty * price
+        if action == "BUY":
+            cost = value + fee
+            self.cash -= cost
+            if position:
+                # Average down/up
+                new_qty = position.qty + qty
+                position.avg_price = ((position.qty * position.avg_price) + cost) / new_qty
+                position.qty = new_qty
+            else:
+                self.positions[ticker] = Position(qty, price + fee / qty, price)
+            self.positions_value += value
+        else:
+            realized_pnl = (price - position.avg_price) * qty - fee
+            self.pnl += realized_pnl
+            self.cash += value - fee
+
+            position.qty -= qty
+            self.positions_value -= value
+            if position.qty <= 0:
+                del self.positions[ticker]
+        self.dirty_tickers.add(ticker)
+        self.portfolio_value = self.cash + self.positions_value
+        return realized_pnl
+
+    def _record_trade(self, trade: Dict, fill_price: float):
+        self.trade_seq += 1
+        trade["id"] = self.trade_seq
+        self.trade_log.appendleft(trade)  # deque drops the oldest past TRADE_LOG_SIZE
+        for listener in self.trade_listeners:
+            listener(trade, fill_price)
+
+    def mark(self, ticker: str, price: float):
+        """Revalues one position at a new price in O(1)."""
+        position = self.positions.get(ticker)
+        if position is None or price <= 0:
+            return
+        self.positions_value += position.qty * (price - position.last_price)
+        position.last_price = price
+        self.portfolio_value = self.cash + self.positions_value
 
     def _update_valuation(self, current_prices: Dict[str, float]):
-        """Updates total portfolio value based on LIVE prices."""
-        pos_value = 0
-        for ticker, data in self.positions.items():
-            qty = data['qty']
-            price = current_prices.get(ticker, data['avg_price'])
-            pos_value += qty * price
-        self.portfolio_value = self.cash + pos_value
+        """
+        Updates total portfolio value based on LIVE prices. Only the given
+        tickers are touched; the rest keep their last mark.
+        """
+        for ticker, price in current_prices.items():
+            self.mark(ticker, price)
 
-    def get_state(self):
-        # Format positions for frontend
-        positions_display = {}
-        for ticker, data in self.positions.items():
-            positions_display[ticker] = data['qty']
-        
+    def recompute_totals(self):
+        """Full rescan of the running totals (clears float drift; O(positions))."""
+        self.positions_value = sum(p.market_value for p in self.positions.values())
+        self.portfolio_value = self.cash + self.positions_value
+
+    def get_summary(self) -> Dict:
+        """Scalar portfolio fields - O(1), no position or trade scan."""
         roi = ((self.portfolio_value - self.initial_cash) / self.initial_cash) * 100
-        
         return {
             "cash": round(self.cash, 2),
             "portfolio_value": round(self.portfolio_value, 2),
-            "positions": positions_display,
-            "trade_log": self.trade_log[:20],
             "roi": round(roi, 2),
             "realized_pnl": round(self.pnl, 2),
-            "total_trades": len(self.trade_log)
+            "total_trades": self.trade_seq
+        }
+
+    def drain_dirty(self) -> Set[str]:
+        """Tickers whose position changed since the previous call."""
+        dirty, self.dirty_tickers = self.dirty_tickers, set()
+        return dirty
+
+    def trades_since(self, trade_id: int) -> List[Dict]:
+        """Trades newer than trade_id, newest first."""
+        new_trades = []
+        for trade in self.trade_log:
+            if trade["id"] <= trade_id:
+                break
+            new_trades.append(trade)
+        return new_trades
+
+    def to_snapshot(self) -> Dict:
+        """Exact (unrounded) book state for the journal; restore() reverses it."""
+        return {
+            "cash": self.cash,
+            "pnl": self.pnl,
+            "trade_seq": self.trade_seq,
+            "positions": {t: [p.qty, p.avg_price, p.last_price] for t, p in self.positions.items()},
         }
 
-paper_engine = PaperEngine()
+    def restore(self, snapshot: Dict, trade_log: List[Dict] = ()):
+        """Loads a to_snapshot() state; trade_log is the recent trades, newest first."""
+        self.cash = snapshot["cash"]
+        self.pnl = snapshot["pnl"]
+        self.trade_seq = snapshot["trade_seq"]
+        self.positions = {t: Position(*fields) for t, fields in snapshot["positions"].items()}
+        self.trade_log.clear()
+        self.trade_log.extend(trade_log)
+        self.dirty_tickers.update(self.positions)
+        self.recompute_totals()
+
+    def get_state(self):
+        # Format positions for frontend
+        positions_display = {ticker: position.qty for ticker, position in self.positions.items()}
+
+        state = self.get_summary()
+        state["positions"] = positions_display
+        state["trade_log"] = list(islice(self.trade_log, 20))
+        state["last_trade_id"] = self.trade_seq
+        return state
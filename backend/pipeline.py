@@ -0,0 +1,240 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+
+class StageStats:
+    """Queue depth and latency counters for one pipeline stage."""
+
+    __slots__ = ("name", "in_flight", "processed", "errors", "total_latency", "max_latency")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.in_flight = 0
+        self.processed = 0
+        self.errors = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def record(self, latency: float):
+        self.processed += 1
+        self.total_latency += latency
+        if latency > self.max_latency:
+            self.max_latency = latency
+
+    def to_dict(self, queue_depth: int) -> Dict:
+        avg = self.total_latency / self.processed if self.processed else 0.0
+        return {
+            "queue_depth": queue_depth,
+            "in_flight": self.in_flight,
+            "processed": self.processed,
+            "errors": self.errors,
+            "avg_latency_ms": round(avg * 1000, 2),
+            "max_latency_ms": round(self.max_latency * 1000, 2),
+        }
+
+
+class _Item:
+    __slots__ = ("seq", "article", "decision", "price", "ingested_at")
+
+    def __init__(self, seq: int, article: Dict):
+        self.seq = seq
+        self.article = article
+        self.decision = None
+        self.price = None
+        self.ingested_at = time.perf_counter()
+
+
+class ArticlePipeline:
+    """
+    Staged article processing: ingest -> analyze -> price -> execute -> broadcast.
+
+    Analysis and pricing fan out across `concurrency` workers each; an analyze
+    worker takes up to `batch_size` queued articles per call. Execution is a
+    single worker that releases items strictly in ingest order, so the engine
+    sees the same trade sequence no matter which LLM call returns first.
+
+    analyze(articles) -> [decisions]            (coroutine; one per article, in order, None to skip)
+    price(article, decisions) -> prices         (coroutine; e.g. {ticker: price})
+    execute(article, decisions, prices) -> list (sync, returns messages to broadcast)
+    broadcast(message)                          (coroutine)
+
+    `decisions` is whatever analyze returned for the article (Arena.analyze
+    gives {analyst: decision}); the pipeline only passes it along.
+    """
+
+    def __init__(
+        self,
+        analyze: Callable[[List[Dict]], Awaitable[List[Any]]],
+        price: Callable[[Dict, Any], Awaitable[Any]],
+        execute: Callable[[Dict, Any, Any], List[Dict]],
+        broadcast: Callable[[Dict], Awaitable[None]],
+        concurrency: int = 4,
+        batch_size: int = 10,
+        max_queue: int = 100,
+    ):
+        self._analyze = analyze
+        self._price = price
+        self._execute = execute
+        self._broadcast = broadcast
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+
+        self._analyze_q: asyncio.Queue = asyncio.Queue(max_queue)
+        self._price_q: asyncio.Queue = asyncio.Queue(max_queue)
+        self._broadcast_q: asyncio.Queue = asyncio.Queue()
+        self._reorder: Dict[int, _Item] = {}  # seq -> priced item waiting for its turn
+        self._ready = asyncio.Event()
+
+        self._next_seq = 0
+        self._next_exec = 0
+        self._pending = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._tasks: List[asyncio.Task] = []
+
+        self.stats = {name: StageStats(name) for name in ("analyze", "price", "execute", "broadcast")}
+        self.end_to_end = StageStats("end_to_end")
+
+    def start(self):
+        if self._tasks:
+            return
+        for _ in range(self.concurrency):
+            self._tasks.append(asyncio.create_task(self._analyze_worker()))
+            self._tasks.append(asyncio.create_task(self._price_worker()))
+        self._tasks.append(asyncio.create_task(self._execute_worker()))
+        self._tasks.append(asyncio.create_task(self._broadcast_worker()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, article: Dict):
+        """Ingest stage: announce the article and queue it for analysis."""
+        item = _Item(self._next_seq, article)
+        self._next_seq += 1
+        self._pending += 1
+        self._idle.clear()
+        self._broadcast_q.put_nowait([{"type": "NEWS_ALERT", "data": article}])
+        await self._analyze_q.put(item)
+
+    def publish(self, messages: List[Dict]):
+        """
+        Queues messages produced outside the pipeline (quote revaluations)
+        behind everything already waiting, so sequenced deltas reach clients
+        in the order they were numbered.
+        """
+        self._broadcast_q.put_nowait(messages)
+
+    async def join(self):
+        """Wait until every submitted article has been executed and broadcast."""
+        await self._idle.wait()
+
+    async def _analyze_worker(self):
+        stats = self.stats["analyze"]
+        while True:
+            batch = [await self._analyze_q.get()]
+            while len(batch) < self.batch_size and not self._analyze_q.empty():
+                batch.append(self._analyze_q.get_nowait())
+
+            stats.in_flight += len(batch)
+            started = time.perf_counter()
+            try:
+                decisions = await self._analyze([item.article for item in batch])
+                for item, decision in zip(batch, decisions):
+                    item.decision = decision
+            except Exception as e:
+                stats.errors += 1
+                print(f"[Pipeline] Analyze error: {e}")
+            finally:
+                stats.in_flight -= len(batch)
+                stats.record(time.perf_counter() - started)
+                for _ in batch:
+                    self._analyze_q.task_done()
+
+            for item in batch:
+                if item.decision:
+                    await self._price_q.put(item)
+                else:
+                    self._release(item)
+
+    async def _price_worker(self):
+        stats = self.stats["price"]
+        while True:
+            item = await self._price_q.get()
+            stats.in_flight += 1
+            started = time.perf_counter()
+            try:
+                item.price = await self._price(item.article, item.decision)
+            except Exception as e:
+                stats.errors += 1
+                item.decision = None  # Never trade without a price
+                print(f"[Pipeline] Price error: {e}")
+            finally:
+                stats.in_flight -= 1
+                stats.record(time.perf_counter() - started)
+                self._price_q.task_done()
+            self._release(item)
+
+    def _release(self, item: _Item):
+        self._reorder[item.seq] = item
+        self._ready.set()
+
+    async def _execute_worker(self):
+        stats = self.stats["execute"]
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            # Drain every item that is next in ingest order
+            while self._next_exec in self._reorder:
+                item = self._reorder.pop(self._next_exec)
+                self._next_exec += 1
+                messages: List[Dict] = []
+                if item.decision:
+                    started = time.perf_counter()
+                    try:
+                        messages = self._execute(item.article, item.decision, item.price) or []
+                    except Exception as e:
+                        stats.errors += 1
+                        print(f"[Pipeline] Execute error: {e}")
+                    stats.record(time.perf_counter() - started)
+                self._broadcast_q.put_nowait(messages)
+                self._broadcast_q.put_nowait(item)
+
+    async def _broadcast_worker(self):
+        stats = self.stats["broadcast"]
+        while True:
+            entry = await self._broadcast_q.get()
+            if isinstance(entry, _Item):
+                # Marker queued after an item's messages: the item is done
+                self.end_to_end.record(time.perf_counter() - entry.ingested_at)
+                self._pending -= 1
+                if self._pending == 0:
+                    self._idle.set()
+                continue
+            for message in entry:
+                stats.in_flight += 1
+                started = time.perf_counter()
+                try:
+                    await self._broadcast(message)
+                except Exception as e:
+                    stats.errors += 1
+                    print(f"[Pipeline] Broadcast error: {e}")
+                finally:
+                    stats.in_flight -= 1
+                    stats.record(time.perf_counter() - started)
+
+    def get_stats(self) -> Dict:
+        depths = {
+            "analyze": self._analyze_q.qsize(),
+            "price": self._price_q.qsize(),
+            "execute": len(self._reorder),
+            "broadcast": self._broadcast_q.qsize(),
+        }
+        result = {name: stats.to_dict(depths[name]) for name, stats in self.stats.items()}
+        result["end_to_end"] = self.end_to_end.to_dict(self._pending)
+        result["concurrency"] = self.concurrency
+        result["batch_size"] = self.batch_size
+        return result
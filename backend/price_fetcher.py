@@ -1,10 +1,19 @@
-import yfinance as yf
-from typing import Dict
+from typing import Dict, List, Optional
 import time
+import random
+import threading
+from concurrent.futures import Future
+from instrumentation import PRICE_ERRORS, PRICE_LATENCY
 
 # Cache prices to avoid hammering API
 _price_cache: Dict[str, tuple] = {}  # ticker -> (price, timestamp)
 CACHE_TTL = 60  # 60 seconds cache
+PRICE_TIMEOUT = 5.0  # Seconds a caller waits on another thread's in-flight fetch
+
+# Tickers currently being fetched -> Future resolving to their price.
+# Concurrent callers asking for the same ticker wait on the same request.
+_inflight: Dict[str, Future] = {}
+_inflight_lock = threading.Lock()
 
 # Fallback prices for common tickers (updated regularly)
 FALLBACK_PRICES = {
@@ -16,59 +25,162 @@ FALLBACK_PRICES = {
     'GLD': 190.0, 'SLV': 22.0, 'USO': 75.0, 'VIX': 15.0
 }
 
-def get_live_price(ticker: str) -> float:
-    """
-    Fetches live stock price from Yahoo Finance with robust fallbacks.
-    """
-    ticker = ticker.upper().strip()
-    
-    # Check cache first
-    if ticker in _price_cache:
-        cached_price, cached_time = _price_cache[ticker]
-        if time.time() - cached_time < CACHE_TTL:
-            return cached_price
-    
-    # Try Yahoo Finance
+def _cached_price(ticker: str, max_age: float = CACHE_TTL) -> Optional[float]:
+    start = time.perf_counter()
+    entry = _price_cache.get(ticker)
+    if entry and time.time() - entry[1] < max_age:
+        PRICE_LATENCY.observe(time.perf_counter() - start, "cache")
+        return entry[0]
+    return None
+
+def _fetch_single(ticker: str) -> Optional[float]:
+    """One ticker from Yahoo Finance: fast_info, then 1m history."""
+    import yfinance as yf  # Pulls in pandas; deferred until the first Yahoo lookup
+
+    stock = yf.Ticker(ticker)
+
+    # Method 1: fast_info
+    start = time.perf_counter()
     try:
-        stock = yf.Ticker(ticker)
-        
-        # Method 1: fast_info
-        try:
-            info = stock.fast_info
-            price = getattr(info, 'last_price', None) or getattr(info, 'previous_close', None)
-            if price and price > 0:
-                _price_cache[ticker] = (float(price), time.time())
-                return float(price)
-        except:
-            pass
-        
-        # Method 2: history
+        info = stock.fast_info
+        price = getattr(info, 'last_price', None) or getattr(info, 'previous_close', None)
+        if price and price > 0:
+            PRICE_LATENCY.observe(time.perf_counter() - start, "fast_info")
+            return float(price)
+    except Exception as e:
+        PRICE_ERRORS.inc("fast_info")
+        print(f"[Prices] fast_info failed for {ticker}: {e}")
+
+    # Method 2: history
+    start = time.perf_counter()
+    try:
+        hist = stock.history(period="1d", interval="1m")
+        if not hist.empty:
+            price = float(hist['Close'].iloc[-1])
+            if price > 0:
+                PRICE_LATENCY.observe(time.perf_counter() - start, "history")
+                return price
+    except Exception as e:
+        PRICE_ERRORS.inc("history")
+        print(f"[Prices] history failed for {ticker}: {e}")
+    return None
+
+def _last_closes(data, tickers: List[str]) -> Dict[str, float]:
+    """Latest close per ticker from a yf.download frame (grouped by ticker)."""
+    closes = {}
+    if data is None or data.empty:
+        return closes
+    multi = getattr(data.columns, 'nlevels', 1) > 1
+    for ticker in tickers:
         try:
-            hist = stock.history(period="1d", interval="1m")
-            if not hist.empty:
-                price = float(hist['Close'].iloc[-1])
+            if multi:
+                series = data[ticker]['Close']
+            else:
+                series = data['Close']  # Older yfinance: flat columns for a single ticker
+            series = series.dropna()
+            if not series.empty:
+                price = float(series.iloc[-1])
                 if price > 0:
-                    _price_cache[ticker] = (price, time.time())
-                    return price
-        except:
-            pass
-            
+                    closes[ticker] = price
+        except (KeyError, IndexError, TypeError, ValueError):
+            continue
+    return closes
+
+def _fetch_batch(tickers: List[str]) -> Dict[str, float]:
+    """All tickers in one Yahoo round trip."""
+    if len(tickers) == 1:
+        price = _fetch_single(tickers[0])
+        return {tickers[0]: price} if price else {}
+    import yfinance as yf
+
+    start = time.perf_counter()
+    try:
+        data = yf.download(
+            tickers, period="1d", interval="1m", group_by="ticker",
+            progress=False, threads=True,
+        )
     except Exception as e:
-        pass  # Silent fail, use fallback
-    
-    # Use fallback price
+        PRICE_ERRORS.inc("batch")
+        print(f"[Prices] Batch download failed for {len(tickers)} tickers: {e}")
+        return {}
+    closes = _last_closes(data, tickers)
+    PRICE_LATENCY.observe(time.perf_counter() - start, "batch")
+    return closes
+
+def _fallback_price(ticker: str) -> float:
+    """Fallback price when Yahoo is unavailable."""
+    PRICE_LATENCY.observe(0.0, "fallback")  # Counts fallbacks next to the real paths
     if ticker in FALLBACK_PRICES:
         # Add some realistic variance (+/- 1%)
         base_price = FALLBACK_PRICES[ticker]
-        import random
         variance = base_price * random.uniform(-0.01, 0.01)
         price = base_price + variance
         _price_cache[ticker] = (price, time.time())
         return price
-    
+
     # Ultimate fallback for unknown tickers
     return 100.0
 
-def get_multiple_prices(tickers: list) -> Dict[str, float]:
-    """Get prices for multiple tickers."""
-    return {ticker: get_live_price(ticker) for ticker in tickers}
+def _refresh(tickers: List[str]) -> Dict[str, float]:
+    """
+    Fetches stale tickers with one upstream request, joining requests
+    other threads already have in flight instead of duplicating them.
+    """
+    owned, waiting = [], {}
+    with _inflight_lock:
+        for ticker in tickers:
+            if ticker in _inflight:
+                waiting[ticker] = _inflight[ticker]
+            else:
+                _inflight[ticker] = Future()
+                owned.append(ticker)
+
+    prices = {}
+    if owned:
+        try:
+            fetched = _fetch_batch(owned)
+            now = time.time()
+            for ticker, price in fetched.items():
+                _price_cache[ticker] = (price, now)
+            for ticker in owned:
+                prices[ticker] = fetched[ticker] if ticker in fetched else _fallback_price(ticker)
+        finally:
+            with _inflight_lock:
+                for ticker in owned:
+                    future = _inflight.pop(ticker)
+                    if ticker in prices:
+                        future.set_result(prices[ticker])
+                    else:
+                        future.set_exception(RuntimeError(f"price fetch for {ticker} failed"))
+
+    for ticker, future in waiting.items():
+        try:
+            prices[ticker] = future.result(timeout=PRICE_TIMEOUT)
+        except Exception:
+            prices[ticker] = _fallback_price(ticker)
+    return prices
+
+def get_live_price(ticker: str) -> float:
+    """
+    Fetches live stock price from Yahoo Finance with robust fallbacks.
+    """
+    ticker = ticker.upper().strip()
+    cached = _cached_price(ticker)
+    if cached is not None:
+        return cached
+    return _refresh([ticker])[ticker]
+
+def get_multiple_prices(tickers: list, max_age: float = CACHE_TTL) -> Dict[str, float]:
+    """Get prices for multiple tickers, refreshing only expired ones in a single batch."""
+    normalized = {ticker: ticker.upper().strip() for ticker in tickers}
+    prices = {}
+    stale = []
+    for symbol in dict.fromkeys(normalized.values()):
+        cached = _cached_price(symbol, max_age)
+        if cached is not None:
+            prices[symbol] = cached
+        else:
+            stale.append(symbol)
+    if stale:
+        prices.update(_refresh(stale))
+    return {ticker: prices[symbol] for ticker, symbol in normalized.items()}
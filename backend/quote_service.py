@@ -0,0 +1,217 @@
+import csv
+import math
+import random
+import asyncio
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+import price_fetcher
+from price_fetcher import FALLBACK_PRICES
+from executor import BlockingExecutor
+from clock import SYSTEM_CLOCK
+
+
+class Quote:
+    __slots__ = ("ticker", "price", "timestamp", "source")
+
+    def __init__(self, ticker: str, price: float, timestamp: float, source: str):
+        self.ticker = ticker
+        self.price = price
+        self.timestamp = timestamp
+        self.source = source
+
+    def to_dict(self) -> Dict:
+        return {"ticker": self.ticker, "price": round(self.price, 4), "timestamp": self.timestamp, "source": self.source}
+
+
+class YahooQuoteSource:
+    """Live quotes through price_fetcher's batched Yahoo download."""
+
+    name = "yahoo"
+    blocking = True
+
+    def __init__(self, max_age: float = 5.0):
+        self.max_age = max_age  # Reuse cache entries younger than this instead of refetching
+
+    def fetch(self, tickers: List[str]) -> Dict[str, float]:
+        return price_fetcher.get_multiple_prices(tickers, max_age=self.max_age)
+
+
+class RandomWalkSource:
+    """Offline quotes: seeded geometric random walk starting from FALLBACK_PRICES."""
+
+    name = "random"
+    blocking = False
+
+    def __init__(self, seed: int = 42, volatility: float = 0.002):
+        self.rng = random.Random(seed)
+        self.volatility = volatility
+        self.prices: Dict[str, float] = {}
+
+    def fetch(self, tickers: List[str]) -> Dict[str, float]:
+        for ticker in tickers:
+            price = self.prices.get(ticker) or FALLBACK_PRICES.get(ticker, 100.0)
+            self.prices[ticker] = price * math.exp(self.rng.gauss(0, self.volatility))
+        return {ticker: self.prices[ticker] for ticker in tickers}
+
+
+class CsvReplaySource:
+    """
+    Offline quotes replayed from a CSV with `time,ticker,price` (or `close`) columns.
+    Each fetch advances one timestamp; the replay loops when it reaches the end.
+    """
+
+    name = "csv"
+    blocking = False
+
+    def __init__(self, path: str):
+        frames: Dict[str, Dict[str, float]] = {}
+        with open(path, newline="") as f:
+            for row in csv.DictReader(f):
+                price = row.get("price") or row.get("close")
+                if not price:
+                    continue
+                frames.setdefault(row["time"], {})[row["ticker"].upper()] = float(price)
+        self.frames = [frames[t] for t in sorted(frames)]
+        self.position = 0
+        self.prices: Dict[str, float] = {}
+        if not self.frames:
+            raise ValueError(f"No quotes found in {path}")
+
+    def fetch(self, tickers: List[str]) -> Dict[str, float]:
+        self.prices.update(self.frames[self.position % len(self.frames)])
+        self.position += 1
+        # Tickers the file does not cover keep their fallback price
+        return {t: self.prices.get(t) or FALLBACK_PRICES.get(t, 100.0) for t in tickers}
+
+
+def create_quote_source(spec: str):
+    """`yahoo`, `random[:seed]` or `csv:<path>`."""
+    kind, _, arg = spec.partition(":")
+    if kind == "yahoo":
+        return YahooQuoteSource()
+    if kind == "random":
+        return RandomWalkSource(seed=int(arg) if arg else 42)
+    if kind == "csv":
+        return CsvReplaySource(arg)
+    raise ValueError(f"Unknown quote source: {spec}")
+
+
+class QuoteService:
+    """
+    Keeps the watched universe (held positions + recently mentioned tickers)
+    fresh in the background and pushes changed quotes to subscribers.
+    latest() is a dict lookup and never blocks.
+    """
+
+    def __init__(self, source, interval: float = 5.0, mention_ttl: float = 300.0,
+                 holdings: Optional[Callable[[], Iterable[str]]] = None, timeout: float = 10.0,
+                 clock=None):
+        self.source = source
+        self.clock = clock or SYSTEM_CLOCK
+        self.interval = interval
+        self.mention_ttl = mention_ttl
+        self.holdings = holdings or (lambda: ())
+        self.executor = BlockingExecutor("quotes", max_workers=1, timeout=timeout)
+
+        self._quotes: Dict[str, Quote] = {}
+        self._mentions: Dict[str, float] = {}  # ticker -> last time it was asked for
+        self._subscribers: List[asyncio.Queue] = []
+        self._task: Optional[asyncio.Task] = None
+        self.refreshes = 0
+        self.errors = 0
+
+    def latest(self, ticker: str) -> Optional[Quote]:
+        return self._quotes.get(ticker.upper())
+
+    def mention(self, ticker: str):
+        self._mentions[ticker.upper()] = self.clock.time()
+
+    def watched(self) -> Set[str]:
+        cutoff = self.clock.time() - self.mention_ttl
+        for ticker in [t for t, seen in self._mentions.items() if seen < cutoff]:
+            del self._mentions[ticker]
+        return {t.upper() for t in self.holdings()} | set(self._mentions)
+
+    def subscribe(self, maxsize: int = 100) -> asyncio.Queue:
+        """Queue receiving lists of changed Quotes. Slow subscribers miss updates."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self._subscribers.append(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        if queue in self._subscribers:
+            self._subscribers.remove(queue)
+
+    async def get_price(self, ticker: str) -> float:
+        """Newest quote if there is one, otherwise fetch it once now."""
+        ticker = ticker.upper().strip()
+        self.mention(ticker)
+        quote = self._quotes.get(ticker)
+        if quote:
+            return quote.price
+        await self._refresh([ticker])
+        quote = self._quotes.get(ticker)
+        return quote.price if quote else FALLBACK_PRICES.get(ticker, 100.0)
+
+    async def refresh(self):
+        tickers = sorted(self.watched())
+        if tickers:
+            await self._refresh(tickers)
+
+    async def _refresh(self, tickers: List[str]):
+        try:
+            if self.source.blocking:
+                fetched = await self.executor.run(self.source.fetch, tickers)
+            else:
+                fetched = self.source.fetch(tickers)
+        except Exception as e:
+            self.errors += 1
+            print(f"[Quotes] Refresh failed ({self.source.name}): {e}")
+            return
+
+        now = self.clock.time()
+        changed = []
+        for ticker, price in fetched.items():
+            quote = self._quotes.get(ticker)
+            if quote is None or quote.price != price:
+                quote = Quote(ticker, price, now, self.source.name)
+                self._quotes[ticker] = quote
+                changed.append(quote)
+            else:
+                quote.timestamp = now
+        self.refreshes += 1
+        if changed:
+            self._publish(changed)
+
+    def _publish(self, changed: List[Quote]):
+        for queue in self._subscribers:
+            try:
+                queue.put_nowait(changed)
+            except asyncio.QueueFull:
+                pass  # Subscriber is behind; it will see the next change
+
+    async def _run(self):
+        while True:
+            await self.refresh()
+            await self.clock.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self.executor.shutdown()
+
+    def stats(self) -> Dict:
+        return {
+            "source": self.source.name,
+            "quotes": len(self._quotes),
+            "watched": len(self.watched()),
+            "subscribers": len(self._subscribers),
+            "refreshes": self.refreshes,
+            "errors": self.errors,
+        }
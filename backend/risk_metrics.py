@@ -0,0 +1,178 @@
+import math
+from collections import deque
+from typing import Deque, Dict, List, Tuple
+
+from paper_engine import PaperEngine
+
+SECONDS_PER_YEAR = 365 * 24 * 3600
+
+
+class RiskMetrics:
+    """
+    Streaming risk/performance figures for one PaperEngine. observe() is
+    called after every valuation change and updates everything in O(1):
+
+    - equity curve: last `capacity` (time, value) points in a ring buffer
+    - peak, current and max drawdown
+    - volatility + Sharpe over the session (Welford) and over the last
+      `window` returns (running sums over a sliding window)
+    - turnover: traded notional / initial cash, from the engine's trade listener
+
+    Returns are taken per fixed `period` (seconds on the engine's clock), not
+    per observation: marks arrive sub-second and irregularly, which makes an
+    annualized per-tick ratio meaningless. A period with no valuation change
+    counts as a flat return. Sharpe stays 0 until `min_periods` have closed.
+    """
+
+    def __init__(self, engine: PaperEngine, capacity: int = 1024, window: int = 100,
+                 period: float = 60.0, min_periods: int = 30):
+        self.engine = engine
+        self.clock = engine.clock
+        self.curve: Deque[Tuple[float, float]] = deque(maxlen=capacity)
+
+        value = engine.portfolio_value
+        self.start_time = self.clock.time()
+        self.last_time = self.start_time
+        self.last_value = value
+        self.peak = value
+        self.max_drawdown = 0.0
+        self.curve.append((self.start_time, value))
+        self.observations = 0
+
+        self.period = period
+        self.min_periods = min_periods
+        self._period_index = 0
+        self._period_open = value  # Value when the current period started
+
+        # Per-period returns over the session (Welford)
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        # Rolling window of returns
+        self.window = window
+        self._returns: Deque[float] = deque()
+        self._sum = 0.0
+        self._sum_sq = 0.0
+
+        self.notional = 0.0
+        self.trades = 0
+        engine.trade_listeners.append(self._on_trade)
+
+    def _on_trade(self, trade: Dict, fill_price: float):
+        self.notional += trade["qty"] * fill_price
+        self.trades += 1
+
+    def observe(self):
+        """Records the engine's current portfolio value (no-op if it did not move)."""
+        value = self.engine.portfolio_value
+        if value == self.last_value:
+            return
+        now = self.clock.time()
+        self.curve.append((now, value))
+        self.observations += 1
+
+        index = int((now - self.start_time) // self.period)
+        if index > self._period_index:
+            self._close_periods(index)
+
+        if value > self.peak:
+            self.peak = value
+        elif self.peak > 0:
+            self.max_drawdown = max(self.max_drawdown, (self.peak - value) / self.peak)
+
+        self.last_value = value
+        self.last_time = now
+
+    def _close_periods(self, index: int):
+        """Books the period that just ended (last_value is its closing value) and any flat ones after it."""
+        if self._period_open > 0:
+            self._add_return(self.last_value / self._period_open - 1)
+        flat = index - self._period_index - 1
+        if flat > 0:
+            # Welford merge of `flat` zero returns, O(1) however long the quiet spell
+            n = self.n + flat
+            self.m2 += self.mean * self.mean * self.n * flat / n
+            self.mean -= self.mean * flat / n
+            self.n = n
+            for _ in range(min(flat, self.window)):
+                self._push(0.0)
+        self._period_open = self.last_value
+        self._period_index = index
+
+    def _add_return(self, r: float):
+        self.n += 1
+        delta = r - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (r - self.mean)
+        self._push(r)
+
+    def _push(self, r: float):
+        self._returns.append(r)
+        self._sum += r
+        self._sum_sq += r * r
+        if len(self._returns) > self.window:
+            old = self._returns.popleft()
+            self._sum -= old
+            self._sum_sq -= old * old
+
+    def _annualizer(self) -> float:
+        return math.sqrt(SECONDS_PER_YEAR / self.period)
+
+    def session_volatility(self) -> float:
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else 0.0
+
+    def rolling_volatility(self) -> float:
+        k = len(self._returns)
+        if k < 2:
+            return 0.0
+        mean = self._sum / k
+        # Running sums can drift slightly negative on near-constant returns
+        return math.sqrt(max(0.0, (self._sum_sq - k * mean * mean) / (k - 1)))
+
+    def summary(self) -> Dict:
+        """Scalar metrics - O(1), safe to send with every portfolio delta."""
+        engine = self.engine
+        value = engine.portfolio_value
+        drawdown = (self.peak - value) / self.peak if self.peak > 0 and value < self.peak else 0.0
+        annualizer = self._annualizer()
+        session_vol = self.session_volatility()
+        rolling_vol = self.rolling_volatility()
+        rolling_mean = self._sum / len(self._returns) if self._returns else 0.0
+        # Too little history for a ratio worth showing
+        rolling_ready = rolling_vol > 0 and len(self._returns) >= self.min_periods
+        session_ready = session_vol > 0 and self.n >= self.min_periods
+        return {
+            "drawdown_pct": round(drawdown * 100, 2),
+            "max_drawdown_pct": round(self.max_drawdown * 100, 2),
+            "volatility": round(rolling_vol * annualizer, 4),
+            "sharpe": round(rolling_mean / rolling_vol * annualizer, 2) if rolling_ready else 0.0,
+            "session_sharpe": round(self.mean / session_vol * annualizer, 2) if session_ready else 0.0,
+            "turnover": round(self.notional / engine.initial_cash, 4),
+            "gross_exposure_pct": round(engine.positions_value / value * 100, 2) if value > 0 else 0.0,
+        }
+
+    def exposure(self) -> Dict[str, float]:
+        """Share of portfolio value in each holding (O(positions), no history)."""
+        value = self.engine.portfolio_value
+        if value <= 0:
+            return {}
+        return {t: round(p.market_value / value * 100, 2) for t, p in self.engine.positions.items()}
+
+    def equity_curve(self, points: int = 0) -> List[List[float]]:
+        """Newest `points` samples (all buffered samples if 0), oldest first."""
+        curve = list(self.curve)
+        if points > 0:
+            curve = curve[-points:]
+        return [[t, round(v, 2)] for t, v in curve]
+
+    def to_dict(self, points: int = 0) -> Dict:
+        return {
+            **self.summary(),
+            "peak_value": round(self.peak, 2),
+            "observations": self.observations,
+            "periods": self.n,
+            "period_seconds": self.period,
+            "trades": self.trades,
+            "exposure_pct": self.exposure(),
+            "equity_curve": self.equity_curve(points),
+        }
@@ -0,0 +1,335 @@
+"""
+Engine -> gateway event bus, so many gateway processes can serve the
+dashboard while one engine process trades.
+
+Every message is framed once as `<channel>\\t<encoded JSON>` and relayed
+as-is; gateways never re-encode. Channels are "main" (the /ws dashboard)
+and "agent:<name>" (per-agent streams). A gateway that notices a sequence
+gap, or has just connected, sends RESYNC and receives a PORTFOLIO_SNAPSHOT
+for every channel, the same protocol dashboard clients use.
+
+Transports:
+    unix:<path>      The engine listens on a Unix socket; gateways connect.
+                     Each gateway gets a bounded buffer, flushed in batches.
+    redis://host...  Redis pub/sub (needs the `redis` package), for gateways
+                     on other hosts.
+"""
+import os
+import time
+import asyncio
+from typing import Callable, Dict, List, Optional
+
+from broadcaster import encode_message
+
+MAIN_CHANNEL = "main"
+RESYNC = "RESYNC"
+REDIS_EVENTS = "arena:events"
+REDIS_RESYNC = "arena:resync"
+MAX_FRAME = 16 * 1024 * 1024  # Snapshots of large portfolios run to a few hundred KB
+
+
+def agent_channel(name: str) -> str:
+    return f"agent:{name}"
+
+
+def frame(channel: str, data: str) -> str:
+    return f"{channel}\t{data}"
+
+
+class _Gateway:
+    """One connected gateway: frames waiting to be written, sent in batches."""
+
+    __slots__ = ("writer", "pending", "wakeup", "task", "handler")
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.pending: List[bytes] = []
+        self.wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None  # Flushes `pending`
+        self.handler = asyncio.current_task()  # Reads RESYNC requests
+
+
+class UnixBusPublisher:
+    """
+    Engine side of the Unix socket transport. publish() encodes a frame once,
+    appends it to every gateway's buffer and never blocks; each gateway's
+    writer flushes whatever has accumulated in one write. A gateway that
+    falls queue_size frames behind is disconnected, reconnects and resyncs.
+    """
+
+    def __init__(self, path: str, snapshots: Callable[[], Dict[str, Dict]], queue_size: int = 10000):
+        self.path = path
+        self.snapshots = snapshots  # channel -> PORTFOLIO_SNAPSHOT message
+        self.queue_size = queue_size
+        self._gateways: List[_Gateway] = []
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.frames = 0
+        self.resyncs = 0
+        self.evicted = 0
+
+    def publish(self, channel: str, data: str):
+        self.frames += 1
+        line = (frame(channel, data) + "\n").encode()
+        for gateway in self._gateways:
+            self._push(gateway, line)
+
+    def _push(self, gateway: _Gateway, line: bytes):
+        if len(gateway.pending) >= self.queue_size:
+            print(f"[Bus] Dropping a gateway {self.queue_size} frames behind; it will resync")
+            self.evicted += 1
+            self._drop(gateway)
+            return
+        gateway.pending.append(line)
+        gateway.wakeup.set()
+
+    def _drop(self, gateway: _Gateway):
+        if gateway in self._gateways:
+            self._gateways.remove(gateway)
+            gateway.pending.clear()
+            gateway.writer.close()
+
+    def _send_snapshots(self, gateway: _Gateway):
+        self.resyncs += 1
+        for channel, snapshot in self.snapshots().items():
+            self._push(gateway, (frame(channel, encode_message(snapshot)) + "\n").encode())
+
+    async def _write(self, gateway: _Gateway):
+        writer = gateway.writer
+        try:
+            while True:
+                await gateway.wakeup.wait()
+                gateway.wakeup.clear()
+                batch, gateway.pending = gateway.pending, []
+                writer.write(b"".join(batch))
+                await writer.drain()
+        except ConnectionError:
+            self._drop(gateway)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        gateway = _Gateway(writer)
+        self._gateways.append(gateway)
+        gateway.task = asyncio.create_task(self._write(gateway))
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip() == RESYNC.encode():
+                    self._send_snapshots(gateway)
+        except ConnectionError:
+            pass
+        finally:
+            self._drop(gateway)
+            gateway.task.cancel()
+
+    async def start(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)  # Left over from a previous engine
+        self._server = await asyncio.start_unix_server(self._handle, self.path, limit=MAX_FRAME)
+        print(f"[Bus] Publishing on unix:{self.path}")
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            handlers = [gateway.handler for gateway in self._gateways]
+            for gateway in list(self._gateways):
+                self._drop(gateway)
+            # Closed sockets end the handlers at EOF; a cancelled handler is logged as an error
+            if handlers:
+                await asyncio.wait(handlers, timeout=2)
+            self._server = None
+
+    def stats(self) -> Dict:
+        return {
+            "transport": "unix",
+            "path": self.path,
+            "gateways": len(self._gateways),
+            "queued": sum(len(g.pending) for g in self._gateways),
+            "frames": self.frames,
+            "resyncs": self.resyncs,
+            "evicted": self.evicted,
+        }
+
+
+class RedisBusPublisher:
+    """
+    Engine side of the Redis transport. publish() only appends to a local
+    queue; a background task sends everything queued in one pipeline, so a
+    slow Redis delays the stream instead of the trading loop.
+    """
+
+    def __init__(self, url: str, snapshots: Callable[[], Dict[str, Dict]], queue_size: int = 10000):
+        self.url = url
+        self.snapshots = snapshots
+        self._queue: asyncio.Queue = asyncio.Queue(queue_size)
+        self._tasks = []
+        self._redis = None
+        self.dropped = 0
+        self.resyncs = 0
+
+    def publish(self, channel: str, data: str):
+        try:
+            self._queue.put_nowait(frame(channel, data))
+        except asyncio.QueueFull:
+            self.dropped += 1  # Gateways see the gap and resync
+
+    async def _run_sender(self):
+        while True:
+            frames = [await self._queue.get()]
+            while not self._queue.empty() and len(frames) < 500:
+                frames.append(self._queue.get_nowait())
+            try:
+                pipe = self._redis.pipeline(transaction=False)
+                for item in frames:
+                    pipe.publish(REDIS_EVENTS, item)
+                await pipe.execute()
+            except Exception as e:
+                self.dropped += len(frames)
+                print(f"[Bus] Redis publish failed: {e}")
+                await asyncio.sleep(1)
+
+    async def _run_resync(self):
+        pubsub = self._redis.pubsub()
+        await pubsub.subscribe(REDIS_RESYNC)
+        async for message in pubsub.listen():
+            if message.get("type") == "message":
+                self.resyncs += 1
+                for channel, snapshot in self.snapshots().items():
+                    self.publish(channel, encode_message(snapshot))
+
+    async def start(self):
+        self._redis = _redis_client(self.url)
+        self._tasks = [asyncio.create_task(self._run_sender()), asyncio.create_task(self._run_resync())]
+        print(f"[Bus] Publishing on {self.url}")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._redis:
+            await self._redis.close()
+
+    def stats(self) -> Dict:
+        return {"transport": "redis", "queued": self._queue.qsize(), "dropped": self.dropped, "resyncs": self.resyncs}
+
+
+def _redis_client(url: str):
+    try:
+        import redis.asyncio as aioredis
+    except ImportError:
+        raise RuntimeError("A redis:// state bus requires the redis package (pip install redis)")
+    return aioredis.from_url(url, decode_responses=True)
+
+
+def create_bus_publisher(spec: str, snapshots: Callable[[], Dict[str, Dict]]):
+    """`unix:<path>` or `redis://...`."""
+    if spec.startswith("unix:"):
+        return UnixBusPublisher(spec[len("unix:"):], snapshots)
+    if spec.startswith(("redis://", "rediss://")):
+        return RedisBusPublisher(spec, snapshots)
+    raise ValueError(f"Unknown state bus: {spec}")
+
+
+class BusSubscriber:
+    """
+    Gateway side. Calls on_frame(channel, data) for every frame, reconnecting
+    with backoff when the engine goes away. on_frame returns False on a
+    sequence gap; the subscriber then asks for a resync, at most once a second.
+    """
+
+    def __init__(self, spec: str, on_frame: Callable[[str, str], bool], max_backoff: float = 10.0):
+        if not spec.startswith(("unix:", "redis://", "rediss://")):
+            raise ValueError(f"Unknown state bus: {spec}")
+        self.spec = spec
+        self.on_frame = on_frame
+        self.max_backoff = max_backoff
+        self.connected = False
+        self.frames = 0
+        self.resyncs = 0
+        self._last_resync = 0.0
+        self._resync_scheduled = False
+        self._request: Optional[Callable] = None
+
+    def _dispatch(self, line: str):
+        channel, _, data = line.partition("\t")
+        self.frames += 1
+        if not self.on_frame(channel, data):
+            self.request_resync()
+
+    def request_resync(self, force: bool = False):
+        if not self._request:
+            return  # Reconnecting; a fresh connection always resyncs
+        wait = self._last_resync + 1.0 - time.monotonic()
+        if wait > 0 and not force:
+            if not self._resync_scheduled:
+                # Too soon after the last one - ask again once the second is up
+                self._resync_scheduled = True
+                asyncio.get_running_loop().call_later(wait, self._scheduled_resync)
+            return
+        self._last_resync = time.monotonic()
+        self.resyncs += 1
+        asyncio.create_task(self._request())
+
+    def _scheduled_resync(self):
+        self._resync_scheduled = False
+        self.request_resync()
+
+    async def _run_unix(self):
+        reader, writer = await asyncio.open_unix_connection(self.spec[len("unix:"):], limit=MAX_FRAME)
+
+        async def request():
+            writer.write(RESYNC.encode() + b"\n")
+            await writer.drain()
+
+        self._request = request
+        try:
+            self.connected = True
+            self.request_resync(force=True)
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                self._dispatch(line.decode().rstrip("\n"))
+        finally:
+            self.connected = False
+            self._request = None
+            writer.close()
+
+    async def _run_redis(self):
+        client = _redis_client(self.spec)
+        pubsub = client.pubsub()
+
+        async def request():
+            await client.publish(REDIS_RESYNC, "1")
+
+        self._request = request
+        try:
+            await pubsub.subscribe(REDIS_EVENTS)
+            self.connected = True
+            self.request_resync(force=True)
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    self._dispatch(message["data"])
+        finally:
+            self.connected = False
+            self._request = None
+            await client.close()
+
+    async def run(self):
+        backoff = 0.5
+        while True:
+            try:
+                if self.spec.startswith("unix:"):
+                    await self._run_unix()
+                else:
+                    await self._run_redis()
+                backoff = 0.5  # Clean disconnect: the engine restarted
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[Bus] {self.spec} unavailable ({e!r}); retrying in {backoff:.1f}s")
+                backoff = min(backoff * 2, self.max_backoff)
+            await asyncio.sleep(backoff)
+
+    def stats(self) -> Dict:
+        return {"bus": self.spec, "connected": self.connected, "frames": self.frames, "resyncs": self.resyncs}
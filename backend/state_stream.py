@@ -0,0 +1,126 @@
+import json
+from typing import Dict, Optional
+
+from paper_engine import PaperEngine
+from risk_metrics import RiskMetrics
+
+# The dashboard only shows the newest 20 trades, so a delta never carries more
+MAX_DELTA_TRADES = 20
+
+
+def is_resync(message: str) -> bool:
+    """True for a client's {"type": "RESYNC"} request."""
+    try:
+        request = json.loads(message)
+    except ValueError:
+        return False
+    return isinstance(request, dict) and request.get("type") == "RESYNC"
+
+
+class StateStream:
+    """
+    Versioned portfolio feed. Clients get one PORTFOLIO_SNAPSHOT on connect,
+    then PORTFOLIO_DELTA messages with only the changed scalars, positions
+    and new trades. Every delta carries the next sequence number; a client
+    that sees a gap sends {"type": "RESYNC"} and gets a fresh snapshot.
+    """
+
+    def __init__(self, engine: PaperEngine, metrics: Optional[RiskMetrics] = None):
+        self.engine = engine
+        self.metrics = metrics  # Risk figures ride along with the portfolio scalars
+        self.seq = 0
+        self._scalars: Dict = self._summary()
+        self._last_trade_id = engine.trade_seq
+
+    def _summary(self) -> Dict:
+        summary = self.engine.get_summary()
+        if self.metrics:
+            summary.update(self.metrics.summary())
+        return summary
+
+    def snapshot(self) -> Dict:
+        """Full state tagged with the current sequence number."""
+        data = self.engine.get_state()
+        if self.metrics:
+            data.update(self.metrics.summary())
+        return {
+            "type": "PORTFOLIO_SNAPSHOT",
+            "seq": self.seq,
+            "data": data
+        }
+
+    def delta(self) -> Optional[Dict]:
+        """Changes since the previous delta, or None if nothing changed."""
+        engine = self.engine
+        scalars = self._summary()
+        changed = {k: v for k, v in scalars.items() if self._scalars.get(k) != v}
+
+        dirty = engine.drain_dirty()
+        positions = {t: engine.positions[t].qty for t in dirty if t in engine.positions}
+        removed = [t for t in dirty if t not in engine.positions]
+
+        trades = []
+        if engine.trade_seq != self._last_trade_id:
+            trades = engine.trades_since(self._last_trade_id)[:MAX_DELTA_TRADES]
+            self._last_trade_id = engine.trade_seq
+
+        if not (changed or positions or removed or trades):
+            return None
+
+        self._scalars = scalars
+        self.seq += 1
+        data = {}
+        if changed:
+            data["scalars"] = changed
+        if positions:
+            data["positions"] = positions
+        if removed:
+            data["removed"] = removed
+        if trades:
+            data["trades"] = trades  # Newest first, like trade_log
+            data["last_trade_id"] = self._last_trade_id
+        return {"type": "PORTFOLIO_DELTA", "seq": self.seq, "data": data}
+
+
+class StateReplica:
+    """
+    The receiving end of a StateStream, kept by gateways: applies deltas to
+    the last snapshot (as the dashboard does) so new clients can be served
+    a current snapshot without asking the engine.
+    """
+
+    def __init__(self):
+        self.seq: Optional[int] = None
+        self.data: Optional[Dict] = None
+
+    def apply(self, message: Dict) -> bool:
+        """False if a delta does not follow the current state (resync needed)."""
+        if message["type"] == "PORTFOLIO_SNAPSHOT":
+            self.seq = message["seq"]
+            self.data = message["data"]
+            return True
+        if self.data is None:
+            return False
+        if message["seq"] <= self.seq:
+            return True  # Already covered by a newer snapshot
+        if message["seq"] != self.seq + 1:
+            return False
+        delta = message["data"]
+        data = self.data
+        data.update(delta.get("scalars", ()))
+        positions = data["positions"]
+        positions.update(delta.get("positions", ()))
+        for ticker in delta.get("removed", ()):
+            positions.pop(ticker, None)
+        trades = delta.get("trades")
+        if trades:
+            last_id = data.get("last_trade_id") or 0
+            data["trade_log"] = ([t for t in trades if t["id"] > last_id] + data["trade_log"])[:MAX_DELTA_TRADES]
+            data["last_trade_id"] = delta["last_trade_id"]
+        self.seq = message["seq"]
+        return True
+
+    def snapshot(self) -> Optional[Dict]:
+        if self.data is None:
+            return None
+        return {"type": "PORTFOLIO_SNAPSHOT", "seq": self.seq, "data": self.data}
@@ -0,0 +1,187 @@
+"""
+Parallel parameter sweep over backtest knobs.
+
+    python sweep.py --news news.csv --prices prices.csv --grid grid.json --out sweep.csv
+
+grid.json maps parameter names to candidate values; every combination is
+run once, e.g.
+
+    {"min_confidence": [0.3, 0.35, 0.5],
+     "allocation_scale": [0.5, 1.0, 2.0],
+     "neutral_confidence": [0.3, 0.45]}
+
+Engine parameters: min_confidence, allocation_scale, max_allocation.
+Fallback weights: any key of trader_agent.DEFAULT_FALLBACK_WEIGHTS. Trade
+size comes from allocation_percent, so a fallback's confidence only decides
+whether it clears min_confidence. neutral_confidence turns trades on
+no-signal headlines on or off. base_confidence and keyword_weight only
+matter when min_confidence is above base_confidence; then they set how many
+keywords a headline needs.
+
+Market data is loaded once and published into shared memory; workers map
+it read-only, so each process pays for the data once instead of per task.
+"""
+import os
+import csv
+import json
+import argparse
+import itertools
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+from backtest import Backtest, PriceHistory, load_news
+from trader_agent import DEFAULT_FALLBACK_WEIGHTS
+
+ENGINE_PARAMS = ("min_confidence", "allocation_scale", "max_allocation")
+RANK_KEYS = ("sharpe", "total_return_pct", "max_drawdown_pct", "final_value")
+
+
+class SharedMarketData:
+    """
+    Price columns and news in one shared-memory block:
+    [times f64][closes f64][news times f64][ticker ids i32][title offsets i32][titles utf-8]
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, meta: Dict):
+        self.shm = shm
+        self.meta = meta
+
+    @classmethod
+    def publish(cls, prices: PriceHistory, news: List[Tuple[float, Dict]]) -> "SharedMarketData":
+        titles = [article["title"].encode("utf-8") for _, article in news]
+        offsets = array("i", [0])
+        for title in titles:
+            offsets.append(offsets[-1] + len(title))
+
+        parts = [
+            ("times", prices.times.tobytes()),
+            ("closes", prices.closes.tobytes()),
+            ("news_times", array("d", [t for t, _ in news]).tobytes()),
+            ("ticker_ids", prices.ticker_ids.tobytes()),
+            ("title_offsets", offsets.tobytes()),
+            ("titles", b"".join(titles)),
+        ]
+        shm = shared_memory.SharedMemory(create=True, size=max(1, sum(len(b) for _, b in parts)))
+        layout, position = {}, 0
+        for name, blob in parts:
+            shm.buf[position:position + len(blob)] = blob
+            layout[name] = (position, len(blob))
+            position += len(blob)
+
+        meta = {
+            "name": shm.name,
+            "layout": layout,
+            "tickers": prices.tickers,
+            "articles": len(news),
+        }
+        return cls(shm, meta)
+
+    @staticmethod
+    def attach(meta: Dict) -> Tuple[shared_memory.SharedMemory, PriceHistory, List[Tuple[float, Dict]]]:
+        # Pool workers share the parent's resource tracker, so the parent's unlink cleans up
+        shm = shared_memory.SharedMemory(name=meta["name"])
+
+        def view(name, fmt):
+            start, size = meta["layout"][name]
+            return shm.buf[start:start + size].cast(fmt)
+
+        prices = PriceHistory(meta["tickers"], view("times", "d"), view("ticker_ids", "i"), view("closes", "d"))
+        news_times = view("news_times", "d")
+        offsets = view("title_offsets", "i")
+        start, size = meta["layout"]["titles"]
+        titles = bytes(shm.buf[start:start + size])
+        news = [
+            (news_times[i], {"title": titles[offsets[i]:offsets[i + 1]].decode("utf-8"), "source": "Backtest"})
+            for i in range(meta["articles"])
+        ]
+        return shm, prices, news
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+# Per-worker state, filled by the pool initializer
+_worker_data: Optional[Tuple] = None
+
+
+def _init_worker(meta: Dict):
+    global _worker_data
+    _worker_data = SharedMarketData.attach(meta)
+
+
+def _run_config(config: Dict) -> Dict:
+    _, prices, news = _worker_data
+    engine_kwargs = {k: config[k] for k in ENGINE_PARAMS if k in config}
+    weights = {k: config[k] for k in DEFAULT_FALLBACK_WEIGHTS if k in config}
+    backtest = Backtest(
+        prices, news, mode="fallback", seed=config.get("seed", 0),
+        fallback_weights=weights, **engine_kwargs,
+    )
+    stats = backtest.run().stats
+    return {**config, **{k: stats[k] for k in (
+        "final_value", "total_return_pct", "max_drawdown_pct", "sharpe", "trades", "win_rate", "turnover"
+    )}}
+
+
+def expand_grid(grid: Dict[str, List]) -> List[Dict]:
+    unknown = set(grid) - set(ENGINE_PARAMS) - set(DEFAULT_FALLBACK_WEIGHTS) - {"seed"}
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters: {sorted(unknown)}")
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+
+def run_sweep(prices: PriceHistory, news: List[Tuple[float, Dict]], configs: List[Dict],
+              workers: Optional[int] = None, rank_by: str = "sharpe") -> List[Dict]:
+    """Runs every config across a process pool; returns rows ranked best first."""
+    data = SharedMarketData.publish(prices, news)
+    try:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_init_worker,
+                                 initargs=(data.meta,)) as pool:
+            chunksize = max(1, len(configs) // ((workers or os.cpu_count() or 1) * 4))
+            rows = list(pool.map(_run_config, configs, chunksize=chunksize))
+    finally:
+        data.close()
+
+    # Drawdown is the one metric where smaller is better
+    rows.sort(key=lambda r: r[rank_by], reverse=rank_by != "max_drawdown_pct")
+    for rank, row in enumerate(rows, 1):
+        row["rank"] = rank
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep backtest parameters across all cores.")
+    parser.add_argument("--news", required=True)
+    parser.add_argument("--prices", required=True)
+    parser.add_argument("--grid", required=True, help="JSON file: parameter -> list of values")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--rank-by", choices=RANK_KEYS, default="sharpe")
+    parser.add_argument("--top", type=int, default=20, help="Rows to print")
+    parser.add_argument("--out", help="Write the full ranked table as CSV")
+    args = parser.parse_args()
+
+    with open(args.grid) as f:
+        configs = expand_grid(json.load(f))
+    prices = PriceHistory.load(args.prices)
+    news = load_news(args.news)
+    print(f"Sweeping {len(configs)} configurations over {len(prices)} bars and {len(news)} articles")
+
+    rows = run_sweep(prices, news, configs, workers=args.workers, rank_by=args.rank_by)
+    columns = list(rows[0].keys()) if rows else []
+    print("\t".join(columns))
+    for row in rows[:args.top]:
+        print("\t".join(str(row[c]) for c in columns))
+
+    if args.out and rows:
+        with open(args.out, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=columns)
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+# Backend modules import each other as top-level modules (`from paper_engine import ...`)
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,48 @@
+"""
+Headline normalization and the decision cache.
+"""
+import pytest
+
+from clock import SimulatedClock
+from decision_cache import DecisionCache, headline_key, normalize_headline
+
+
+@pytest.mark.parametrize("title, source", [
+    ("Apple beats estimates - Reuters", None),
+    ("Apple beats estimates | Yahoo Finance", "Bloomberg"),
+    ("Apple beats estimates - The Daily Ticker", "The Daily Ticker"),
+    ("  Apple BEATS estimates!  ", None),
+    ("Apple beats estimates - 14:05:33", None),
+])
+def test_source_and_timestamp_suffixes_are_stripped(title, source):
+    assert normalize_headline(title, source) == "apple beats estimates"
+
+
+def test_story_suffixes_stay_distinct():
+    jump = normalize_headline("Apple beats estimates - shares jump", "Reuters")
+    plunge = normalize_headline("Apple beats estimates - shares plunge", "Reuters")
+    assert jump == "apple beats estimates shares jump"
+    assert plunge == "apple beats estimates shares plunge"
+    assert headline_key("Apple beats estimates - shares jump") != headline_key("Apple beats estimates - shares plunge")
+
+
+def test_unknown_suffix_is_kept_unless_it_is_the_source():
+    assert normalize_headline("Tesla recalls cars - Electrek") == "tesla recalls cars electrek"
+    assert normalize_headline("Tesla recalls cars - Electrek", "Electrek") == "tesla recalls cars"
+
+
+def test_syndicated_copies_share_one_decision():
+    cache = DecisionCache(clock=SimulatedClock(1_700_000_000.0))
+    decision = {"action": "BUY", "ticker": "AAPL", "confidence": 0.8}
+    cache.put("Apple beats estimates - Reuters", decision, "Reuters")
+    assert cache.get("Apple beats estimates | CNBC", "CNBC") == decision
+    assert cache.get("Apple beats estimates - shares plunge", "CNBC") is None
+    assert cache.get("Apple beats estimates", namespace="contrarian") is None
+
+
+def test_entries_expire_after_the_ttl():
+    clock = SimulatedClock(1_700_000_000.0)
+    cache = DecisionCache(ttl=60, clock=clock)
+    cache.put("Apple beats estimates", {"action": "BUY"})
+    clock.advance_to(clock.time() + 61)
+    assert cache.get("Apple beats estimates") is None
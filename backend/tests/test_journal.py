@@ -0,0 +1,90 @@
+"""
+Trade journal recovery: a restart after a crash (no close(), no final
+snapshot) rebuilds every agent from its last snapshot plus the fills after it.
+"""
+import random
+
+import pytest
+
+from clock import SimulatedClock
+from journal import TradeJournal
+from order_book import OrderBook, PerShareCommission
+from paper_engine import PaperEngine
+
+TICKERS = ["AAPL", "MSFT", "NVDA", "TSLA"]
+
+
+def trade(engine, rng, n: int):
+    for _ in range(n):
+        decision = {"ticker": rng.choice(TICKERS), "action": rng.choice(("BUY", "SELL")),
+                    "confidence": 0.9, "allocation_percent": rng.uniform(0.01, 0.2), "reasoning": "test"}
+        engine.execute_trade(decision, rng.uniform(90, 110))
+
+
+def book_of(engine):
+    # portfolio_value is re-summed on restore, so it only matches to rounding
+    return engine.cash, engine.pnl, round(engine.portfolio_value, 6), engine.trade_seq, \
+        {t: (p.qty, p.avg_price, p.last_price) for t, p in engine.positions.items()}
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "journal.db")
+
+
+def test_crash_recovery_replays_fills_after_the_last_snapshot(path):
+    clock = SimulatedClock(1_700_000_000.0)
+    journal = TradeJournal(path, snapshot_every=50)
+    engine = PaperEngine(clock=clock)
+    assert journal.attach("a", engine) == 0
+    trade(engine, random.Random(1), 400)
+    assert engine.trade_seq > 120 and engine.trade_seq % 50
+    assert journal.flush()
+    # Crash: no close(), so the fills after the last periodic snapshot exist only as rows
+
+    restored = PaperEngine(clock=clock)
+    replayed = TradeJournal(path, snapshot_every=50).attach("a", restored)
+    assert 0 < replayed < 50
+    assert book_of(restored) == book_of(engine)
+    assert list(restored.trade_log) == list(engine.trade_log)
+
+
+def test_order_book_fills_replay_with_their_fees(path):
+    clock = SimulatedClock(1_700_000_000.0)
+    journal = TradeJournal(path)
+    engine = PaperEngine(clock=clock)
+    journal.attach("a", engine)
+    book = OrderBook(commission=PerShareCommission(0.013, minimum=0.37), clock=clock)
+    book.register("a", engine)
+    rng = random.Random(2)
+    for _ in range(60):
+        book.submit("a", rng.choice(TICKERS), rng.choice(("BUY", "SELL")), rng.randint(1, 40),
+                    price=rng.uniform(90, 110))
+    assert journal.flush()
+
+    restored = PaperEngine(clock=clock)
+    assert TradeJournal(path).attach("a", restored) == engine.trade_seq
+    assert book_of(restored) == book_of(engine)
+    assert all(t["fee"] >= 0.37 for t in restored.trade_log)
+
+
+def test_agents_recover_independently_and_history_pages(path):
+    clock = SimulatedClock(1_700_000_000.0)
+    journal = TradeJournal(path)
+    engines = {name: PaperEngine(clock=clock) for name in ("a", "b")}
+    for seed, (name, engine) in enumerate(engines.items()):
+        journal.attach(name, engine)
+        trade(engine, random.Random(seed), 100)
+    journal.close()
+
+    reopened = TradeJournal(path)
+    for name, engine in engines.items():
+        restored = PaperEngine(clock=clock)
+        assert reopened.attach(name, restored) == 0  # close() left a snapshot
+        assert book_of(restored) == book_of(engine)
+
+    first = reopened.trades("a", limit=30)
+    second = reopened.trades("a", before=first["next_before"], limit=30)
+    ids = [t["id"] for t in first["trades"] + second["trades"]]
+    assert ids == list(range(engines["a"].trade_seq, engines["a"].trade_seq - 60, -1))
+    reopened.close()
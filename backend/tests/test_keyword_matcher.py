@@ -0,0 +1,40 @@
+"""
+Keyword fallback matching: whole words, inflections and batch offsets.
+"""
+from benchmarks.fakes import headlines
+from keyword_matcher import KeywordMatcher
+from trader_agent import BEARISH_KEYWORDS, BULLISH_KEYWORDS, TICKER_KEYWORDS
+
+MATCHER = KeywordMatcher(BULLISH_KEYWORDS, BEARISH_KEYWORDS, TICKER_KEYWORDS)
+
+
+def summary(match):
+    return match.bullish, match.bearish, match.tickers
+
+
+def test_whole_words_and_inflections():
+    match = MATCHER.match("Metal prices surged as Apple rallies; S&P drops")
+    assert match.symbols() == ["AAPL", "SPY"]  # "metal" is not META
+    assert (match.bullish, match.bearish) == (2, 1)
+
+
+def test_repeated_keyword_counts_once():
+    match = MATCHER.match("Tesla surges, surges again")
+    assert match.bullish == 1 and match.primary_ticker == "TSLA"
+
+
+def test_batch_matches_each_headline_alone():
+    titles = headlines(500, seed=3)
+    assert [summary(m) for m in MATCHER.match_batch(titles)] == [summary(MATCHER.match(t)) for t in titles]
+
+
+def test_offsets_survive_headlines_that_grow_when_lowercased():
+    # "İ".lower() is two code points, so each of these headlines gets longer
+    titles = ["İİİİ Apple surges", "İstanbul: Tesla plunges", "Nvidia beats"]
+    matches = MATCHER.match_batch(titles)
+    assert [m.symbols() for m in matches] == [["AAPL"], ["TSLA"], ["NVDA"]]
+    for title, match in zip(titles, matches):
+        symbol, start, end = match.tickers[0]
+        assert title.lower()[start:end] in ("apple", "tesla", "nvidia")
+    assert (matches[1].bullish, matches[1].bearish) == (0, 1)
+    assert matches[2].bullish == 1
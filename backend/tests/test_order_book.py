@@ -0,0 +1,250 @@
+"""
+Order book matching, fills and bookkeeping. Offline and deterministic:
+
+    cd backend
+    python -m pytest tests
+"""
+import random
+
+import pytest
+
+from clock import SimulatedClock
+from order_book import (
+    CANCELLED, EXPIRED, FILLED, OPEN, REJECTED,
+    FixedBpsSlippage, OrderBook, PerShareCommission,
+)
+from paper_engine import PaperEngine
+
+
+def make_book(cash: float = 10_000.0, **kwargs):
+    clock = SimulatedClock(1_700_000_000.0)
+    book = OrderBook(clock=clock, **kwargs)
+    engine = PaperEngine(cash, clock=clock)
+    book.register("a", engine)
+    return book, engine, clock
+
+
+def without_order_fields(trades):
+    return [{k: v for k, v in t.items() if k not in ("fee", "order_id")} for t in trades]
+
+
+def test_market_orders_match_execute_trade():
+    """With no costs, routing decisions through the book books exactly what execute_trade does."""
+    clock = SimulatedClock(1_700_000_000.0)
+    direct = PaperEngine(clock=clock)
+    routed = PaperEngine(clock=clock)
+    book = OrderBook(clock=clock)
+    book.register("routed", routed)
+
+    rng = random.Random(7)
+    tickers = ["AAPL", "MSFT", "NVDA", "TSLA"]
+    for _ in range(2000):
+        ticker = rng.choice(tickers)
+        price = rng.uniform(50, 150)
+        decision = {"ticker": ticker, "action": rng.choice(("BUY", "SELL", "HOLD")),
+                    "confidence": rng.uniform(0.2, 1.0), "allocation_percent": rng.uniform(0.01, 0.3),
+                    "reasoning": "parity"}
+        direct.execute_trade(decision, price)
+        book.submit_decision("routed", decision, ticker, price)
+        clock.advance_to(clock.time() + 1)
+
+    assert direct.trade_seq == routed.trade_seq > 100
+    assert routed.cash == direct.cash
+    assert routed.pnl == direct.pnl
+    assert routed.portfolio_value == direct.portfolio_value
+    assert {t: (p.qty, p.avg_price) for t, p in routed.positions.items()} == \
+        {t: (p.qty, p.avg_price) for t, p in direct.positions.items()}
+    assert without_order_fields(routed.trade_log) == list(direct.trade_log)
+    assert not book.orders
+
+
+def test_market_order_without_quote_fills_on_next_tick():
+    book, engine, _ = make_book()
+    order = book.submit("a", "aapl", "BUY", 10)
+    assert order.status == OPEN and book.tickers() == {"AAPL"}
+
+    fills = book.on_price("AAPL", 100.0)
+    assert [(f["qty"], f["price"]) for f in fills] == [(10, 100.0)]
+    assert order.status == FILLED and engine.positions["AAPL"].qty == 10
+    assert book.tickers() == set()
+
+
+def test_limit_buy_rests_until_crossed_and_never_fills_above_its_limit():
+    book, engine, _ = make_book(slippage=FixedBpsSlippage(50))
+    order = book.submit("a", "AAPL", "BUY", 10, "limit", limit_price=95.0, price=100.0)
+    assert order.status == OPEN and not engine.positions
+
+    assert book.on_price("AAPL", 96.0) == []
+    fills = book.on_price("AAPL", 94.9)
+    # 50 bps of slippage would push the buy above the limit; it is capped there
+    assert fills[0]["price"] == 95.0
+    assert order.status == FILLED
+
+
+def test_limit_takes_a_better_price():
+    book, _, _ = make_book()
+    order = book.submit("a", "AAPL", "BUY", 10, "limit", limit_price=95.0)
+    fills = book.on_price("AAPL", 90.0)
+    assert fills[0]["price"] == 90.0 and order.status == FILLED
+
+
+def test_stops_trigger_in_the_right_direction():
+    book, engine, _ = make_book()
+    buy_stop = book.submit("a", "AAPL", "BUY", 10, "stop", stop_price=105.0)
+    assert book.on_price("AAPL", 104.0) == []
+    assert book.on_price("AAPL", 105.0)[0]["qty"] == 10
+    assert buy_stop.status == FILLED
+
+    sell_stop = book.submit("a", "AAPL", "SELL", 10, "stop", stop_price=95.0)
+    assert book.on_price("AAPL", 96.0) == []
+    assert book.on_price("AAPL", 94.0)[0]["price"] == 94.0
+    assert sell_stop.status == FILLED and "AAPL" not in engine.positions
+
+
+def test_orders_crossed_by_one_tick_fill_in_submission_order():
+    book, _, _ = make_book()
+    first = book.submit("a", "AAPL", "BUY", 1, "limit", limit_price=90.0)
+    second = book.submit("a", "AAPL", "BUY", 1, "limit", limit_price=99.0)
+    third = book.submit("a", "AAPL", "BUY", 1, "stop", stop_price=80.0)
+    fills = book.on_price("AAPL", 85.0)
+    assert [f["order_id"] for f in fills] == [first.id, second.id, third.id]
+
+
+def test_max_fill_qty_splits_an_order_across_ticks():
+    book, engine, _ = make_book(max_fill_qty=60)
+    order = book.submit("a", "AAPL", "BUY", 100, "limit", limit_price=95.0)
+
+    assert book.on_price("AAPL", 94.0)[0]["qty"] == 60
+    assert order.status == OPEN and order.filled == 60
+    assert book.on_price("AAPL", 96.0) == []  # The rest still respects the limit
+    assert book.on_price("AAPL", 94.5)[0]["qty"] == 40
+    assert order.status == FILLED and engine.positions["AAPL"].qty == 100
+
+
+def test_sell_larger_than_position_fills_what_is_held():
+    book, engine, _ = make_book()
+    engine.book_fill("BUY", "AAPL", 30, 100.0)
+    order = book.submit("a", "AAPL", "SELL", 50, price=101.0)
+    assert order.filled == 30 and order.status == CANCELLED
+    assert "AAPL" not in engine.positions
+
+
+def test_unaffordable_buy_is_rejected_without_a_fill():
+    book, engine, _ = make_book(cash=1_000.0)
+    order = book.submit("a", "AAPL", "BUY", 11, price=100.0)
+    assert order.status == REJECTED
+    assert engine.cash == 1_000.0 and engine.trade_seq == 0
+
+    sell = book.submit("a", "MSFT", "SELL", 1, price=100.0)
+    assert sell.status == REJECTED
+
+
+def test_commission_and_slippage_are_charged():
+    book, engine, _ = make_book(slippage=FixedBpsSlippage(10), commission=PerShareCommission(0.01, minimum=1.0))
+    book.submit("a", "AAPL", "BUY", 50, price=100.0)
+    price = 100.0 * 1.001
+    assert engine.cash == pytest.approx(10_000.0 - 50 * price - 1.0)
+    trade = engine.trade_log[0]
+    assert trade["fee"] == 1.0 and trade["price"] == round(price, 2) and trade["order_id"] == 1
+    assert book.stats()["fees"] == 1.0
+
+
+def test_commission_goes_into_cost_basis_not_the_mark():
+    book, engine, _ = make_book(commission=PerShareCommission(0.01, minimum=1.0))
+    book.submit("a", "AAPL", "BUY", 50, price=100.0)
+    position = engine.positions["AAPL"]
+    assert position.last_price == 100.0 and position.avg_price == pytest.approx(100.02)
+    assert engine.portfolio_value == pytest.approx(10_000.0 - 1.0)
+
+    book.submit("a", "AAPL", "SELL", 50, price=100.0)
+    assert engine.pnl == pytest.approx(-2.0) and engine.cash == pytest.approx(10_000.0 - 2.0)
+
+
+def test_cancel_removes_the_order_and_checks_ownership():
+    book, engine, _ = make_book()
+    other = PaperEngine(clock=book.clock)
+    book.register("b", other)
+    order = book.submit("a", "AAPL", "BUY", 10, "limit", limit_price=95.0)
+
+    assert not book.cancel(order.id, agent="b")
+    assert book.cancel(order.id, agent="a")
+    assert not book.cancel(order.id)
+    assert order.status == CANCELLED and not book.orders and book.tickers() == set()
+    assert book.on_price("AAPL", 90.0) == []
+    assert not engine.positions
+
+
+def test_lazy_cancels_are_compacted_and_survivors_still_fill():
+    book, engine, _ = make_book(cash=1e9)
+    orders = [book.submit("a", "AAPL", "BUY", 1, "limit", limit_price=50.0 + i % 40) for i in range(5000)]
+    for order in orders[:3000]:
+        book.cancel(order.id)
+
+    stats = book.stats()
+    assert stats["open"] == 2000
+    assert stats["stale_entries"] < 1024  # Rebuilt once dead entries outnumbered live ones
+    fills = book.on_price("AAPL", 10.0)
+    assert len(fills) == 2000 and {f["order_id"] for f in fills} == {o.id for o in orders[3000:]}
+    assert engine.positions["AAPL"].qty == 2000
+    assert book.tickers() == set() and not book.orders
+
+
+def test_orders_expire_after_their_ttl():
+    book, engine, clock = make_book()
+    order = book.submit("a", "AAPL", "BUY", 10, "limit", limit_price=95.0, ttl=60)
+    clock.advance_to(clock.time() + 30)
+    assert book.on_prices({"AAPL": 96.0}) == [] and order.status == OPEN
+    clock.advance_to(clock.time() + 31)
+    assert book.on_prices({"AAPL": 90.0}) == []
+    assert order.status == EXPIRED and not engine.positions
+
+
+def test_bracket_places_exits_and_one_cancels_the_other():
+    book, engine, _ = make_book(max_fill_qty=60)
+    entry = book.submit("a", "AAPL", "BUY", 100, "limit", limit_price=95.0,
+                        take_profit=105.0, stop_loss=90.0, price=100.0)
+    book.on_price("AAPL", 94.0)
+    assert book.open_orders("a") == [entry]  # Exits wait for the entry to finish
+    book.on_price("AAPL", 94.0)
+    assert entry.status == FILLED
+
+    exits = book.open_orders("a")
+    take_profit = next(o for o in exits if o.type == "limit")
+    stop_loss = take_profit.oco
+    assert stop_loss.type == "stop" and stop_loss.oco is take_profit
+    assert (take_profit.qty, take_profit.limit_price, stop_loss.stop_price) == (100, 105.0, 90.0)
+    assert take_profit.parent == stop_loss.parent == entry.id
+
+    # A partial take-profit shrinks the stop to what is still held
+    assert book.on_price("AAPL", 106.0)[0]["qty"] == 60
+    assert stop_loss.remaining == 40 and engine.positions["AAPL"].qty == 40
+    assert book.on_price("AAPL", 89.0)[0]["qty"] == 40
+    assert stop_loss.status == FILLED and take_profit.status == CANCELLED
+    assert "AAPL" not in engine.positions and not book.orders
+
+
+def test_cancelled_bracket_entry_protects_its_partial_fill():
+    book, _, _ = make_book(max_fill_qty=30)
+    entry = book.submit("a", "AAPL", "BUY", 100, take_profit=110.0, stop_loss=90.0)
+    book.on_price("AAPL", 100.0)
+    assert book.cancel(entry.id)
+    exits = book.open_orders("a")
+    assert sorted(o.type for o in exits) == ["limit", "stop"]
+    assert all(o.qty == 30 for o in exits)
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"side": "HOLD"},
+    {"order_type": "trailing"},
+    {"qty": 0},
+    {"order_type": "limit"},
+    {"order_type": "stop"},
+    {"side": "SELL", "take_profit": 110.0},
+])
+def test_invalid_orders_are_refused(kwargs):
+    book, _, _ = make_book()
+    args = {"side": "BUY", "qty": 1, "order_type": "market", **kwargs}
+    with pytest.raises(ValueError):
+        book.submit("a", "AAPL", args.pop("side"), args.pop("qty"), args.pop("order_type"), **args)
+    with pytest.raises(ValueError):
+        book.submit("nobody", "AAPL", "BUY", 1)
@@ -0,0 +1,107 @@
+"""
+ArticlePipeline ordering: trades execute in ingest order, and sequenced
+portfolio deltas reach clients in sequence order, whichever stage produced them.
+"""
+import asyncio
+import random
+
+from clock import SimulatedClock
+from paper_engine import PaperEngine
+from pipeline import ArticlePipeline
+from state_stream import StateStream
+
+TICKERS = ["AAPL", "MSFT", "NVDA"]
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def make_stream():
+    engine = PaperEngine(clock=SimulatedClock(1_700_000_000.0))
+    return engine, StateStream(engine)
+
+
+def test_deltas_reach_clients_in_seq_order():
+    engine, stream = make_stream()
+    rng = random.Random(11)
+    received = []
+
+    async def analyze(articles):
+        await asyncio.sleep(rng.uniform(0, 0.002))  # LLM calls finish out of order
+        return [{"action": a["action"], "ticker": a["ticker"], "confidence": 0.9,
+                 "allocation_percent": 0.05, "reasoning": a["title"]} for a in articles]
+
+    async def price(article, decision):
+        await asyncio.sleep(rng.uniform(0, 0.002))
+        return 100.0
+
+    def execute(article, decision, live_price):
+        engine.execute_trade(decision, live_price)
+        delta = stream.delta()
+        return [delta] if delta else []
+
+    async def broadcast(message):
+        await asyncio.sleep(rng.uniform(0, 0.0005))  # Slow clients back the queue up
+        received.append(message)
+
+    async def main():
+        pipeline = ArticlePipeline(analyze, price, execute, broadcast, concurrency=4, batch_size=3)
+        pipeline.start()
+
+        async def quotes():
+            # Revaluations published from outside the pipeline, as main's quote listener does
+            for _ in range(300):
+                for ticker in list(engine.positions):
+                    engine.mark(ticker, rng.uniform(90, 110))
+                delta = stream.delta()
+                if delta:
+                    pipeline.publish([delta])
+                await asyncio.sleep(rng.uniform(0, 0.001))
+
+        quote_task = asyncio.create_task(quotes())
+        for i in range(60):
+            await pipeline.submit({"title": f"headline {i}", "ticker": TICKERS[i % 3],
+                                   "action": "BUY" if i % 4 else "SELL"})
+        await quote_task
+        # A last article: its marker queues behind everything published so far
+        await pipeline.submit({"title": "last", "ticker": "SPY", "action": "HOLD"})
+        await pipeline.join()
+        await pipeline.stop()
+
+    run(main())
+    seqs = [m["seq"] for m in received if m.get("type") == "PORTFOLIO_DELTA"]
+    assert len(seqs) > 60
+    assert seqs == list(range(1, stream.seq + 1))
+    alerts = [m["data"]["title"] for m in received if m.get("type") == "NEWS_ALERT"]
+    assert alerts == [f"headline {i}" for i in range(60)] + ["last"]
+
+
+def test_trades_execute_in_ingest_order():
+    executed = []
+
+    async def analyze(articles):
+        await asyncio.sleep(0.001 * (len(articles) % 3))
+        return list(articles)
+
+    async def price(article, decision):
+        await asyncio.sleep(0.003 if article["n"] % 2 else 0)
+        return 1.0
+
+    def execute(article, decision, live_price):
+        executed.append(article["n"])
+        return []
+
+    async def broadcast(message):
+        pass
+
+    async def main():
+        pipeline = ArticlePipeline(analyze, price, execute, broadcast, concurrency=4, batch_size=2)
+        pipeline.start()
+        for n in range(40):
+            await pipeline.submit({"n": n})
+        await pipeline.join()
+        await pipeline.stop()
+
+    run(main())
+    assert executed == list(range(40))
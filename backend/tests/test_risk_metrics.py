@@ -0,0 +1,100 @@
+"""
+Streaming risk metrics against a batch computation over fixed periods.
+"""
+import math
+import random
+import statistics
+
+import pytest
+
+from clock import SimulatedClock
+from paper_engine import PaperEngine
+from risk_metrics import SECONDS_PER_YEAR, RiskMetrics
+
+START = 1_700_000_000.0
+
+
+def make_metrics(**kwargs):
+    clock = SimulatedClock(START)
+    engine = PaperEngine(10_000.0, clock=clock)
+    return RiskMetrics(engine, **kwargs), engine, clock
+
+
+def set_value(metrics, engine, clock, at: float, value: float):
+    clock.advance_to(at)
+    engine.portfolio_value = value
+    metrics.observe()
+
+
+def batch_sharpe(closes, period=60.0):
+    """Annualized Sharpe of the returns between consecutive period closes."""
+    returns = [b / a - 1 for a, b in zip(closes, closes[1:])]
+    return statistics.mean(returns) / statistics.stdev(returns) * math.sqrt(SECONDS_PER_YEAR / period)
+
+
+def minute_closes(n: int, seed: int):
+    rng = random.Random(seed)
+    closes = [10_000.0]
+    for _ in range(n):
+        closes.append(closes[-1] * (1 + rng.gauss(0.0002, 0.002)))
+    return closes
+
+
+def feed(metrics, engine, clock, closes, ticks_per_minute: int, seed: int = 0):
+    """Irregular ticks inside each minute; the last one lands on that minute's close."""
+    rng = random.Random(seed)
+    for minute, close in enumerate(closes[1:]):
+        base = START + minute * 60
+        times = sorted(rng.uniform(0, 59) for _ in range(ticks_per_minute - 1)) + [59.5]
+        for i, offset in enumerate(times):
+            noise = 1 + rng.uniform(-0.01, 0.01) if i < len(times) - 1 else 1
+            set_value(metrics, engine, clock, base + offset, close * noise)
+    # Anything in the next period closes the last full minute
+    set_value(metrics, engine, clock, START + (len(closes) - 1) * 60, closes[-1] + 1)
+
+
+def test_sharpe_comes_from_per_minute_returns():
+    closes = minute_closes(200, seed=1)
+    metrics, engine, clock = make_metrics(window=100)
+    feed(metrics, engine, clock, closes, ticks_per_minute=5)
+
+    assert metrics.n == 200
+    summary = metrics.summary()
+    assert summary["session_sharpe"] == pytest.approx(batch_sharpe(closes), abs=0.01)
+    assert summary["sharpe"] == pytest.approx(batch_sharpe(closes[-101:]), abs=0.01)
+
+
+def test_tick_rate_does_not_change_sharpe():
+    closes = minute_closes(120, seed=2)
+    sparse, engine, clock = make_metrics()
+    feed(sparse, engine, clock, closes, ticks_per_minute=1)
+    dense, engine, clock = make_metrics()
+    feed(dense, engine, clock, closes, ticks_per_minute=40, seed=5)
+
+    assert dense.observations > 30 * sparse.observations
+    assert dense.summary()["session_sharpe"] == pytest.approx(sparse.summary()["session_sharpe"], abs=0.01)
+    assert dense.summary()["sharpe"] == pytest.approx(sparse.summary()["sharpe"], abs=0.01)
+
+
+def test_quiet_periods_count_as_flat_returns():
+    metrics, engine, clock = make_metrics(min_periods=2, window=5)
+    set_value(metrics, engine, clock, START + 30, 10_100.0)
+    set_value(metrics, engine, clock, START + 90, 10_200.0)
+    # Ten quiet minutes, then a move
+    set_value(metrics, engine, clock, START + 12 * 60 + 5, 10_000.0)
+
+    closes = [10_000.0, 10_100.0, 10_200.0] + [10_200.0] * 10
+    returns = [b / a - 1 for a, b in zip(closes, closes[1:])]
+    assert metrics.n == len(returns) == 12
+    assert metrics.mean == pytest.approx(statistics.mean(returns))
+    assert metrics.session_volatility() == pytest.approx(statistics.stdev(returns))
+    assert metrics.rolling_volatility() == 0.0  # The 5-period window holds only the flat minutes
+
+
+def test_sharpe_waits_for_min_periods():
+    metrics, engine, clock = make_metrics(min_periods=30)
+    for minute in range(10):
+        set_value(metrics, engine, clock, START + minute * 60 + 1, 10_000.0 + minute * 10)
+    summary = metrics.summary()
+    assert summary["sharpe"] == 0.0 and summary["session_sharpe"] == 0.0
+    assert metrics.n == 9
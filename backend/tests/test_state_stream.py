@@ -0,0 +1,93 @@
+"""
+StateStream deltas and the StateReplica gateways keep: a replica that follows
+the stream matches a fresh snapshot, and a gap is repaired by a resync.
+"""
+import json
+import random
+
+from clock import SimulatedClock
+from paper_engine import PaperEngine
+from risk_metrics import RiskMetrics
+from state_stream import StateReplica, StateStream, is_resync
+
+TICKERS = ["AAPL", "MSFT", "NVDA", "TSLA"]
+
+
+def make_stream():
+    clock = SimulatedClock(1_700_000_000.0)
+    engine = PaperEngine(clock=clock)
+    metrics = RiskMetrics(engine)
+    return engine, metrics, StateStream(engine, metrics), clock
+
+
+def step(engine, metrics, clock, rng):
+    """One trade or revaluation, then the metrics observation the arena makes."""
+    clock.advance_to(clock.time() + rng.uniform(1, 30))
+    ticker = rng.choice(TICKERS)
+    if rng.random() < 0.5:
+        engine.execute_trade({"ticker": ticker, "action": rng.choice(("BUY", "SELL")), "confidence": 0.9,
+                              "allocation_percent": 0.1, "reasoning": "test"}, rng.uniform(90, 110))
+    elif ticker in engine.positions:
+        engine.mark(ticker, rng.uniform(90, 110))
+    metrics.observe()
+
+
+def wire(message):
+    return json.loads(json.dumps(message))
+
+
+def test_replica_following_deltas_matches_a_fresh_snapshot():
+    engine, metrics, stream, clock = make_stream()
+    replica = StateReplica()
+    assert replica.apply(wire(stream.snapshot()))
+
+    rng = random.Random(3)
+    for _ in range(500):
+        step(engine, metrics, clock, rng)
+        delta = stream.delta()
+        if delta:
+            assert replica.apply(wire(delta))
+
+    assert stream.seq > 100 and replica.seq == stream.seq
+    expected = wire(stream.snapshot())["data"]
+    data = replica.snapshot()["data"]
+    assert data["positions"] == expected["positions"]
+    assert data["trade_log"] == expected["trade_log"][:len(data["trade_log"])]
+    scalars = {**engine.get_summary(), **metrics.summary()}
+    assert {k: data[k] for k in scalars} == {k: expected[k] for k in scalars}
+
+
+def test_gap_is_refused_until_a_resync_snapshot():
+    engine, metrics, stream, clock = make_stream()
+    replica = StateReplica()
+    assert not replica.apply(wire({"type": "PORTFOLIO_DELTA", "seq": 1, "data": {}}))  # Nothing to apply to yet
+    replica.apply(wire(stream.snapshot()))
+
+    rng = random.Random(5)
+    deltas = []
+    while len(deltas) < 3:
+        step(engine, metrics, clock, rng)
+        delta = stream.delta()
+        if delta:
+            deltas.append(wire(delta))
+
+    assert replica.apply(deltas[0])
+    assert not replica.apply(deltas[2])  # deltas[1] was lost
+    assert replica.seq == deltas[0]["seq"]
+
+    # The client's RESYNC is answered with a snapshot; older deltas are then no-ops
+    assert is_resync(json.dumps({"type": "RESYNC"}))
+    assert replica.apply(wire(stream.snapshot()))
+    assert replica.apply(deltas[1]) and replica.seq == stream.seq
+    delta = None
+    while delta is None:
+        step(engine, metrics, clock, rng)
+        delta = stream.delta()
+    assert replica.apply(wire(delta)) and replica.seq == stream.seq
+
+
+def test_only_resync_requests_are_recognized():
+    assert is_resync('{"type": "RESYNC"}')
+    assert not is_resync('{"type": "PING", "note": "RESYNC"}')
+    assert not is_resync('"RESYNC"')
+    assert not is_resync("not json")
@@ -0,0 +1,59 @@
+"""
+Batched analysis against a local fake model; no Gemini key or network needed.
+"""
+import time
+
+from benchmarks.fakes import FakeGeminiModel, articles
+from clock import SimulatedClock
+from decision_cache import DecisionCache
+from trader_agent import TraderAgent
+
+
+class FlakyModel(FakeGeminiModel):
+    """Fails the first `failures` calls, then answers like FakeGeminiModel."""
+
+    def __init__(self, failures: int):
+        super().__init__()
+        self.failures = failures
+
+    def generate_content(self, prompt: str):
+        if self.failures:
+            self.failures -= 1
+            self.calls += 1
+            raise RuntimeError("503")
+        return super().generate_content(prompt)
+
+
+def make_agent(model, **kwargs) -> TraderAgent:
+    clock = SimulatedClock(1_700_000_000.0)
+    agent = TraderAgent(model=model, cache=DecisionCache(clock=clock), clock=clock, **kwargs)
+    agent.rate_limit_delay = 0.01
+    return agent
+
+
+def test_every_chunk_of_a_batch_reaches_the_model():
+    model = FakeGeminiModel()
+    agent = make_agent(model, max_batch=2)
+    decisions = agent.analyze_batch(articles(5))
+    assert model.calls == 3
+    assert all(d["reasoning"] == "Benchmark decision" for d in decisions)
+
+
+def test_retry_waits_out_the_rate_limit():
+    model = FlakyModel(failures=1)
+    agent = make_agent(model, max_batch=10, batch_retries=1)
+    agent.rate_limit_delay = 0.05
+    start = time.perf_counter()
+    decisions = agent.analyze_batch(articles(3))
+    assert time.perf_counter() - start >= 0.05
+    assert model.calls == 2
+    assert all(d["reasoning"] == "Benchmark decision" for d in decisions)
+
+
+def test_a_rate_limited_call_falls_back_without_calling_the_model():
+    model = FakeGeminiModel()
+    agent = make_agent(model)
+    agent.last_api_call = agent.clock.time()
+    decisions = agent.analyze_batch(articles(3))
+    assert model.calls == 0
+    assert len(decisions) == 3 and all(d["reasoning"] != "Benchmark decision" for d in decisions)
@@ -2,18 +2,34 @@ import os
 import json
 import time
 import random
-import google.generativeai as genai
-from typing import Dict, Optional
-from dotenv import load_dotenv
+import asyncio
+import threading
+from typing import Dict, List, Optional
+from executor import BlockingExecutor
+from decision_cache import DecisionCache
+from clock import SYSTEM_CLOCK
+from instrumentation import FALLBACK_DECISIONS, LLM_ERRORS, LLM_LATENCY
+from keyword_matcher import KeywordMatcher, HeadlineMatch
 
-load_dotenv()
+_genai = None
+_genai_lock = threading.Lock()
 
-# Configure Gemini
-api_key = os.getenv("GEMINI_API_KEY")
-if not api_key:
-    print("WARNING: GEMINI_API_KEY not found in environment variables.")
 
-genai.configure(api_key=api_key)
+def _gemini():
+    """Imports and configures the Gemini SDK on first use; it is slow to import."""
+    global _genai
+    with _genai_lock:
+        if _genai is None:
+            import google.generativeai as genai
+            from dotenv import load_dotenv
+
+            load_dotenv()
+            api_key = os.getenv("GEMINI_API_KEY")
+            if not api_key:
+                print("WARNING: GEMINI_API_KEY not found in environment variables.")
+            genai.configure(api_key=api_key)
+            _genai = genai
+    return _genai
 
 # Keywords for simple sentiment analysis fallback
 BULLISH_KEYWORDS = ['surge', 'soar', 'rally', 'gain', 'profit', 'beat', 'growth', 'record', 'bullish', 'buy', 'upgrade', 'positive', 'strong', 'rise', 'jump', 'boom', 'breakthrough', 'success']
@@ -28,39 +44,97 @@ TICKER_KEYWORDS = {
     'oil': 'USO', 'gold': 'GLD', 'sp500': 'SPY', 's&p': 'SPY'
 }
 
+# Whole-word matching (so "metal" is not META), inflections included (rallies, surged, dropped)
+KEYWORD_MATCHER = KeywordMatcher(BULLISH_KEYWORDS, BEARISH_KEYWORDS, TICKER_KEYWORDS)
+
+# Confidence model for the keyword fallback (tunable with sweep.py)
+DEFAULT_FALLBACK_WEIGHTS = {
+    'base_confidence': 0.5,     # Confidence with a one-sided signal and no extra keywords
+    'keyword_weight': 0.1,      # Added per matching keyword
+    'max_confidence': 0.9,
+    'neutral_confidence': 0.45, # Speculative trade when bullish == bearish
+}
+
+VALID_ACTIONS = ('BUY', 'SELL', 'HOLD')
+
+def _clean_json_text(text: str) -> str:
+    """Strips markdown code fences Gemini likes to wrap JSON in."""
+    text = text.strip()
+    if '```' in text:
+        text = text.split('```')[1]
+        if text.startswith('json'):
+            text = text[4:]
+    return text.strip()
+
+def _is_valid_decision(decision) -> bool:
+    if not isinstance(decision, dict):
+        return False
+    if decision.get('action') not in VALID_ACTIONS:
+        return False
+    if not isinstance(decision.get('ticker'), str) or not decision['ticker'].strip():
+        return False
+    return isinstance(decision.get('confidence'), (int, float))
+
 class TraderAgent:
-    def __init__(self, model_name="gemini-2.0-flash"):
-        self.model = genai.GenerativeModel(model_name)
+    def __init__(self, model_name="gemini-2.0-flash", timeout=15.0, max_batch=10, batch_retries=1,
+                 cache: Optional[DecisionCache] = None, persona: Optional[str] = None,
+                 clock=None, seed: Optional[int] = None, fallback_weights: Optional[Dict] = None,
+                 model=None):
+        # Anything with generate_content(prompt).text works (benchmarks pass a local fake).
+        # Without one, the Gemini model is created on the first LLM call.
+        self.model_name = model_name
+        self._model = model
+        self.fallback_weights = {**DEFAULT_FALLBACK_WEIGHTS, **(fallback_weights or {})}
+        self.clock = clock or SYSTEM_CLOCK
+        self.rng = random.Random(seed)  # Seeded for reproducible fallback decisions in backtests
+        # Optional trading style prepended to every prompt (arena agents)
+        self.persona = persona
+        self.cache_namespace = persona or ""
+        # Repeated stories (synthetic templates, syndicated headlines) skip the LLM
+        self.cache = cache or DecisionCache(path=os.getenv("DECISION_CACHE_PATH"), clock=self.clock)
         self.last_api_call = 0
         self.rate_limit_delay = 3  # 3 seconds between API calls
+        self.max_batch = max_batch  # Headlines packed into one prompt
+        self.batch_retries = batch_retries  # Extra calls for entries the model dropped or mangled
+        self.executor = BlockingExecutor("gemini", max_workers=2, timeout=timeout)
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = _gemini().GenerativeModel(self.model_name)
+        return self._model
+
+    @model.setter
+    def model(self, model):
+        self._model = model
 
     def _fallback_analysis(self, news_item: Dict) -> Dict:
         """Fast fallback when API is rate limited - uses simple sentiment analysis."""
-        title = news_item.get('title', '').lower()
-        
-        # Count sentiment keywords
-        bullish_score = sum(1 for word in BULLISH_KEYWORDS if word in title)
-        bearish_score = sum(1 for word in BEARISH_KEYWORDS if word in title)
-        
-        # Extract ticker
-        ticker = 'SPY'
-        for keyword, symbol in TICKER_KEYWORDS.items():
-            if keyword in title:
-                ticker = symbol
-                break
+        return self._decide_from_keywords(KEYWORD_MATCHER.match(news_item.get('title', '')))
+
+    def fallback_batch(self, news_items: List[Dict]) -> List[Dict]:
+        """Keyword decisions for many headlines, scanned in one regex pass."""
+        matches = KEYWORD_MATCHER.match_batch([item.get('title', '') for item in news_items])
+        return [self._decide_from_keywords(match) for match in matches]
+
+    def _decide_from_keywords(self, match: HeadlineMatch) -> Dict:
+        bullish_score, bearish_score = match.bullish, match.bearish
+        # The first ticker mentioned in the headline, not the first in TICKER_KEYWORDS
+        ticker = match.primary_ticker or 'SPY'
         
         # Determine action
+        weights = self.fallback_weights
         if bullish_score > bearish_score:
             action = 'BUY'
-            confidence = min(0.5 + (bullish_score * 0.1), 0.9)
+            confidence = min(weights['base_confidence'] + (bullish_score * weights['keyword_weight']), weights['max_confidence'])
             reasoning = f"Bullish signals detected ({bullish_score} positive keywords)"
         elif bearish_score > bullish_score:
             action = 'SELL'
-            confidence = min(0.5 + (bearish_score * 0.1), 0.9)
+            confidence = min(weights['base_confidence'] + (bearish_score * weights['keyword_weight']), weights['max_confidence'])
             reasoning = f"Bearish signals detected ({bearish_score} negative keywords)"
         else:
-            action = random.choice(['BUY', 'SELL'])  # Random for excitement!
-            confidence = 0.45
+            action = self.rng.choice(['BUY', 'SELL'])  # Random for excitement!
+            confidence = weights['neutral_confidence']
             reasoning = "Neutral sentiment - taking speculative position"
         
         return {
@@ -68,41 +142,134 @@ class TraderAgent:
             "ticker": ticker,
             "confidence": confidence,
             "reasoning": reasoning,
-            "allocation_percent": random.uniform(0.02, 0.08)
+            "allocation_percent": self.rng.uniform(0.02, 0.08)
         }
 
     def analyze_news(self, news_item: Dict) -> Optional[Dict]:
         """Analyzes news - uses Gemini when possible, falls back to simple analysis."""
-        
+        cached = self.cache.get(news_item['title'], news_item.get('source'), self.cache_namespace)
+        if cached:
+            return cached
+
         # Rate limiting
-        time_since_last = time.time() - self.last_api_call
+        time_since_last = self.clock.time() - self.last_api_call
         if time_since_last < self.rate_limit_delay:
             # Use fallback instead of waiting
             print("Rate limit: Using fast fallback analysis")
+            FALLBACK_DECISIONS.inc("rate_limit")
             return self._fallback_analysis(news_item)
         
-        prompt = f"""You are an AI trader. Analyze this headline and decide BUY, SELL, or HOLD.
+        prompt = self._with_persona(f"""You are an AI trader. Analyze this headline and decide BUY, SELL, or HOLD.
 
 News: "{news_item['title']}"
 
 Output JSON only:
-{{"action": "BUY/SELL/HOLD", "ticker": "SYMBOL", "confidence": 0.0-1.0, "reasoning": "one sentence", "allocation_percent": 0.01-0.10}}"""
+{{"action": "BUY/SELL/HOLD", "ticker": "SYMBOL", "confidence": 0.0-1.0, "reasoning": "one sentence", "allocation_percent": 0.01-0.10}}""")
         
         try:
-            self.last_api_call = time.time()
-            response = self.model.generate_content(prompt)
-            text = response.text.strip()
-            
-            # Clean markdown
-            if '```' in text:
-                text = text.split('```')[1] if '```' in text else text
-                if text.startswith('json'):
-                    text = text[4:]
-            text = text.strip()
-            
-            return json.loads(text)
+            self.last_api_call = self.clock.time()
+            with LLM_LATENCY.time("single"):
+                response = self.model.generate_content(prompt)
+            decision = json.loads(_clean_json_text(response.text))
+            if _is_valid_decision(decision):
+                self.cache.put(news_item['title'], decision, news_item.get('source'), self.cache_namespace)
+            return decision
         except Exception as e:
             print(f"Gemini Error (using fallback): {e}")
+            LLM_ERRORS.inc("single")
+            FALLBACK_DECISIONS.inc("error")
             return self._fallback_analysis(news_item)
 
-trader_agent = TraderAgent()
+    def _with_persona(self, prompt: str) -> str:
+        return f"{self.persona}\n\n{prompt}" if self.persona else prompt
+
+    def _batch_prompt(self, news_items: List[Dict]) -> str:
+        headlines = "\n".join(f'{i}. "{item["title"]}"' for i, item in enumerate(news_items))
+        return self._with_persona(f"""You are an AI trader. Analyze each headline and decide BUY, SELL, or HOLD for each one.
+
+News:
+{headlines}
+
+Output a JSON array only, one object per headline, using the headline number as "id":
+[{{"id": 0, "action": "BUY/SELL/HOLD", "ticker": "SYMBOL", "confidence": 0.0-1.0, "reasoning": "one sentence", "allocation_percent": 0.01-0.10}}]""")
+
+    def _request_batch(self, news_items: List[Dict]) -> Dict[int, Dict]:
+        """One Gemini call for several headlines. Returns index -> valid decision."""
+        self.last_api_call = self.clock.time()
+        with LLM_LATENCY.time("batch"):
+            response = self.model.generate_content(self._batch_prompt(news_items))
+        parsed = json.loads(_clean_json_text(response.text))
+        if isinstance(parsed, dict):
+            parsed = parsed.get('decisions', [parsed])
+        if not isinstance(parsed, list):
+            return {}
+
+        decisions = {}
+        for position, entry in enumerate(parsed):
+            if not isinstance(entry, dict):
+                continue
+            # Match on the id we asked for; fall back to array position if it is missing
+            index = entry.pop('id', position)
+            try:
+                index = int(index)
+            except (TypeError, ValueError):
+                continue
+            if 0 <= index < len(news_items) and index not in decisions and _is_valid_decision(entry):
+                decisions[index] = entry
+        return decisions
+
+    def analyze_batch(self, news_items: List[Dict]) -> List[Dict]:
+        """
+        Analyzes several headlines with one Gemini call per `max_batch` headlines.
+        Entries missing from the reply are retried, then fall back one by one.
+        The rate limit is checked once per call; later chunks and retries wait
+        out rate_limit_delay instead of falling back.
+        """
+        results: List[Optional[Dict]] = [
+            self.cache.get(item['title'], item.get('source'), self.cache_namespace) for item in news_items
+        ]
+        uncached = [i for i, result in enumerate(results) if result is None]
+        if uncached and self.clock.time() - self.last_api_call < self.rate_limit_delay:
+            print(f"Rate limit: Using fast fallback analysis for {len(uncached)} headlines")
+            FALLBACK_DECISIONS.inc("rate_limit", amount=len(uncached))
+            uncached = []
+
+        for start in range(0, len(uncached), self.max_batch):
+            pending = uncached[start:start + self.max_batch]
+            for attempt in range(1 + self.batch_retries):
+                if not pending:
+                    break
+                if start or attempt:
+                    self._wait_for_rate_limit()
+                try:
+                    decisions = self._request_batch([news_items[i] for i in pending])
+                except Exception as e:
+                    print(f"Gemini batch error (attempt {attempt + 1}): {e}")
+                    LLM_ERRORS.inc("batch")
+                    continue
+                for offset, decision in decisions.items():
+                    item = news_items[pending[offset]]
+                    results[pending[offset]] = decision
+                    self.cache.put(item['title'], decision, item.get('source'), self.cache_namespace)
+                pending = [i for i in pending if results[i] is None]
+
+            if pending:
+                print(f"Gemini batch: {len(pending)} headlines using fallback")
+                FALLBACK_DECISIONS.inc("error", amount=len(pending))
+
+        return [result or self._fallback_analysis(item) for result, item in zip(results, news_items)]
+
+    def _wait_for_rate_limit(self):
+        """Sleeps (on the executor thread) until rate_limit_delay has passed since the last call."""
+        remaining = self.rate_limit_delay - (self.clock.time() - self.last_api_call)
+        if remaining > 0:
+            time.sleep(remaining)
+
+    async def analyze_batch_async(self, news_items: List[Dict]) -> List[Dict]:
+        """Runs analyze_batch off the event loop."""
+        try:
+            return await self.executor.run(self.analyze_batch, news_items)
+        except asyncio.TimeoutError:
+            print(f"Gemini batch timeout after {self.executor.timeout}s (using fallback)")
+            FALLBACK_DECISIONS.inc("timeout", amount=len(news_items))
+            return self.fallback_batch(news_items)
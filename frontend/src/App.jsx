@@ -39,7 +39,7 @@ const Dashboard = () => {
                 <div>
                     <h1>ALGO<span style={{ color: 'var(--neon-blue)' }}>MATES</span> AI TRADER</h1>
                     <div style={{ fontSize: '11px', color: '#666', marginTop: '5px' }}>
-                        Trades: {portfolio.total_trades || 0} | Cash: ${(portfolio.cash || 0).toFixed(2)}
+                        Trades: {portfolio.total_trades || 0} | Cash: ${(portfolio.cash || 0).toFixed(2)} | Max DD: {(portfolio.max_drawdown_pct || 0).toFixed(2)}% | Sharpe: {(portfolio.sharpe || 0).toFixed(2)}
                     </div>
                 </div>
                 <div style={{ display: 'flex', gap: '30px', alignItems: 'center' }}>
@@ -2,12 +2,29 @@ import React, { createContext, useContext, useEffect, useState, useRef } from 'r
 
 const WebSocketContext = createContext(null);
 
+// Applies a PORTFOLIO_DELTA to the last known portfolio state
+const applyDelta = (state, delta) => {
+    const positions = { ...state.positions, ...(delta.positions || {}) };
+    (delta.removed || []).forEach(ticker => delete positions[ticker]);
+    const lastTradeId = state.last_trade_id || 0;
+    const newTrades = (delta.trades || []).filter(trade => trade.id > lastTradeId);
+    return {
+        ...state,
+        ...(delta.scalars || {}),
+        positions,
+        trade_log: [...newTrades, ...state.trade_log].slice(0, 20),
+        last_trade_id: delta.last_trade_id || lastTradeId
+    };
+};
+
 export const WebSocketProvider = ({ children }) => {
     const [socket, setSocket] = useState(null);
     const [lastMessage, setLastMessage] = useState(null);
     const [readyState, setReadyState] = useState(0); // 0: CLOSED, 1: OPEN, 2: CLOSING, 3: CLOSED
 
     const ws = useRef(null);
+    const portfolio = useRef(null); // { seq, state } from the versioned portfolio stream
+    const resyncPending = useRef(false); // One RESYNC in flight until its snapshot arrives
 
     useEffect(() => {
         // Connect to local backend
@@ -21,11 +38,33 @@ export const WebSocketProvider = ({ children }) => {
 
             ws.current.onmessage = (event) => {
                 const message = JSON.parse(event.data);
-                setLastMessage(message);
+
+                if (message.type === "PORTFOLIO_SNAPSHOT") {
+                    portfolio.current = { seq: message.seq, state: message.data };
+                    resyncPending.current = false;
+                    setLastMessage({ type: "PORTFOLIO_UPDATE", data: message.data });
+                } else if (message.type === "PORTFOLIO_DELTA") {
+                    if (!portfolio.current || message.seq <= portfolio.current.seq) return;
+                    if (message.seq !== portfolio.current.seq + 1) {
+                        // Missed a delta - ask for a full snapshot (once; later deltas are gaps too)
+                        if (!resyncPending.current) {
+                            resyncPending.current = true;
+                            ws.current.send(JSON.stringify({ type: "RESYNC" }));
+                        }
+                        return;
+                    }
+                    const state = applyDelta(portfolio.current.state, message.data);
+                    portfolio.current = { seq: message.seq, state };
+                    setLastMessage({ type: "PORTFOLIO_UPDATE", data: state });
+                } else {
+                    setLastMessage(message);
+                }
             };
 
             ws.current.onclose = () => {
                 console.log("WebSocket Disconnected");
+                portfolio.current = null;
+                resyncPending.current = false;
                 setReadyState(0);
                 setTimeout(connect, 3000); // Reconnect after 3s
             };